@@ -2,6 +2,7 @@
 
 import sys
 import os
+import uuid
 from typing import Callable, Any
 from langchain_core.runnables import RunnableConfig
 
@@ -66,7 +67,11 @@ def get_user_input_with_default(
 def run_interactive_demo():
     """Main function to run the interactive travel assistant demo."""
     try:
-        from travel_assistant import graph  # Import the travel assistant graph
+        from travel_assistant import graph, PLAN_NODES  # Import the travel assistant graph
+        from travel_common.env import require_keys
+        from travel_common.plan_stream import ConsoleTokenPrinter, stream_with_tokens
+
+        require_keys()  # Ask for missing API keys before the first prompt
 
         # Get user input for city, days, and number of travelers
         city = get_user_input_with_default(
@@ -100,7 +105,7 @@ def run_interactive_demo():
         print("=" * 50)
 
         current_state = initial_state.copy()
-        thread = {"configurable": {"thread_id": "1"}}  # Thread context for the assistant
+        thread = {"configurable": {"thread_id": f"demo-{uuid.uuid4().hex}"}}  # Fresh thread per demo run
 
         # Stream traveler generation events and display them
         for event in graph.stream(current_state, thread, stream_mode="values"):
@@ -127,17 +132,29 @@ def run_interactive_demo():
                     print(f"Name: {traveler.name}")
                     print(f"Description: {traveler.description}")
 
-        # Reset feedback and stream the final plan
+        # Reset feedback and stream the final plan token by token as it is written
         graph.update_state(
             thread, {"human_feedback_traveler": None}, as_node="human_feedback_traveler_node"
         )
-        for event in graph.stream(None, thread, stream_mode="values"):
-            final_plan = event.get('final_plan', '')
-            if final_plan:
-                print("final_plan")
-                print("📅" * 50)
-                print(final_plan)
-                print("📅" * 50)
+        printer = ConsoleTokenPrinter()
+        final_plan = ""
+        for mode, event in stream_with_tokens(graph, None, thread, PLAN_NODES, stream_mode="values"):
+            if mode == "token":
+                if not printer.streamed:
+                    print("final_plan")
+                    print("📅" * 50)
+                printer(*event)
+                continue
+            final_plan = event.get('final_plan', '') or final_plan
+        printer.finish()
+        if printer.streamed:
+            print("📅" * 50)
+        elif final_plan:
+            # Cached plans arrive without tokens, so print the stored text instead
+            print("final_plan")
+            print("📅" * 50)
+            print(final_plan)
+            print("📅" * 50)
         print("✅ Demo complete!")
         print("=" * 50)
     except Exception as e:
@@ -2,40 +2,61 @@ import operator
 from pydantic import BaseModel, Field
 from typing import Annotated, List, Dict, Any, Optional
 from typing_extensions import TypedDict
-import requests
 import json
-import os, getpass
-from dotenv import load_dotenv
+import os, re, sys, threading
 
-# LangChain and LangGraph imports for LLM, tools, and workflow
-from langchain_community.document_loaders import WikipediaLoader
-from langchain_community.tools.tavily_search import TavilySearchResults
+# LangChain and LangGraph imports for messages and workflow (the OpenAI client and the
+# Wikipedia loader are imported on first use)
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, get_buffer_string
-from langchain_openai import ChatOpenAI
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.types import Send
 from langgraph.graph import END, MessagesState, START, StateGraph
-from langgraph.checkpoint.memory import MemorySaver
 
-# Helper function to set environment variables interactively if not set
-def _set_env(var: str):
-    if not os.environ.get(var):
-        os.environ[var] = getpass.getpass(f"{var}: ")
-
-# Load environment variables from .env file and prompt for missing keys
-load_dotenv()
-_set_env("OPENAI_API_KEY")
-_set_env("OPENWEATHER_KEY")
-_set_env("TAVILY_API_KEY")
-
-# Get environment variables for API keys
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
-OPENWEATHER_KEY = os.environ.get("OPENWEATHER_KEY", "")
-TAVILY_API_KEY = os.environ.get("TAVILY_API_KEY", "")
-
-### LLM initialization
-
-llm = ChatOpenAI(model="gpt-4o", temperature=0)
+# Add the repository root to Python path for the shared travel_common package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from travel_common.checkpointer import get_checkpointer
+from travel_common.env import API_KEYS, get_key
+from travel_common.semantic_cache import cached_retrieval
+from travel_common.speculation import get_speculator, speculation_enabled
+from travel_common.metrics import instrument_graph
+from travel_common.http_client import search_tavily
+from travel_common.geocode_store import get_latlon
+from travel_common.weather_cache import forecast_for_coords
+from travel_common.weather_agg import aggregate_daily
+
+# API keys are read on first use from the environment or a .env file, prompting only on an
+# interactive terminal (see travel_common.env), so importing this module never blocks
+
+### Lazy initialization
+
+# The LLM and the compiled graphs are created on first use and cached, so importing this
+# module is fast and headless; `llm`, `graph`, `dialogue_graph`, `memory` and the API key
+# names remain available as module attributes through __getattr__ at the end of this file
+_llm = None
+_graph = None
+_dialogue_graph = None
+_init_lock = threading.RLock()
+
+def get_llm():
+    """Return the shared LLM, creating it on first use."""
+    global _llm
+    with _init_lock:
+        if _llm is None:
+            from travel_common.llm_cache import get_llm_cache
+            from travel_common.llm_scheduler import ScheduledChatOpenAI
+
+            get_key("OPENAI_API_KEY")
+            # Responses are cached on disk when TRAVEL_LLM_CACHE is set; with TRAVEL_LLM_RPM / TRAVEL_LLM_TPM
+            # set, calls are rate-scheduled process-wide so the Send fan-outs stay under the API limits
+            _llm = ScheduledChatOpenAI(model="gpt-4o", temperature=0, cache=get_llm_cache())
+        return _llm
+
+def set_llm(model) -> None:
+    """Replace the shared LLM, e.g. with an offline stand-in."""
+    global _llm
+    with _init_lock:
+        _llm = model
 
 ### Data Schemas
 
@@ -89,6 +110,7 @@ class TravelGraphState(TypedDict):
     weather: List[Dict[str, Any]]
     days: int
     max_travelers: int
+    max_num_turns: int  # Dialogue turns per traveler (default 2)
     human_feedback_traveler: str
     human_feedback_plan: str
     travelers: List[Traveler]
@@ -120,60 +142,23 @@ traveler_instructions = """You are tasked with creating a set of AI traveler per
 
 7. Assign one traveler to each topic."""
 
-def get_latlon(city: str):
-    """Get latitude and longitude for a destination using OpenStreetMap."""
-    resp = requests.get(
-        "https://nominatim.openstreetmap.org/search",
-        params={"q": city, "format": "json", "limit": 1},
-        headers={"User-Agent": "Travel-Agent"},
-        timeout=10,
-    )
-    resp.raise_for_status()
-    data = resp.json()
-    if not data:
-        raise ValueError(f"Cannot resolve coordinates for '{city}'")
-    return f"{data[0]['lat']},{data[0]['lon']}"
+# Appended on a feedback round, so personas the feedback leaves alone are copied unchanged
+# (and keep their speculative dialogues, see dialogue_key)
+keep_travelers_instructions = """
+
+8. These travelers were proposed before the feedback:
+
+{travelers}
+Copy every traveler the feedback does not ask to change word for word, with the same name and description."""
 
 def get_weather(city: str, days: int = 5) -> List[Dict]:
     """Get weather information for a city using OpenWeather API."""
-    if not OPENWEATHER_KEY:
+    if not get_key("OPENWEATHER_KEY"):
         return [{"error": "OpenWeather API key not set"}]
 
     try:
         lat, lon = map(float, get_latlon(city).split(","))
-        resp = requests.get(
-            "https://api.openweathermap.org/data/2.5/forecast",
-            params={
-                "lat": lat,
-                "lon": lon,
-                "appid": OPENWEATHER_KEY,
-                "units": "metric",
-                "lang": "en",
-            },
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()["list"]
-
-        # Aggregate weather data by day
-        daily = {}
-        for item in data:
-            date = item["dt_txt"][:10]
-            if date not in daily:
-                daily[date] = {"temps": [], "descs": [], "pops": []}
-            daily[date]["temps"].append(item["main"]["temp"])
-            daily[date]["descs"].append(item["weather"][0]["description"])
-            daily[date]["pops"].append(item.get("pop", 0.0))
-
-        out = []
-        for date, rec in sorted(daily.items())[:days]:
-            out.append({
-                "date": date,
-                "summary": max(set(rec["descs"]), key=rec["descs"].count),
-                "temp_max": round(max(rec["temps"]), 1),
-                "temp_min": round(min(rec["temps"]), 1),
-                "pop_max": round(max(rec["pops"]), 2),
-            })
+        out = aggregate_daily(forecast_for_coords(lat, lon, get_key("OPENWEATHER_KEY")), days)
         # Print weather summary for debugging
         for day in out:
             if isinstance(day, dict):
@@ -199,7 +184,7 @@ def get_weather_info(state: TravelGraphState):
         "weather": weather
     }
 
-def create_travelers(state: TravelGraphState):
+def create_travelers(state: TravelGraphState, config: RunnableConfig):
     """Node: Create traveler personas based on city, weather, days, and feedback."""
     city = state['city']
     weather = state['weather']
@@ -207,7 +192,7 @@ def create_travelers(state: TravelGraphState):
     max_travelers = state['max_travelers']
     human_feedback_traveler = state.get('human_feedback_traveler', '')
     # Use LLM with structured output for traveler generation
-    structured_llm = llm.with_structured_output(Perspectives)
+    structured_llm = get_llm().with_structured_output(Perspectives)
     system_message = traveler_instructions.format(
         city=city,
         weather=weather,
@@ -215,10 +200,15 @@ def create_travelers(state: TravelGraphState):
         human_feedback_traveler=human_feedback_traveler,
         max_travelers=max_travelers
     )
+    if human_feedback_traveler and state.get("travelers"):
+        system_message += keep_travelers_instructions.format(
+            travelers="\n".join(traveler.persona for traveler in state["travelers"])
+        )
     travelers = structured_llm.invoke(
         [SystemMessage(content=system_message)] +
         [HumanMessage(content="Generate the set of travelers.")]
     )
+    prefetch_dialogues(state, travelers.travelers, config)
     return {"travelers": travelers.travelers}
 
 def feedback_traveler(state: TravelGraphState):
@@ -249,7 +239,7 @@ def generate_question(state: dialogueState):
     traveler = state["traveler"]
     messages = state["messages"]
     system_message = question_instructions.format(topic=traveler.persona)
-    question = llm.invoke([SystemMessage(content=system_message)] + messages)
+    question = get_llm().invoke([SystemMessage(content=system_message)] + messages)
     return {"messages": [question]}
 
 # Instructions for search query generation
@@ -265,30 +255,51 @@ Convert this final question into a well-structured web search query""")
 
 def search_web(state: dialogueState):
     """Node: Retrieve documents from web search using Tavily."""
-    tavily_search = TavilySearchResults(max_results=3)
-    structured_llm = llm.with_structured_output(SearchQuery)
+    structured_llm = get_llm().with_structured_output(SearchQuery)
     search_query = structured_llm.invoke([search_instructions] + state['messages'])
-    search_docs = tavily_search.invoke(search_query.search_query)
-    formatted_search_docs = "\n\n---\n\n".join(
+    formatted_search_docs = cached_retrieval(
+        "tavily",
+        search_query.search_query,
+        lambda: _search_tavily_docs(search_query.search_query),
+        scope=state.get("city"),
+        cacheable=bool,
+    )
+    return {"context": [formatted_search_docs]}
+
+def _search_tavily_docs(query: str) -> str:
+    """Run a Tavily search and format the results as source documents."""
+    search_docs = search_tavily(query, get_key("TAVILY_API_KEY"), max_results=3)
+    return "\n\n---\n\n".join(
         [
             f'<Document href="{doc["url"]}"/>\n{doc["content"]}\n</Document>'
             for doc in search_docs
         ]
     )
-    return {"context": [formatted_search_docs]}
 
 def search_wikipedia(state: dialogueState):
     """Node: Retrieve documents from Wikipedia."""
-    structured_llm = llm.with_structured_output(SearchQuery)
+    structured_llm = get_llm().with_structured_output(SearchQuery)
     search_query = structured_llm.invoke([search_instructions] + state['messages'])
-    search_docs = WikipediaLoader(query=search_query.search_query, load_max_docs=2).load()
-    formatted_search_docs = "\n\n---\n\n".join(
+    formatted_search_docs = cached_retrieval(
+        "wikipedia",
+        search_query.search_query,
+        lambda: _search_wikipedia_docs(search_query.search_query),
+        scope=state.get("city"),
+        cacheable=bool,
+    )
+    return {"context": [formatted_search_docs]}
+
+def _search_wikipedia_docs(query: str) -> str:
+    """Load Wikipedia pages for a query and format them as source documents."""
+    from langchain_community.document_loaders import WikipediaLoader
+
+    search_docs = WikipediaLoader(query=query, load_max_docs=2).load()
+    return "\n\n---\n\n".join(
         [
             f'<Document source="{doc.metadata["source"]}" page="{doc.metadata.get("page", "")}"/>\n{doc.page_content}\n</Document>'
             for doc in search_docs
         ]
     )
-    return {"context": [formatted_search_docs]}
 
 # Instructions for local's answer
 answer_instructions = """You are a local who has been living in the {city} for over 20 years being taking to a traveler.
@@ -322,18 +333,32 @@ def generate_answer(state: dialogueState):
     context = state["context"]
     city = state["city"]
     system_message = answer_instructions.format(city=city, topic=traveler.persona, context=context)
-    answer = llm.invoke([SystemMessage(content=system_message)] + messages)
+    answer = get_llm().invoke([SystemMessage(content=system_message)] + messages)
     answer.name = "local"
     return {"messages": [answer]}
 
-def save_dialogue(state: dialogueState):
-    """Node: Save the dialogue transcript."""
-    messages = state["messages"]
-    dialogue = get_buffer_string(messages)
-    print("💬💬dialogue:" + state["traveler"].name)
+def _is_speculative(config: RunnableConfig) -> bool:
+    """Speculative dialogues run during the feedback pause and print once they are used."""
+    return bool((config or {}).get("metadata", {}).get("speculative"))
+
+def print_dialogue(name: str, dialogue: str):
+    print("💬💬dialogue:" + name)
     print("💬" * 50)
     print(dialogue)
     print("💬" * 50)
+
+def print_section(section: str):
+    print('summary')
+    print("📝" * 50)
+    print(section)
+    print('📝' * 50)
+
+def save_dialogue(state: dialogueState, config: RunnableConfig):
+    """Node: Save the dialogue transcript."""
+    messages = state["messages"]
+    dialogue = get_buffer_string(messages)
+    if not _is_speculative(config):
+        print_dialogue(state["traveler"].name, dialogue)
     return {"dialogue": dialogue}
 
 def route_messages(state: dialogueState, name: str = "local"):
@@ -398,42 +423,102 @@ There should be no redundant sources. It should simply be:
 - Include no preamble before the title of the report
 - Check that all guidelines have been followed"""
 
-def write_section(state: dialogueState):
+def write_section(state: dialogueState, config: RunnableConfig):
     """Node: Write a summary section based on the dialogue and context."""
     dialogue = state["dialogue"]
     context = state["context"]
     traveler = state["traveler"]
     system_message = section_writer_instructions.format(topic=traveler.persona, dialogue=dialogue)
-    section = llm.invoke(
+    section = get_llm().invoke(
         [SystemMessage(content=system_message)] +
         [HumanMessage(content=f"Use this source to write your section: {context}")]
     )
-    print('summary')
-    print("📝" * 50)
-    print(section.content)
-    print('📝' * 50)
+    if not _is_speculative(config):
+        print_section(section.content)
     return {"sections": [section.content]}
 
-# Build the dialogue subgraph
-dialogue_builder = StateGraph(dialogueState, output=dialogueOutputState)
-dialogue_builder.add_node("ask_question", generate_question)
-dialogue_builder.add_node("search_web", search_web)
-dialogue_builder.add_node("search_wikipedia", search_wikipedia)
-dialogue_builder.add_node("answer_question", generate_answer)
-dialogue_builder.add_node("save_dialogue", save_dialogue)
-dialogue_builder.add_node("write_section", write_section)
-
-# Dialogue flow
-dialogue_builder.add_edge(START, "ask_question")
-dialogue_builder.add_edge("ask_question", "search_web")
-dialogue_builder.add_edge("ask_question", "search_wikipedia")
-dialogue_builder.add_edge("search_web", "answer_question")
-dialogue_builder.add_edge("search_wikipedia", "answer_question")
-dialogue_builder.add_conditional_edges("answer_question", route_messages, ['ask_question', 'save_dialogue'])
-dialogue_builder.add_edge("save_dialogue", "write_section")
-dialogue_builder.add_edge("write_section", END)
-
-def conduct_dialogue_router(state: TravelGraphState):
+def build_dialogue_graph():
+    """Build and compile the dialogue subgraph."""
+    dialogue_builder = StateGraph(dialogueState, output=dialogueOutputState)
+    dialogue_builder.add_node("ask_question", generate_question)
+    dialogue_builder.add_node("search_web", search_web)
+    dialogue_builder.add_node("search_wikipedia", search_wikipedia)
+    dialogue_builder.add_node("answer_question", generate_answer)
+    dialogue_builder.add_node("save_dialogue", save_dialogue)
+    dialogue_builder.add_node("write_section", write_section)
+
+    # Dialogue flow
+    dialogue_builder.add_edge(START, "ask_question")
+    dialogue_builder.add_edge("ask_question", "search_web")
+    dialogue_builder.add_edge("ask_question", "search_wikipedia")
+    dialogue_builder.add_edge("search_web", "answer_question")
+    dialogue_builder.add_edge("search_wikipedia", "answer_question")
+    dialogue_builder.add_conditional_edges("answer_question", route_messages, ['ask_question', 'save_dialogue'])
+    dialogue_builder.add_edge("save_dialogue", "write_section")
+    dialogue_builder.add_edge("write_section", END)
+    # Instrumented on its own too, so speculative dialogues run outside the main graph are measured
+    # (their nodes are reported without the conduct_dialogue_sub/ prefix)
+    return instrument_graph(dialogue_builder.compile(), "travel_assistant")
+
+def get_dialogue_graph():
+    """Return the compiled dialogue subgraph, building it on first use."""
+    global _dialogue_graph
+    with _init_lock:
+        if _dialogue_graph is None:
+            _dialogue_graph = build_dialogue_graph()
+        return _dialogue_graph
+
+def dialogue_input(traveler: Traveler, city: str, max_travelers: int, max_num_turns: int = 2) -> Dict[str, Any]:
+    """Initial dialogue subgraph state for one traveler."""
+    return {
+        "traveler": traveler,
+        "messages": [HumanMessage(content=f"So you said you plan to have a trip on {city}?")],
+        "max_num_turns": max_num_turns,
+        "context": [],
+        "dialogue": "",
+        "sections": [],
+        "city": city,
+        "max_travelers": max_travelers
+    }
+
+def dialogue_key(city: str, traveler: Traveler) -> str:
+    """Speculative dialogues are matched by city and normalized persona, so a changed
+    description ("make Aiko vegetarian") starts a new dialogue."""
+    name, description = (" ".join(re.sub(r"[^\w\s]", " ", text).casefold().split())
+                         for text in (traveler.name, traveler.description))
+    return json.dumps([city.strip().casefold(), name, description])
+
+def prefetch_dialogues(state: TravelGraphState, travelers: List[Traveler], config: RunnableConfig):
+    """Start the dialogues of the proposed travelers while the graph waits for traveler feedback."""
+    thread_id = (config or {}).get("configurable", {}).get("thread_id")
+    if not speculation_enabled() or thread_id is None:
+        return
+    speculator = get_speculator()
+    city = state.get("city", "")
+    keyed = {dialogue_key(city, traveler): traveler for traveler in travelers}
+    # Personas changed or removed by the feedback are dropped; unchanged ones keep their dialogues
+    speculator.retain(str(thread_id), keyed)
+    prefetch_config = {"metadata": {"thread_id": thread_id, "speculative": True}}
+    for key, traveler in keyed.items():
+        inputs = dialogue_input(traveler, city, state.get("max_travelers", 3), state.get("max_num_turns", 2))
+        speculator.start(str(thread_id), key, get_dialogue_graph().invoke, inputs, prefetch_config)
+
+def conduct_dialogue(state: dialogueState, config: RunnableConfig):
+    """Node: Run the traveler-local dialogue, or pick up the one started during the feedback pause."""
+    thread_id = config.get("configurable", {}).get("thread_id")
+    prefetched = get_speculator().take(str(thread_id), dialogue_key(state["city"], state["traveler"])) if speculation_enabled() else None
+    if prefetched is not None:
+        try:
+            result = prefetched.result()
+            print_dialogue(state["traveler"].name, result["dialogue"])
+            for section in result["sections"]:
+                print_section(section)
+            return {"sections": result["sections"]}
+        except Exception as e:
+            print(f"Speculative dialogue for {state['traveler'].name} failed, retrying: {e}")
+    return {"sections": get_dialogue_graph().invoke(state, config)["sections"]}
+
+def conduct_dialogue_router(state: TravelGraphState, config: RunnableConfig):
     """Router: For each traveler, start a dialogue subgraph."""
     feedbacks = state.get('human_feedback_traveler')
     print("human_feedback_traveler =", feedbacks)
@@ -442,16 +527,12 @@ def conduct_dialogue_router(state: TravelGraphState):
     city = state.get("city", "")
     max_travelers = state.get("max_travelers", 3)
     travelers = state.get("travelers", [])
-    return [Send("conduct_dialogue_sub", {
-        "traveler": traveler,
-        "messages": [HumanMessage(content=f"So you said you plan to have a trip on {city}?")],
-        "max_num_turns": 2,
-        "context": [],
-        "dialogue": "",
-        "sections": [],
-        "city": city,
-        "max_travelers": max_travelers
-    }) for traveler in travelers]
+    if speculation_enabled():
+        # Keep only the speculative dialogues of the approved travelers
+        keys = [dialogue_key(city, traveler) for traveler in travelers]
+        get_speculator().retain(str(config.get("configurable", {}).get("thread_id")), keys)
+    max_num_turns = state.get("max_num_turns", 2)
+    return [Send("conduct_dialogue_sub", dialogue_input(traveler, city, max_travelers, max_num_turns)) for traveler in travelers]
 
 # Instructions for writing the final travel plan
 plan_writer_instructions = """You are a professional travel planner creating a travel plan on this  city: {city}
@@ -529,7 +610,7 @@ def write_plan(state: TravelGraphState):
         context=formatted_str_sections,
         human_feedback_plan=human_feedback_plan
     )
-    plan = llm.invoke([SystemMessage(content=system_message)] + [HumanMessage(content=f"Write a travel plan based upon these memos.")])
+    plan = get_llm().invoke([SystemMessage(content=system_message)] + [HumanMessage(content=f"Write a travel plan based upon these memos.")])
     return {"final_plan": plan.content}
 
 def feedback_plan(state: TravelGraphState):
@@ -544,23 +625,50 @@ def initiate_all_plans(state: TravelGraphState):
     else:
         return "write_plan"
 
-# Build the main workflow graph
-builder = StateGraph(TravelGraphState)
-builder.add_node("get_weather_info", get_weather_info)
-builder.add_node("create_travelers", create_travelers)
-builder.add_node("human_feedback_traveler_node", feedback_traveler)
-builder.add_node("conduct_dialogue_router", conduct_dialogue_router)
-builder.add_node("conduct_dialogue_sub", dialogue_builder.compile())
-builder.add_node("write_plan", write_plan)
-
-# Main workflow logic
-builder.add_edge(START, "get_weather_info")
-builder.add_edge("get_weather_info", "create_travelers")
-builder.add_edge("create_travelers", "human_feedback_traveler_node")
-builder.add_conditional_edges("human_feedback_traveler_node", conduct_dialogue_router, ["create_travelers", "conduct_dialogue_sub"])
-builder.add_edge("conduct_dialogue_sub", "write_plan")
-builder.add_edge("write_plan", END)
-
-# Compile the workflow graph with memory checkpointing
-memory = MemorySaver()
-graph = builder.compile(interrupt_before=['human_feedback_traveler_node'], checkpointer=memory)
+def build_graph():
+    """Build and compile the main workflow graph."""
+    builder = StateGraph(TravelGraphState)
+    builder.add_node("get_weather_info", get_weather_info)
+    builder.add_node("create_travelers", create_travelers)
+    builder.add_node("human_feedback_traveler_node", feedback_traveler)
+    builder.add_node("conduct_dialogue_router", conduct_dialogue_router)
+    builder.add_node("conduct_dialogue_sub", conduct_dialogue)
+    builder.add_node("write_plan", write_plan)
+
+    # Main workflow logic
+    builder.add_edge(START, "get_weather_info")
+    builder.add_edge("get_weather_info", "create_travelers")
+    builder.add_edge("create_travelers", "human_feedback_traveler_node")
+    builder.add_conditional_edges("human_feedback_traveler_node", conduct_dialogue_router, ["create_travelers", "conduct_dialogue_sub"])
+    builder.add_edge("conduct_dialogue_sub", "write_plan")
+    builder.add_edge("write_plan", END)
+
+    # Compile the workflow graph with durable checkpointing (SQLite with retention, see TRAVEL_CHECKPOINT_DB);
+    # node, LLM and HTTP metrics are recorded locally (see travel_common.metrics)
+    return instrument_graph(builder.compile(interrupt_before=['human_feedback_traveler_node'], checkpointer=get_checkpointer()), "travel_assistant")
+
+def get_graph():
+    """Return the compiled workflow graph, building it on first use."""
+    global _graph
+    with _init_lock:
+        if _graph is None:
+            _graph = build_graph()
+        return _graph
+
+# Node whose LLM output is the final plan; callers can stream its tokens with
+# travel_common.plan_stream.stream_with_tokens
+PLAN_NODES = ("write_plan",)
+
+def __getattr__(name: str):
+    """Lazy module attributes: the LLM, the compiled graphs, the checkpointer and the API keys."""
+    if name == "llm":
+        return get_llm()
+    if name == "graph":
+        return get_graph()
+    if name == "dialogue_graph":
+        return get_dialogue_graph()
+    if name == "memory":
+        return get_graph().checkpointer
+    if name in API_KEYS:
+        return get_key(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,6 @@
+"""
+Offline performance benchmarks for the travel graphs.
+
+Run from the repository root with ``python -m benchmarks.run``; see
+``benchmarks/run.py`` for the scenarios and options.
+"""
@@ -0,0 +1,116 @@
+"""
+Deterministic stand-in for the GPT-4o chat model.
+
+``FakeTravelChatModel`` recognizes the prompts of both graphs (destination
+extraction, subtopics, research summaries, plans, traveler questions and
+answers, memos) and returns well-formed answers of a realistic length, so
+every node and parser downstream runs as it would against the real model.
+Latency is simulated as a fixed time to first token plus a per-token delay,
+and ``with_structured_output`` builds the requested pydantic object directly.
+"""
+
+import json
+import re
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+SUBTOPICS = ["Local food", "Historical sites", "Public transportation", "Shopping districts", "Cultural experiences"]
+PERSONAS = [
+    ("Mina", "Food lover who wants to try street food and local markets on a budget"),
+    ("Tom", "History enthusiast interested in museums, temples and guided walking tours"),
+    ("Sara", "Family traveler with two kids looking for parks and indoor activities"),
+    ("Leo", "Night owl interested in bars, live music and late-night food"),
+    ("Ana", "Photographer hunting for viewpoints and early-morning light"),
+]
+FILLER = ("The neighborhood is easy to reach by metro and quieter in the morning, "
+          "prices are moderate and locals recommend booking popular places a day ahead. ")
+
+def _words(count: int) -> str:
+    words = FILLER.split()
+    return " ".join(words[i % len(words)] for i in range(count))
+
+def _plan(cities: List[str], days: int) -> str:
+    lines = [f"# Travel Plan for {', '.join(cities) or 'your trip'}", "", "## 1. Trip Overview", _words(60), "", "## 2. Daily Itinerary", ""]
+    for day in range(1, days + 1):
+        lines += [f"### Day {day}: {cities[(day - 1) % len(cities)] if cities else 'City'} (Partly cloudy, 18°C - 24°C)",
+                  "#### Morning", _words(40), "#### Afternoon", _words(40), "#### Evening", _words(30), ""]
+    lines += ["## 3. Budget Estimation", "| Item | Cost |", "|---|---|", "| Hotel | $120 / ₩160,000 |", _words(30), "",
+              "## 4. Important Notes", _words(50)]
+    return "\n".join(lines)
+
+class FakeTravelChatModel(BaseChatModel):
+    """Chat model that answers the travel graphs' prompts without network access."""
+
+    cities: List[str] = ["Seoul"]
+    first_token_latency: float = 0.0
+    token_latency: float = 0.0
+    plan_days: int = 3
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-travel"
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        text = "\n".join(str(message.content) for message in messages)
+        if "Which sections must change" in text:
+            return '["day_2"]'
+        if "revising one section" in text:
+            match = re.search(r"Current section:\s*\n\s*(#+ [^\n]+)", text)
+            return f"{match.group(1) if match else '### Day 2'}\n{_words(60)}\n"
+        if "Extract destination locations" in text:
+            return json.dumps(self.cities)
+        if "Generate 5 travel-related subtopics" in text or "regenerate subtopics" in text:
+            return json.dumps(SUBTOPICS)
+        if "generate a detailed summary" in text:
+            return _words(180)
+        if "Create a comprehensive travel plan" in text or "regenerate the travel plan" in text:
+            return _plan(self.cities, self.plan_days)
+        if "creating a travel plan" in text:
+            return _plan(self.cities[:1], self.plan_days)
+        if "expert report writer" in text:
+            return f"## Insights\n{_words(150)}\n### Sources\n[1] https://example.com/guide"
+        if "You are a local who" in text:
+            return _words(120)
+        if "You are an traveler" in text:
+            return f"Hi, I am planning my trip. {_words(25)} What would you recommend?"
+        return _words(50)
+
+    def _sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        content = self._respond(messages)
+        self._sleep(self.first_token_latency + self.token_latency * len(content.split()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        content = self._respond(messages)
+        self._sleep(self.first_token_latency)
+        for word in re.findall(r"\S+\s*", content):
+            self._sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Any:
+        def build(messages: Any) -> Any:
+            self._sleep(self.first_token_latency + self.token_latency * 20)
+            fields = getattr(schema, "model_fields", {})
+            if "travelers" in fields:
+                text = "\n".join(str(getattr(message, "content", message)) for message in messages)
+                match = re.search(r"top (\d+) topics", text)
+                count = int(match.group(1)) if match else 1
+                traveler_type = fields["travelers"].annotation.__args__[0]
+                travelers = [traveler_type(name=name, description=description) for name, description in (PERSONAS * count)[:count]]
+                return schema(travelers=travelers)
+            if "search_query" in fields:
+                return schema(search_query=f"{self.cities[0]} local tips")
+            raise NotImplementedError(f"No fake structured output for {schema}")
+        return RunnableLambda(build)
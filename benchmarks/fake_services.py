@@ -0,0 +1,108 @@
+"""
+Local stand-ins for Nominatim, OpenWeather, Tavily and Wikipedia.
+
+``FakeServices`` serves the response shapes the travel graphs parse from a
+background ``ThreadingHTTPServer``, each request delayed by a configurable
+latency. Point the graphs at it through the endpoint variables read by
+``travel_common.http_client`` (``NOMINATIM_API_URL``, ``OPENWEATHER_API_URL``,
+``TAVILY_API_URL``), which must be set before that module is imported.
+"""
+
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+from urllib.parse import parse_qs, urlsplit
+
+def _forecast() -> Dict[str, Any]:
+    """Five days of 3-hour slots in OpenWeather's /forecast format."""
+    start = datetime.datetime.now(datetime.timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    slots = []
+    for i in range(40):
+        moment = start + datetime.timedelta(hours=3 * i)
+        slots.append({
+            "dt": int(moment.timestamp()),
+            "dt_txt": moment.strftime("%Y-%m-%d %H:%M:%S"),
+            "main": {"temp": 15.0 + (i % 8) * 1.5},
+            "weather": [{"description": "light rain" if i % 5 == 0 else "scattered clouds"}],
+            "pop": 0.6 if i % 5 == 0 else 0.1,
+        })
+    return {"cod": "200", "cnt": len(slots), "list": slots, "city": {"name": "Fake City", "coord": {"lat": 37.5, "lon": 127.0}}}
+
+FORECAST = _forecast()
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _reply(self, body: Any) -> None:
+        time.sleep(self.server.latency)
+        self.server.count(urlsplit(self.path).path)
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/nominatim/search":
+            self._reply([{"lat": "48.8566", "lon": "2.3522", "display_name": query.get("q", [""])[0]}])
+        elif url.path == "/openweather/forecast":
+            self._reply(FORECAST)
+        elif url.path == "/wikipedia":
+            topic = query.get("q", [""])[0]
+            self._reply([{"source": f"https://en.wikipedia.org/wiki/{topic.replace(' ', '_')}", "content": f"{topic} is a popular destination. " * 40}])
+        else:
+            self.send_error(404)
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path != "/tavily/search":
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        topic = body.get("query", "")
+        results = [{"title": f"{topic} guide {i}", "url": f"https://example.com/{i}", "content": f"Tips about {topic}. " * 30}
+                   for i in range(int(body.get("max_results", 5)))]
+        self._reply({"query": topic, "results": results})
+
+class FakeServices:
+    """Background HTTP server for the external APIs, with a fixed per-request latency."""
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self.server.count = self._count
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-services", daemon=True)
+
+    def _count(self, path: str) -> None:
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self) -> Dict[str, str]:
+        """Endpoint overrides for travel_common.http_client."""
+        return {
+            "NOMINATIM_API_URL": f"{self.base_url}/nominatim/search",
+            "OPENWEATHER_API_URL": f"{self.base_url}/openweather/forecast",
+            "TAVILY_API_URL": f"{self.base_url}/tavily/search",
+        }
+
+    def start(self) -> "FakeServices":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
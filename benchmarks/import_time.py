@@ -0,0 +1,87 @@
+"""
+Import-time budget for the graph modules.
+
+    python -m benchmarks.import_time --budget 1.5
+
+Each graph module is imported in a fresh interpreter, with no API keys set and
+stdin closed (an import that prompts for input times out), several times.
+The median import time must stay within the budget, and none of the modules
+that are meant to load on first use (the OpenAI client, the Wikipedia loader,
+Whisper) may be imported. Exits 1 when either check fails.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = {
+    "travel_agent_3": "travel_agent",
+    "travel_assistant": "agengo_code",
+}
+# Loaded only when the LLM is first used or a node first needs them
+LAZY_MODULES = ("langchain_openai", "openai", "langchain_community", "whisper", "dotenv")
+DEFAULT_BUDGET = 1.5
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "loaded": [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+def measure(module: str, directory: str, timeout: float) -> Dict[str, Any]:
+    """Import a module once in a clean interpreter."""
+    env = {key: value for key, value in os.environ.items() if key not in ("OPENAI_API_KEY", "OPENWEATHER_KEY", "TAVILY_API_KEY")}
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, lazy=LAZY_MODULES)],
+        cwd=os.path.join(REPO_ROOT, directory),
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the import time of the graph modules")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Maximum median import time in seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before an import counts as blocked")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {}
+    failures: List[str] = []
+    for module, directory in MODULES.items():
+        try:
+            runs = [measure(module, directory, args.timeout) for _ in range(args.runs)]
+        except subprocess.TimeoutExpired:
+            failures.append(f"{module}: import did not finish within {args.timeout:.0f}s (waiting for input?)")
+            continue
+        median = statistics.median(run["seconds"] for run in runs)
+        loaded = sorted({name for run in runs for name in run["loaded"]})
+        results[module] = {"median_seconds": round(median, 3), "max_seconds": round(max(run["seconds"] for run in runs), 3), "eager_modules": loaded}
+        print(f"{module:<20} median {median:.3f}s  max {results[module]['max_seconds']:.3f}s  budget {args.budget:.3f}s")
+        if median > args.budget:
+            failures.append(f"{module}: median import {median:.3f}s exceeds the {args.budget:.3f}s budget")
+        if loaded:
+            failures.append(f"{module}: imports {', '.join(loaded)} eagerly")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"budget_seconds": args.budget, "modules": results, "failures": failures}, f, indent=2)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+End-to-end latency benchmarks for both travel graphs, without network access.
+
+    python -m benchmarks.run --iterations 5
+    python -m benchmarks.run --json after.json --baseline before.json
+
+The chat model is replaced by ``FakeTravelChatModel`` and Nominatim,
+OpenWeather, Tavily and Wikipedia by the local ``FakeServices`` server, each
+with configurable latency, so results depend only on the graphs and the
+shared ``travel_common`` layers. Every scenario drives its graph from the
+initial state to the end, answering feedback interrupts instantly, and
+reports total and per-node wall-clock p50/p95 (from LangGraph's debug
+stream, including dialogue subgraph nodes) and peak memory (Python
+allocations traced in one extra run, and the process's maximum RSS).
+
+With ``--baseline``, the run fails when a scenario's total p95 exceeds the
+baseline's by more than ``--tolerance``.
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.fake_llm import FakeTravelChatModel
+from benchmarks.fake_services import FakeServices
+
+class Scenario(NamedTuple):
+    name: str
+    graph: str
+    request: Dict[str, Any]
+    cities: List[str]
+    feedback: Dict[str, List[str]] = {}
+    plan_days: int = 3
+
+SCENARIOS = [
+    Scenario("agent-1-city", "travel_agent", {"query": "Plan 3 days in Seoul"}, ["Seoul"]),
+    Scenario("agent-3-cities", "travel_agent", {"query": "Plan a trip to Seoul, Tokyo and Bangkok"}, ["Seoul", "Tokyo", "Bangkok"], plan_days=5),
+    Scenario("agent-3-cities-revise", "travel_agent", {"query": "Plan a trip to Seoul, Tokyo and Bangkok"}, ["Seoul", "Tokyo", "Bangkok"],
+             {"human_feedback_plan": ["Make day 2 more relaxed"]}, plan_days=5),
+    Scenario("assistant-1-traveler", "travel_assistant", {"city": "Tokyo", "days": 3, "max_travelers": 1, "max_num_turns": 2}, ["Tokyo"]),
+    Scenario("assistant-3-travelers", "travel_assistant", {"city": "Tokyo", "days": 3, "max_travelers": 3, "max_num_turns": 2}, ["Tokyo"]),
+    Scenario("assistant-3-travelers-4-turns-5-days", "travel_assistant", {"city": "Tokyo", "days": 5, "max_travelers": 3, "max_num_turns": 4}, ["Tokyo"], plan_days=5),
+]
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else None
+
+# ==================== Environment ====================
+
+def prepare_environment(services: FakeServices, keep_caches: bool) -> None:
+    """Point every external dependency at local stand-ins; must run before the graphs are imported."""
+    os.environ.update(services.environment())
+    for key in ("OPENAI_API_KEY", "OPENWEATHER_KEY", "TAVILY_API_KEY"):
+        os.environ[key] = "benchmark"
+    os.environ["TRAVEL_CHECKPOINT_DB"] = "memory"
+    os.environ["TRAVEL_GEOCODE_DB"] = os.path.join(tempfile.mkdtemp(prefix="travel-bench-"), "geocode.sqlite")
+    os.environ.pop("TRAVEL_LLM_CACHE", None)
+    if not keep_caches:
+        # Repeated iterations would otherwise be served from the retrieval and forecast caches
+        os.environ["TRAVEL_SEMANTIC_CACHE"] = "0"
+        os.environ["TRAVEL_WEATHER_CACHE"] = "0"
+
+def install_fakes(adapter: Any, scenario: Scenario, services: FakeServices, args: argparse.Namespace) -> None:
+    module = adapter.module
+    module.set_llm(FakeTravelChatModel(
+        cities=scenario.cities,
+        first_token_latency=args.llm_latency,
+        token_latency=args.token_latency,
+        plan_days=scenario.plan_days,
+    ))
+    if hasattr(module, "_search_wikipedia_docs"):
+        from travel_common.http_client import get_http_client
+
+        def search_wikipedia_docs(query: str) -> str:
+            docs = get_http_client().get(f"{services.base_url}/wikipedia", params={"q": query}).json()
+            return "\n\n---\n\n".join(f'<Document source="{doc["source"]}" page=""/>\n{doc["content"]}\n</Document>' for doc in docs)
+        module._search_wikipedia_docs = search_wikipedia_docs
+
+# ==================== Runs ====================
+
+def run_once(adapter: Any, scenario: Scenario) -> Tuple[float, Dict[str, List[float]]]:
+    """Run one session to the end; returns its wall time and the durations of every node task."""
+    from travel_common.batch import FeedbackPolicy
+
+    thread_id = adapter.new_thread_id()
+    config = adapter.config(thread_id)
+    policy = FeedbackPolicy()
+    started_tasks: Dict[str, float] = {}
+    durations: Dict[str, List[float]] = defaultdict(list)
+
+    def drain(inputs: Any) -> None:
+        for namespace, event in adapter.graph.stream(inputs, config, stream_mode="debug", subgraphs=True):
+            if event["type"] not in ("task", "task_result"):
+                continue
+            payload = event["payload"]
+            moment = datetime.datetime.fromisoformat(event["timestamp"]).timestamp()
+            if event["type"] == "task":
+                started_tasks[payload["id"]] = moment
+            elif payload["id"] in started_tasks:
+                # Subgraph nodes are reported under their parent ("conduct_dialogue_sub/ask_question")
+                path = [part.split(":")[0] for part in namespace] + [payload["name"]]
+                durations["/".join(path)].append(moment - started_tasks.pop(payload["id"]))
+
+    started = time.perf_counter()
+    drain(adapter.initial_state(scenario.request))
+    asked: List[str] = []
+    while True:
+        node = adapter.pending(thread_id)
+        if node is None:
+            break
+        if len(asked) >= policy.max_rounds:
+            raise RuntimeError(f"{scenario.name} still waits for feedback at {node}")
+        adapter.apply_feedback(thread_id, policy.answer({"feedback": scenario.feedback}, node, asked))
+        asked.append(node)
+        drain(None)
+    return time.perf_counter() - started, durations
+
+def max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def benchmark(scenario: Scenario, services: FakeServices, args: argparse.Namespace) -> Dict[str, Any]:
+    from travel_common.graph_adapters import get_adapter
+
+    adapter = get_adapter(scenario.graph)
+    install_fakes(adapter, scenario, services, args)
+    for _ in range(args.warmup):
+        run_once(adapter, scenario)
+
+    totals: List[float] = []
+    nodes: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(args.iterations):
+        total, durations = run_once(adapter, scenario)
+        totals.append(total)
+        for node, values in durations.items():
+            nodes[node].extend(values)
+
+    # Tracing slows Python down, so peak memory comes from one extra run
+    tracemalloc.start()
+    try:
+        run_once(adapter, scenario)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "graph": scenario.graph,
+        "runs": len(totals),
+        "total": {"p50": percentile(totals, 0.5), "p95": percentile(totals, 0.95)},
+        "nodes": {
+            node: {
+                "calls_per_run": round(len(values) / len(totals), 2),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+            }
+            for node, values in sorted(nodes.items())
+        },
+        "peak_traced_mb": round(peak_bytes / (1024 * 1024), 2),
+        "max_rss_mb": max_rss_mb(),
+    }
+
+# ==================== Report ====================
+
+def print_report(name: str, result: Dict[str, Any], out: Any) -> None:
+    total = result["total"]
+    print(f"\n{name} ({result['graph']}, {result['runs']} runs)", file=out)
+    print(f"  total          p50 {total['p50']:.3f}s  p95 {total['p95']:.3f}s", file=out)
+    print(f"  peak memory    {result['peak_traced_mb']:.2f} MB traced, max RSS {result['max_rss_mb']} MB", file=out)
+    print(f"  {'node':<44} {'calls/run':>9} {'p50':>8} {'p95':>8}", file=out)
+    for node, stats in result["nodes"].items():
+        print(f"  {node:<44} {stats['calls_per_run']:>9} {stats['p50']:>8.3f} {stats['p95']:>8.3f}", file=out)
+
+def regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Scenarios whose total p95 grew beyond the tolerance."""
+    found = []
+    for name, result in results.items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before and result["total"]["p95"] > before["total"]["p95"] * (1 + tolerance):
+            found.append(f"{name}: total p95 {before['total']['p95']:.3f}s -> {result['total']['p95']:.3f}s")
+    return found
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks of the travel graphs")
+    parser.add_argument("--scenario", action="append", help="Only run these scenarios (repeatable)")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds until the fake model's first token")
+    parser.add_argument("--token-latency", type=float, default=0.0005, help="Seconds per generated word")
+    parser.add_argument("--http-latency", type=float, default=0.02, help="Seconds per fake API request")
+    parser.add_argument("--keep-caches", action="store_true", help="Leave the retrieval and forecast caches on")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Earlier --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 growth over the baseline")
+    parser.add_argument("--verbose", action="store_true", help="Keep the graphs' console output")
+    args = parser.parse_args()
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+    if not scenarios:
+        parser.error(f"No such scenario; choose from: {', '.join(scenario.name for scenario in SCENARIOS)}")
+
+    services = FakeServices(latency=args.http_latency).start()
+    prepare_environment(services, args.keep_caches)
+    report = sys.stdout
+    results: Dict[str, Any] = {}
+    try:
+        for scenario in scenarios:
+            with contextlib.ExitStack() as stack:
+                if not args.verbose:
+                    stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+                result = benchmark(scenario, services, args)
+            results[scenario.name] = result
+            print_report(scenario.name, result, report)
+    finally:
+        services.stop()
+
+    print(f"\nFake API requests: {json.dumps(services.requests, sort_keys=True)}", file=report)
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key not in ("json", "baseline")}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "scenarios": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=report)
+        if found:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The graph packages are script directories that import their siblings by module name
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in (REPO_ROOT, os.path.join(REPO_ROOT, "travel_agent"), os.path.join(REPO_ROOT, "agengo_code")):
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
@@ -0,0 +1,120 @@
+import io
+import json
+from typing import Optional, TypedDict
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from travel_common import graph_adapters
+from travel_common.batch import BatchRunner, FeedbackPolicy, completed_ids
+from travel_common.graph_adapters import GraphAdapter
+
+class State(TypedDict):
+    query: str
+    feedback: Optional[str]
+    plan: str
+
+class EchoAdapter(GraphAdapter):
+    """Plans by echoing the query, after one feedback interrupt."""
+
+    name = "echo"
+    feedback_nodes = ("review",)
+
+    def __init__(self):
+        super().__init__()
+        self.runs = 0
+        builder = StateGraph(State)
+        builder.add_node("draft", self._draft)
+        builder.add_node("review", lambda state: {})
+        builder.add_edge(START, "draft")
+        builder.add_edge("draft", "review")
+        builder.add_edge("review", END)
+        self._graph = builder.compile(checkpointer=MemorySaver(), interrupt_before=["review"])
+
+    def _draft(self, state):
+        self.runs += 1
+        return {"plan": f"plan for {state['query']}"}
+
+    @property
+    def graph(self):
+        return self._graph
+
+    def initial_state(self, request):
+        return {"query": request["query"], "feedback": None, "plan": ""}
+
+    def apply_feedback(self, thread_id, feedback):
+        self.graph.update_state(self.config(thread_id), {"feedback": feedback}, as_node="draft")
+        return "review"
+
+    def summary(self, values):
+        return {"plan": values.get("plan"), "feedback": values.get("feedback")}
+
+@pytest.fixture
+def adapter(monkeypatch):
+    adapter = EchoAdapter()
+    monkeypatch.setitem(graph_adapters.ADAPTERS, adapter.name, adapter)
+    return adapter
+
+def write_lines(path, items):
+    path.write_text("".join(json.dumps(item) + "\n" for item in items) + "not json\n", encoding="utf-8")
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+def run(tmp_path, resume=True, policy=None):
+    runner = BatchRunner(str(tmp_path / "out.jsonl"), "echo", policy or FeedbackPolicy(), concurrency=2, progress=io.StringIO())
+    return runner.run(str(tmp_path / "in.jsonl"), resume=resume)
+
+def test_feedback_policy_uses_scripts_then_approves():
+    policy = FeedbackPolicy(["shorter"])
+    assert policy.answer({}, "review", []) == "shorter"
+    assert policy.answer({}, "review", ["review"]) == "ok"
+    assert policy.answer({"feedback": "cheaper"}, "review", []) == "cheaper"
+    by_node = {"feedback": {"plan": ["a", "b"]}}
+    assert policy.answer(by_node, "plan", ["subtopics", "plan"]) == "b"
+    assert policy.answer(by_node, "subtopics", []) == "ok"
+
+def test_batch_records_every_line(tmp_path, adapter):
+    write_lines(tmp_path / "in.jsonl", [{"id": "a", "query": "Seoul", "feedback": ["more food"]}, {"id": "b", "query": "Tokyo"}])
+    summary = run(tmp_path)
+    records = {record["id"]: record for record in read_records(tmp_path / "out.jsonl")}
+    assert summary["ok"] == 2 and summary["errors"] == 1
+    assert records["a"]["result"] == {"plan": "plan for Seoul", "feedback": "more food"}
+    assert records["b"]["feedback"] == [{"node": "review", "answer": "ok"}]
+    assert records["line-3"]["status"] == "error"
+
+def test_rerun_skips_lines_that_succeeded(tmp_path, adapter):
+    write_lines(tmp_path / "in.jsonl", [{"id": "a", "query": "Seoul"}])
+    run(tmp_path)
+    assert run(tmp_path)["ok"] == 0
+    assert completed_ids(str(tmp_path / "out.jsonl")) == {"a"}
+    assert adapter.runs == 1
+
+def test_rerun_resumes_interrupted_sessions(tmp_path, adapter):
+    write_lines(tmp_path / "in.jsonl", [{"id": "a", "query": "Seoul"}])
+    # The first run stops at the interrupt with no answers left
+    run(tmp_path, policy=FeedbackPolicy(max_rounds=0))
+    records = read_records(tmp_path / "out.jsonl")
+    assert records[0]["status"] == "error"
+
+    run(tmp_path)
+    record = read_records(tmp_path / "out.jsonl")[-1]
+    assert record["status"] == "ok" and record["resumed"]
+    assert adapter.runs == 1
+
+def test_no_resume_starts_fresh_sessions(tmp_path, adapter):
+    write_lines(tmp_path / "in.jsonl", [{"id": "a", "query": "Seoul"}])
+    run(tmp_path)
+    run(tmp_path, resume=False)
+    first, second = [record for record in read_records(tmp_path / "out.jsonl") if record["id"] == "a"]
+    assert second["status"] == "ok" and not second["resumed"]
+    assert first["thread_id"] != second["thread_id"]
+    assert adapter.runs == 2
+
+def test_duplicate_ids_are_rejected(tmp_path, adapter):
+    write_lines(tmp_path / "in.jsonl", [{"id": "a", "query": "Seoul"}, {"id": "a", "query": "Tokyo"}])
+    run(tmp_path)
+    records = [record for record in read_records(tmp_path / "out.jsonl") if record["id"] == "a"]
+    assert sorted(record["status"] for record in records) == ["error", "ok"]
+    assert adapter.runs == 1
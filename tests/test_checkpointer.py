@@ -0,0 +1,158 @@
+import operator
+import os
+import sqlite3
+import time
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
+
+from travel_common.blob_store import BlobSerializer, BlobStore
+from travel_common.checkpointer import BlobMemorySaver, get_checkpointer
+
+pytest.importorskip("langgraph.checkpoint.sqlite")
+from travel_common.sqlite_checkpointer import RetentionSqliteSaver  # noqa: E402
+
+class State(TypedDict):
+    text: str
+
+def build_graph(checkpointer, text):
+    builder = StateGraph(State)
+    builder.add_node("write", lambda state: {"text": text})
+    builder.add_edge(START, "write")
+    builder.add_edge("write", END)
+    return builder.compile(checkpointer=checkpointer)
+
+def run_threads(graph, count):
+    for i in range(count):
+        graph.invoke({"text": ""}, {"configurable": {"thread_id": f"t{i}"}})
+
+def test_blob_store_deduplicates_repeated_strings():
+    store = BlobStore()
+    serde = BlobSerializer(store, min_bytes=16)
+    text = "a long plan " * 20
+    first = serde.dumps_typed({"plan": text, "draft": text})
+    serde.dumps_typed({"plan": text})
+    assert store.stats()["blobs"] == 1
+    assert serde.loads_typed(first) == {"plan": text, "draft": text}
+    assert len(serde.references(first)) == 1
+
+def test_sqlite_checkpointer_uses_incremental_auto_vacuum(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = RetentionSqliteSaver.from_path(path, compact_interval_seconds=0)
+    saver.setup()
+    assert saver.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+def test_sqlite_checkpointer_converts_existing_database(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE existing (value TEXT)")
+    conn.commit()
+    conn.close()
+    saver = RetentionSqliteSaver.from_path(path, compact_interval_seconds=0)
+    saver.setup()
+    assert saver.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+def test_compact_shrinks_the_database_file(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    # Keep values inline so they land in the checkpoint file itself
+    serde = BlobSerializer(BlobStore(path + ".blobs"), min_bytes=10 ** 9)
+    saver = RetentionSqliteSaver.from_path(path, serde=serde, compact_interval_seconds=0, max_age_seconds=60)
+    run_threads(build_graph(saver, os.urandom(64 * 1024).hex()), 20)
+    saver.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    before = os.path.getsize(path)
+
+    assert saver.compact(now=time.time() + 3600)["expired"] == 20
+    assert os.path.getsize(path) < before / 4
+    assert saver.stats()["checkpoints"] == 0
+
+def test_retention_keeps_the_newest_checkpoints(tmp_path):
+    saver = RetentionSqliteSaver.from_path(str(tmp_path / "c.sqlite"), compact_interval_seconds=0, max_checkpoints_per_thread=2)
+    graph = build_graph(saver, "x")
+    config = {"configurable": {"thread_id": "t"}}
+    for _ in range(3):
+        graph.invoke({"text": ""}, config)
+    assert len(list(saver.list(config))) == 2
+
+class FanOutState(TypedDict):
+    items: List[str]
+    done: Annotated[List[str], operator.add]
+
+def build_feedback_graph(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("write", lambda state: {"text": "draft"})
+    builder.add_node("review", lambda state: {"text": "final"})
+    builder.add_edge(START, "write")
+    builder.add_edge("write", "review")
+    builder.add_edge("review", END)
+    return builder.compile(checkpointer=checkpointer, interrupt_before=["review"])
+
+def build_fan_out_graph(checkpointer):
+    builder = StateGraph(FanOutState)
+    builder.add_node("plan", lambda state: {"items": ["a", "b"]})
+    builder.add_node("research", lambda item: {"done": [item]})
+    builder.add_edge(START, "plan")
+    builder.add_conditional_edges("plan", lambda state: [Send("research", item) for item in state["items"]], ["research"])
+    builder.add_edge("research", END)
+    return builder.compile(checkpointer=checkpointer, interrupt_before=["research"])
+
+@pytest.mark.parametrize("build, inputs", [
+    (build_feedback_graph, {"text": ""}),
+    (build_fan_out_graph, {"items": [], "done": []}),
+])
+def test_compact_keeps_the_history_of_threads_waiting_for_feedback(tmp_path, build, inputs):
+    saver = RetentionSqliteSaver.from_path(str(tmp_path / "c.sqlite"), compact_interval_seconds=0)
+    graph = build(saver)
+    waiting, finished = {"configurable": {"thread_id": "waiting"}}, {"configurable": {"thread_id": "finished"}}
+    graph.invoke(inputs, waiting)
+    graph.invoke(inputs, finished)
+    graph.invoke(None, finished)
+    history = len(list(saver.list(waiting)))
+
+    assert saver.compact(now=time.time() + saver.compact_after_seconds + 1)["compacted"] == 1
+    assert len(list(saver.list(waiting))) == history > 1
+    assert len(list(saver.list(finished))) == 1
+    assert graph.get_state(waiting).next
+    graph.invoke(None, waiting)
+    assert not graph.get_state(waiting).next
+
+def test_get_checkpointer_keeps_blobs_in_their_own_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "checkpoints.sqlite")
+    monkeypatch.setenv("TRAVEL_CHECKPOINT_DB", path)
+
+    saver = get_checkpointer()
+    build_graph(saver, "a long plan " * 200).invoke({"text": ""}, {"configurable": {"thread_id": "t"}})
+    tables = {row[0] for row in saver.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "blobs" not in tables
+    assert os.path.exists(path + ".blobs")
+    assert saver.serde.store.stats()["blobs"] == 1
+    assert saver.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+def test_memory_saver_drops_blobs_of_deleted_threads():
+    saver = BlobMemorySaver(serde=BlobSerializer(BlobStore(), min_bytes=64), max_age_seconds=3600)
+    build_graph(saver, "shared " * 10).invoke({"text": ""}, {"configurable": {"thread_id": "keep"}})
+    build_graph(saver, "only in the deleted thread " * 10).invoke({"text": ""}, {"configurable": {"thread_id": "drop"}})
+    assert saver.serde.store.stats()["blobs"] == 2
+
+    saver.delete_thread("drop")
+    assert saver.serde.store.stats()["blobs"] == 1
+    state = build_graph(saver, "").get_state({"configurable": {"thread_id": "keep"}})
+    assert state.values["text"] == "shared " * 10
+
+def test_memory_saver_keeps_blobs_other_threads_share():
+    saver = BlobMemorySaver(serde=BlobSerializer(BlobStore(), min_bytes=64), max_age_seconds=3600)
+    graph = build_graph(saver, "shared by both threads " * 10)
+    graph.invoke({"text": ""}, {"configurable": {"thread_id": "a"}})
+    graph.invoke({"text": ""}, {"configurable": {"thread_id": "b"}})
+
+    saver.delete_thread("a")
+    assert saver.serde.store.stats()["blobs"] == 1
+    saver.delete_thread("b")
+    assert saver.serde.store.stats()["blobs"] == 0
+
+def test_memory_saver_expires_idle_threads():
+    saver = BlobMemorySaver(serde=BlobSerializer(BlobStore(), min_bytes=64), max_age_seconds=60)
+    run_threads(build_graph(saver, "expiring text " * 10), 3)
+    assert saver.collect(now=time.time() + 120) == {"expired": 3, "blobs_removed": 1}
+    assert not saver.storage
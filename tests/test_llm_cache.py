@@ -0,0 +1,69 @@
+import pytest
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from travel_common import llm_cache
+from travel_common.llm_cache import SQLiteLLMCache, cache_key
+
+LLM_STRING = "gpt-4o temperature=0"
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+def generation(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+def answer(cache, prompt):
+    result = cache.lookup(prompt, LLM_STRING)
+    return None if result is None else result[0].message.content
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    cache.update("plan seoul", LLM_STRING, generation("3 days in Seoul"))
+    clock.now += 59
+    assert answer(cache, "plan seoul") == "3 days in Seoul"
+    clock.now += 2
+    assert answer(cache, "plan seoul") is None
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    for prompt in ("a", "b"):
+        cache.update(prompt, LLM_STRING, generation(prompt))
+        clock.now += 1
+    assert answer(cache, "a") == "a"
+    clock.now += 1
+    cache.update("c", LLM_STRING, generation("c"))
+    assert answer(cache, "b") is None
+    assert answer(cache, "a") == "a" and answer(cache, "c") == "c"
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_persist_in_the_database_file(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteLLMCache(path).update("plan seoul", LLM_STRING, generation("3 days in Seoul"))
+    assert answer(SQLiteLLMCache(path), "plan seoul") == "3 days in Seoul"
+
+def test_volatile_message_fields_do_not_change_the_key(tmp_path):
+    first = dumps([HumanMessage(content="Plan  3 days\nin Seoul"),
+                   AIMessage(content="Sure", id="run-1", usage_metadata={"input_tokens": 5, "output_tokens": 1, "total_tokens": 6})])
+    second = dumps([HumanMessage(content="Plan 3 days in Seoul"),
+                    AIMessage(content="Sure", id="run-2", usage_metadata={"input_tokens": 9, "output_tokens": 2, "total_tokens": 11})])
+    assert cache_key(first, LLM_STRING) == cache_key(second, LLM_STRING)
+    assert cache_key(first, LLM_STRING) != cache_key(first, "gpt-4o temperature=1")
+
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"))
+    cache.update(first, LLM_STRING, generation("3 days in Seoul"))
+    assert answer(cache, second) == "3 days in Seoul"
+    assert cache.stats()["hits"] == 1
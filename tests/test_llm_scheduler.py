@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+
+from travel_common import llm_scheduler
+from travel_common.llm_scheduler import LLMScheduler, ScheduledChatOpenAI, TokenBucket
+
+def test_bucket_refills_evenly_up_to_one_minute():
+    bucket = TokenBucket(60)
+    now = bucket.updated
+    bucket.take(60)
+    assert bucket.delay(1, now) == pytest.approx(1.0)
+    assert bucket.delay(1, now + 1.0) == 0.0
+    assert bucket.delay(30, now + 1.0) == pytest.approx(29.0)
+    bucket.delay(1, now + 3600)
+    assert bucket.level == 60
+
+def test_bucket_settles_against_reported_usage():
+    bucket = TokenBucket(100)
+    bucket.take(50)
+    bucket.adjust(50 - 80)
+    assert bucket.level == 20
+    bucket.adjust(500)
+    assert bucket.level == 100
+
+def test_waiting_sessions_are_served_round_robin():
+    scheduler = LLMScheduler(rpm=0, tpm=600000)
+    granted = []
+    take = scheduler.tokens.take
+    scheduler.tokens.take = lambda amount: (granted.append(amount), take(amount))
+    # Empty the bucket so every call queues until it refills
+    scheduler.tokens.level = -2000
+    threads = []
+    for session, tokens in (("a", 1), ("a", 2), ("a", 3), ("b", 4)):
+        thread = threading.Thread(target=scheduler.acquire, args=(tokens, session))
+        thread.start()
+        threads.append(thread)
+        while sum(scheduler.queue_depth().values()) < len(threads):
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join(5)
+    assert granted == [1, 4, 2, 3]
+    assert scheduler.stats()["granted"] == 4
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    scheduler = LLMScheduler(rpm=0, tpm=100000)
+    monkeypatch.setattr(llm_scheduler, "get_llm_scheduler", lambda model: scheduler)
+    monkeypatch.setattr(ScheduledChatOpenAI, "get_num_tokens_from_messages", lambda self, messages: 10)
+    monkeypatch.setattr(ScheduledChatOpenAI, "get_num_tokens", lambda self, text: len(text.split()))
+    return scheduler, ScheduledChatOpenAI(model="gpt-4o", api_key="x", max_tokens=100)
+
+def fake_stream(usage):
+    def stream(self, messages, stop=None, run_manager=None, **kwargs):
+        yield ChatGenerationChunk(message=AIMessageChunk(content="one two "))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="three", usage_metadata=usage))
+    return stream
+
+def test_stream_settles_with_reported_usage(scheduled, monkeypatch):
+    scheduler, llm = scheduled
+    monkeypatch.setattr(ChatOpenAI, "_stream", fake_stream({"input_tokens": 12, "output_tokens": 3, "total_tokens": 15}))
+    assert "".join(chunk.text for chunk in llm._stream([HumanMessage(content="hi")])) == "one two three"
+    assert scheduler.stats()["used_tokens"] == 15
+    assert scheduler.tokens.level == pytest.approx(100000 - 15, abs=5)
+
+def test_stream_without_usage_settles_from_the_text(scheduled, monkeypatch):
+    scheduler, llm = scheduled
+    monkeypatch.setattr(ChatOpenAI, "_stream", fake_stream(None))
+    list(llm._stream([HumanMessage(content="hi")]))
+    assert scheduler.stats()["used_tokens"] == 10 + 3
+
+def test_failed_call_gives_its_estimate_back(scheduled, monkeypatch):
+    scheduler, llm = scheduled
+
+    def fail(self, messages, stop=None, run_manager=None, **kwargs):
+        raise RuntimeError("API error")
+
+    monkeypatch.setattr(ChatOpenAI, "_generate", fail)
+    with pytest.raises(RuntimeError):
+        llm._generate([HumanMessage(content="hi")])
+    assert scheduler.stats()["granted"] == 1
+    assert scheduler.tokens.level == pytest.approx(100000, abs=5)
+
+def test_calls_are_not_scheduled_without_limits(monkeypatch):
+    scheduler = LLMScheduler(rpm=0, tpm=0)
+    monkeypatch.setattr(llm_scheduler, "get_llm_scheduler", lambda model: scheduler)
+    result = ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+    monkeypatch.setattr(ChatOpenAI, "_generate", lambda self, messages, stop=None, run_manager=None, **kwargs: result)
+    llm = ScheduledChatOpenAI(model="gpt-4o", api_key="x")
+    assert llm._generate([HumanMessage(content="hi")]) is result
+    assert not scheduler.enabled
+    assert scheduler.stats()["granted"] == 0
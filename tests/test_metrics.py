@@ -0,0 +1,68 @@
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from travel_common.metrics import Metrics
+
+@pytest.fixture
+def metrics(monkeypatch):
+    monkeypatch.delenv("TRAVEL_LLM_PRICES", raising=False)
+    return Metrics()
+
+def test_label_values_are_escaped(metrics):
+    metrics.inc("travel_node_errors_total", {"graph": "travel_agent", "node": 'say "hi"\\\nbye'})
+    assert 'travel_node_errors_total{graph="travel_agent",node="say \\"hi\\"\\\\\\nbye"} 1' in metrics.render_prometheus()
+
+def test_histogram_buckets_are_cumulative(metrics):
+    for seconds in (0.07, 0.3, 0.3, 500.0):
+        metrics.observe("travel_llm_duration_seconds", {"model": "gpt-4o"}, seconds)
+    rows = dict(line.rsplit(" ", 1) for line in metrics.render_prometheus().splitlines() if not line.startswith("#"))
+    prefix = 'travel_llm_duration_seconds_bucket{model="gpt-4o",le='
+    assert rows[prefix + '"0.05"}'] == "0"
+    assert rows[prefix + '"0.1"}'] == "1"
+    assert rows[prefix + '"0.5"}'] == "3"
+    assert rows[prefix + '"120"}'] == "3"
+    assert rows[prefix + '"+Inf"}'] == "4"
+    assert rows['travel_llm_duration_seconds_count{model="gpt-4o"}'] == "4"
+    assert float(rows['travel_llm_duration_seconds_sum{model="gpt-4o"}']) == pytest.approx(500.67)
+
+def test_cost_uses_the_longest_matching_family(metrics):
+    assert metrics.cost("gpt-4o-2024-08-06", 1_000_000, 0) == pytest.approx(2.50)
+    assert metrics.cost("gpt-4o-mini-2024-07-18", 0, 1_000_000) == pytest.approx(0.60)
+    assert metrics.cost("claude-unknown", 1000, 1000) == 0.0
+
+def test_prices_can_be_overridden(monkeypatch):
+    monkeypatch.setenv("TRAVEL_LLM_PRICES", '{"gpt-3.5-turbo": [0.5, 1.5]}')
+    assert Metrics().cost("gpt-3.5-turbo-0125", 1_000_000, 1_000_000) == pytest.approx(2.0)
+
+def run_llm(metrics, response):
+    handler = metrics.handler("travel_agent")
+    run_id = uuid4()
+    metadata = {"langgraph_node": "plan", "ls_model_name": "gpt-4o"}
+    handler.on_chat_model_start({}, [[HumanMessage(content="x" * 400)]], run_id=run_id, metadata=metadata)
+    handler.on_llm_end(response, run_id=run_id)
+    return metrics.render_prometheus()
+
+def tokens(text, kind):
+    return f'travel_llm_tokens_total{{graph="travel_agent",model="gpt-4o",node="plan",type="{kind}"}} {text}'
+
+def test_reported_token_usage_is_recorded(metrics):
+    response = LLMResult(generations=[[ChatGeneration(message=AIMessage(content="ok"))]],
+                         llm_output={"token_usage": {"prompt_tokens": 120, "completion_tokens": 30}})
+    exposition = run_llm(metrics, response)
+    assert tokens(120, "prompt") in exposition
+    assert tokens(30, "completion") in exposition
+    assert 'travel_llm_cost_usd_total{graph="travel_agent",model="gpt-4o",node="plan"} 0.0006' in exposition
+
+def test_usage_metadata_is_used_without_token_usage(metrics):
+    message = AIMessage(content="ok", usage_metadata={"input_tokens": 90, "output_tokens": 12, "total_tokens": 102})
+    exposition = run_llm(metrics, LLMResult(generations=[[ChatGeneration(message=message)]]))
+    assert tokens(90, "prompt") in exposition
+    assert tokens(12, "completion") in exposition
+
+def test_tokens_are_estimated_without_any_usage(metrics):
+    exposition = run_llm(metrics, LLMResult(generations=[[ChatGeneration(message=AIMessage(content="y" * 80))]]))
+    assert tokens(100, "prompt") in exposition
+    assert tokens(20, "completion") in exposition
@@ -0,0 +1,39 @@
+import pytest
+
+from travel_common.place_extractor import extract_destinations, get_place_extractor
+
+@pytest.mark.parametrize("text, cities", [
+    ("Plan 3 days in Seoul", ["Seoul"]),
+    ("I want to visit 東京 next spring", ["Tokyo"]),
+    ("A week in New York please", ["New York"]),
+    ("Two days in Paris, France", ["Paris"]),
+    ("Seoul, then maybe a spa day", ["Seoul"]),
+])
+def test_single_destination_skips_the_llm(text, cities):
+    assert extract_destinations(text) == cities
+
+@pytest.mark.parametrize("text", [
+    "I live in London and want to fly to Rome",
+    "Flying from Singapore to Bangkok",
+    "Tokyo but not Osaka",
+    "I was in Paris last year, now I want to see Rome",
+    "Anywhere but Berlin",
+    "Plan 3 days in London, Ontario",
+    "3 days in Paris, Texas",
+    "A weekend in Paris, TX",
+    "Plan a trip to Seoul, Tokyo and Bangkok",
+    "I want to go to Japan",
+    "Somewhere warm",
+])
+def test_ambiguous_text_falls_back_to_the_llm(text):
+    assert extract_destinations(text) is None
+
+def test_transcripts_with_a_single_unqualified_city_skip_the_llm():
+    transcript = "Hi everyone, welcome back. Today we spend three days eating our way through Seoul."
+    assert extract_destinations(transcript) == ["Seoul"]
+    assert extract_destinations("Hi everyone, today we explore London, Ontario and its parks.") is None
+
+def test_matches_keep_every_mentioned_city():
+    matches = get_place_extractor().extract("Flying from Singapore to Bangkok")
+    assert matches.cities == ["Singapore", "Bangkok"]
+    assert matches.ambiguous
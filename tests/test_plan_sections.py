@@ -0,0 +1,106 @@
+from typing import TypedDict
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, START, StateGraph
+
+from plan_sections import join_sections, mentioned_days, revise_sections, route_feedback, route_feedback_with_llm, split_sections
+from travel_common.plan_stream import ConsoleTokenPrinter, stream_with_tokens
+
+PLAN = """# Seoul and Tokyo in 3 days
+
+## Overview
+A short trip.
+
+## Day 1: Seoul
+Palaces.
+**Tips:**
+Go early.
+**Estimated cost:** $80
+
+## Day 2: Tokyo
+Asakusa.
+### Morning
+Senso-ji.
+
+## Day 3: Tokyo
+Shibuya.
+
+## Budget
+$600 in total.
+
+## Notes
+Bring an umbrella.
+"""
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages, config=None):
+        self.prompts.append(messages[0].content)
+        return type("Message", (), {"content": "## Day 2: Tokyo\nA slower day.\n"})()
+
+def keys(sections):
+    return [section["key"] for section in sections]
+
+def test_split_keeps_inner_headings_in_their_day():
+    sections = split_sections(PLAN)
+    assert keys(sections) == ["seoul_and_tokyo_in_3_days", "overview", "day_1", "day_2", "day_3", "budget", "notes"]
+    assert "**Estimated cost:**" in sections[2]["text"]
+    assert "### Morning" in sections[3]["text"]
+    assert join_sections(sections) == PLAN
+
+def test_split_bold_day_headings():
+    plan = "**Day 1**\nMuseums.\n**Day 2**\nParks.\n**Budget**\n$300\n"
+    assert keys(split_sections(plan)) == ["day_1", "day_2", "budget"]
+
+def test_route_cost_feedback_to_the_budget_section():
+    assert route_feedback("make it cheaper", split_sections(PLAN)) == ["budget"]
+
+def test_route_matches_whole_words_and_day_lists():
+    sections = split_sections(PLAN)
+    assert route_feedback("days 1 and 2 are too packed", sections) == ["day_1", "day_2"]
+    assert route_feedback("It is important that the second day starts later", sections) == ["day_2"]
+    assert route_feedback("Add packing tips", sections) == ["notes"]
+
+def test_mentioned_days():
+    assert mentioned_days("days 1-3", 5) == [1, 2, 3]
+    assert mentioned_days("day 2 to 4 and day 5", 5) == [2, 3, 4, 5]
+    assert mentioned_days("the 1st and third days", 5) == [1, 3]
+    assert mentioned_days("relax the last two days", 5) == [4, 5]
+    assert mentioned_days("the first day", 5) == [1]
+
+def test_ambiguous_feedback_rewrites_the_whole_plan():
+    sections = split_sections(PLAN)
+    assert route_feedback("more museums every day", sections) == keys(sections)
+    assert route_feedback("change day 7", sections) == keys(sections)
+    assert route_feedback("more museums", sections) == []
+
+def test_revise_splices_only_the_routed_section():
+    sections = split_sections(PLAN)
+    llm = FakeLLM()
+    revised = join_sections(revise_sections(llm, sections, ["day_2"], "make day 2 slower"))
+    assert len(llm.prompts) == 1
+    assert "A slower day." in revised and "Senso-ji" not in revised
+    assert revised.replace("## Day 2: Tokyo\nA slower day.\n", "") == PLAN.replace(sections[3]["text"], "")
+
+def test_llm_routing_answer_is_not_streamed_as_plan_tokens():
+    class State(TypedDict):
+        keys: list
+
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content='["day_2"]')]))
+    builder = StateGraph(State)
+    builder.add_node("process_plan_feedback", lambda state: {"keys": route_feedback_with_llm(llm, "slower", split_sections(PLAN))})
+    builder.add_edge(START, "process_plan_feedback")
+    builder.add_edge("process_plan_feedback", END)
+    events = list(stream_with_tokens(builder.compile(), {"keys": []}, {}, ["process_plan_feedback"]))
+    assert [mode for mode, _ in events] == ["updates"]
+    assert events[0][1]["process_plan_feedback"]["keys"] == ["day_2"]
+
+def test_printer_reports_partially_streamed_plans(capsys):
+    printer = ConsoleTokenPrinter()
+    printer("process_plan_feedback", "## Day 2: Tokyo\nA slower day.\n")
+    assert printer.shown("process_plan_feedback")
+    assert not printer.shown("process_plan_feedback", PLAN)
+    assert printer.shown("process_plan_feedback", "## Day 2: Tokyo\nA slower day.")
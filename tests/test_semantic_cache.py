@@ -0,0 +1,55 @@
+from travel_common import semantic_cache
+from travel_common.semantic_cache import SemanticCache, cached_retrieval, vectorize, cosine
+
+def test_reordered_query_is_a_hit():
+    cache = SemanticCache(threshold=0.9)
+    cache.put("best restaurants in Tokyo", "docs", namespace="tavily", scope="Tokyo")
+    assert cache.get("Tokyo best restaurants", namespace="tavily", scope="Tokyo") == "docs"
+    assert cache.stats()["near_hits"] == 1
+
+def test_threshold_decides_between_hit_and_miss():
+    query, similar = "ramen shops in Shinjuku", "ramen shops near Shinjuku station"
+    score = cosine(vectorize(query), vectorize(similar))
+    assert 0 < score < 1
+    below = SemanticCache(threshold=score - 0.01)
+    above = SemanticCache(threshold=score + 0.01)
+    for cache in (below, above):
+        cache.put(query, "docs")
+    assert below.get(similar) == "docs"
+    assert above.get(similar) is None
+
+def test_namespace_and_scope_are_separate():
+    cache = SemanticCache()
+    cache.put("museums", "tokyo docs", namespace="tavily", scope="Tokyo")
+    assert cache.get("museums", namespace="tavily", scope="Osaka") is None
+    assert cache.get("museums", namespace="wikipedia", scope="Tokyo") is None
+
+def test_expired_and_evicted_entries_miss():
+    cache = SemanticCache(max_entries=1)
+    cache.put("old query", "old", ttl_seconds=-1)
+    assert cache.get("old query") is None
+    cache.put("first", 1)
+    cache.put("second", 2)
+    assert cache.get("first") is None and cache.stats()["evictions"] == 1
+
+def test_cached_retrieval_respects_threshold_setting(monkeypatch):
+    monkeypatch.setenv("TRAVEL_SEMANTIC_CACHE_THRESHOLD", "0.99")
+    monkeypatch.setattr(semantic_cache, "_shared_cache", None)
+    calls = []
+
+    def search(result):
+        return lambda: calls.append(result) or result
+
+    assert cached_retrieval("tavily", "parks in Kyoto", search("a"), scope="Kyoto") == "a"
+    assert cached_retrieval("tavily", "Kyoto parks", search("b"), scope="Kyoto") == "a"
+    assert cached_retrieval("tavily", "parks and gardens in Kyoto", search("c"), scope="Kyoto") == "c"
+    assert cached_retrieval("tavily", "temples in Kyoto", search(""), scope="Kyoto", cacheable=bool) == ""
+    assert cached_retrieval("tavily", "temples in Kyoto", search("d"), scope="Kyoto", cacheable=bool) == "d"
+    assert calls == ["a", "c", "", "d"]
+
+def test_disabled_cache_always_computes(monkeypatch):
+    monkeypatch.setenv("TRAVEL_SEMANTIC_CACHE", "0")
+    calls = []
+    for _ in range(2):
+        cached_retrieval("tavily", "parks in Kyoto", lambda: calls.append(1) or "a")
+    assert len(calls) == 2
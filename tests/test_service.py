@@ -0,0 +1,118 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+from test_batch import EchoAdapter
+
+from travel_common import graph_adapters
+from travel_common.service import SessionManager, TravelServer
+
+class GatedEchoAdapter(EchoAdapter):
+    """EchoAdapter whose draft node waits until the test opens the gate."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        super().__init__()
+
+    @property
+    def plan_nodes(self):
+        return ()
+
+    def _draft(self, state):
+        self.gate.wait(5)
+        return super()._draft(state)
+
+@pytest.fixture
+def adapter(monkeypatch):
+    adapter = GatedEchoAdapter()
+    monkeypatch.setitem(graph_adapters.ADAPTERS, adapter.name, adapter)
+    yield adapter
+    adapter.gate.set()
+
+@pytest.fixture
+def server(adapter):
+    manager = SessionManager(workers=1, max_queue=0)
+    server = TravelServer(("127.0.0.1", 0), manager, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    manager.shutdown()
+
+def request(server, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    conn.request(method, path, json.dumps(body) if body is not None else None, headers or {})
+    response = conn.getresponse()
+    data = response.read().decode("utf-8")
+    conn.close()
+    return response, data
+
+def wait_for_status(server, thread_id, status):
+    for _ in range(500):
+        _, data = request(server, "GET", f"/sessions/{thread_id}")
+        if json.loads(data)["status"] == status:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"session never reached {status}")
+
+def parse_events(data):
+    events = []
+    for block in data.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_full_pool_rejects_new_runs_with_retry_after(server, adapter):
+    response, data = request(server, "POST", "/sessions", {"graph": "echo", "input": {"query": "Seoul"}})
+    assert response.status == 202
+    response, _ = request(server, "POST", "/sessions", {"graph": "echo", "input": {"query": "Tokyo"}})
+    assert response.status == 503
+    assert response.getheader("Retry-After") == "5"
+    assert server.manager.stats()["rejected"] == 1
+
+def test_feedback_to_a_busy_session_conflicts(server, adapter):
+    _, data = request(server, "POST", "/sessions", {"graph": "echo", "input": {"query": "Seoul"}})
+    thread_id = json.loads(data)["thread_id"]
+    response, _ = request(server, "POST", f"/sessions/{thread_id}/feedback", {"feedback": "more food"})
+    assert response.status == 409
+
+    adapter.gate.set()
+    wait_for_status(server, thread_id, "waiting_feedback")
+    response, _ = request(server, "POST", f"/sessions/{thread_id}/feedback", {"feedback": "more food"})
+    assert response.status == 202
+
+def test_event_stream_resumes_after_last_event_id(server, adapter):
+    adapter.gate.set()
+    _, data = request(server, "POST", "/sessions", {"graph": "echo", "input": {"query": "Seoul"}})
+    thread_id = json.loads(data)["thread_id"]
+    wait_for_status(server, thread_id, "waiting_feedback")
+    request(server, "POST", f"/sessions/{thread_id}/feedback", {"feedback": "ok"})
+    wait_for_status(server, thread_id, "done")
+
+    _, data = request(server, "GET", f"/sessions/{thread_id}/events")
+    events = parse_events(data)
+    assert [event_id for event_id, _, _ in events] == list(range(1, len(events) + 1))
+    _, data = request(server, "GET", f"/sessions/{thread_id}/events", headers={"Last-Event-ID": "3"})
+    assert parse_events(data) == events[3:]
+    assert events[-1][1:] == ("status", {"status": "done"})
+
+def test_evicted_session_ends_its_streams_and_keeps_event_ids(adapter):
+    adapter.gate.set()
+    manager = SessionManager(workers=1, max_queue=1, max_sessions=1)
+    first = manager.start("echo", {"query": "Seoul"})
+    for _ in range(500):
+        if first.status == "waiting_feedback":
+            break
+        time.sleep(0.01)
+    last_id = first.next_event_id - 1
+    manager.start("echo", {"query": "Tokyo"})
+
+    assert first.closed
+    assert first.wait_events(last_id, timeout=5) == []
+    reloaded = manager.get(first.thread_id)
+    assert reloaded is not first
+    assert reloaded.next_event_id == last_id + 1
+    manager.shutdown()
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from travel_common.speculation import Speculator
+
+@pytest.fixture
+def speculator():
+    speculator = Speculator(max_workers=2, max_sessions=2)
+    yield speculator
+    speculator.shutdown()
+
+def test_started_task_is_taken_once(speculator):
+    calls = []
+    started = threading.Event()
+    assert speculator.start("s", "seoul/food", lambda: started.set() or calls.append(1) or "summary")
+    assert not speculator.start("s", "seoul/food", lambda: calls.append(2) or "again")
+    assert started.wait(5)
+    future = speculator.take("s", "seoul/food")
+    assert future.result(5) == "summary"
+    assert speculator.take("s", "seoul/food") is None
+    assert calls == [1]
+    assert speculator.stats()["used"] == 1
+
+def test_queued_task_is_cancelled_instead_of_awaited(speculator):
+    gate = threading.Event()
+    for key in ("busy-1", "busy-2"):
+        speculator.start("s", key, gate.wait, 5)
+    calls = []
+    speculator.start("s", "food", calls.append, "queued")
+    assert speculator.take("s", "food") is None
+    gate.set()
+    assert speculator.take("s", "busy-1").result(5)
+    assert calls == []
+    assert speculator.stats()["dropped"] == 1
+
+def test_retain_drops_tasks_the_user_edited_away(speculator):
+    gate = threading.Event()
+    for key in ("busy-1", "busy-2"):
+        speculator.start("s", key, gate.wait, 5)
+    speculator.start("s", "food", str, "not started")
+    speculator.retain("s", ["busy-1", "busy-2"])
+    assert speculator.take("s", "food") is None
+    assert speculator.stats()["dropped"] == 1
+    gate.set()
+    assert speculator.take("s", "busy-1").result(5)
+
+def test_oldest_sessions_are_dropped_beyond_the_cap(speculator):
+    for session in ("a", "b", "c"):
+        speculator.start(session, "k", str, session)
+    assert speculator.take("a", "k") is None
+    assert speculator.stats()["sessions"] == 2
+    assert speculator.stats()["pending"] == 2
+
+def test_discard_drops_a_whole_session(speculator):
+    speculator.start("a", "k1", str, "x")
+    speculator.start("a", "k2", str, "y")
+    speculator.discard("a")
+    assert speculator.stats()["pending"] == 0
+    assert speculator.take("a", "k1") is None
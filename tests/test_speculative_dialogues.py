@@ -0,0 +1,44 @@
+from concurrent.futures import wait
+
+import travel_assistant
+from travel_assistant import Traveler, conduct_dialogue, dialogue_input, prefetch_dialogues
+from travel_common.speculation import Speculator
+
+class FakeDialogueGraph:
+    def __init__(self):
+        self.personas = []
+
+    def invoke(self, state, config=None):
+        traveler = state["traveler"]
+        self.personas.append(traveler.persona)
+        return {"dialogue": "...", "sections": [f"memo of {traveler.name}: {traveler.description}"]}
+
+def run_feedback_round(monkeypatch, kept):
+    graph = FakeDialogueGraph()
+    speculator = Speculator(max_workers=1)
+    monkeypatch.setenv("TRAVEL_SPECULATIVE", "1")
+    monkeypatch.setattr(travel_assistant, "get_dialogue_graph", lambda: graph)
+    monkeypatch.setattr(travel_assistant, "get_speculator", lambda: speculator)
+    state = {"city": "Tokyo", "max_travelers": 2, "max_num_turns": 1}
+    config = {"configurable": {"thread_id": "t"}}
+
+    prefetch_dialogues(state, [Traveler(name="Aiko Tanaka", description="Loves ramen."),
+                               Traveler(name="Ben", description="Hikes.")], config)
+    # The feedback round keeps or changes Aiko and replaces Ben
+    prefetch_dialogues(state, [kept, Traveler(name="Chloe", description="Museums.")], config)
+    wait(list(speculator._sessions["t"].values()))
+    result = conduct_dialogue(dialogue_input(kept, "tokyo ", 2, 1), config)
+    speculator.shutdown()
+    return graph, result
+
+def test_unchanged_persona_reuses_its_dialogue(monkeypatch):
+    kept = Traveler(name="aiko tanaka", description="Loves  ramen")
+    graph, result = run_feedback_round(monkeypatch, kept)
+    assert result == {"sections": ["memo of Aiko Tanaka: Loves ramen."]}
+    assert kept.persona not in graph.personas
+
+def test_changed_description_is_not_reused(monkeypatch):
+    changed = Traveler(name="Aiko Tanaka", description="Loves ramen, but only vegetarian bowls.")
+    graph, result = run_feedback_round(monkeypatch, changed)
+    assert result == {"sections": ["memo of Aiko Tanaka: Loves ramen, but only vegetarian bowls."]}
+    assert changed.persona in graph.personas
@@ -0,0 +1,115 @@
+import sys
+import threading
+import types
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+import transcription
+from transcription import (
+    SAMPLE_RATE, WhisperModelRegistry, split_on_silence, stitch_transcripts, stream_audio_chunks,
+    transcribe_video_streaming,
+)
+
+# Stands in for ffmpeg: writes 10 s of s16le samples (or -t seconds) and a stray odd byte
+FAKE_FFMPEG = """
+import array, sys
+args = sys.argv[1:]
+if args[args.index("-i") + 1] == "broken.mp4":
+    sys.stderr.write("moov atom not found")
+    sys.exit(1)
+seconds = float(args[args.index("-t") + 1]) if "-t" in args else 10.0
+sys.stdout.buffer.write(array.array("h", (i % 30000 for i in range(int(seconds * 16000)))).tobytes() + b"\\x01")
+"""
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    loads = []
+    module = types.SimpleNamespace(load_model=lambda size, device=None: loads.append(size) or object())
+    monkeypatch.setitem(sys.modules, "whisper", module)
+    return loads
+
+def test_sessions_use_separate_replicas_concurrently(fake_whisper):
+    registry = WhisperModelRegistry(max_replicas=2)
+    with registry.use("base") as first, registry.use("base") as second:
+        assert first is not second
+    with registry.use("base") as again:
+        assert again in (first, second)
+    assert len(fake_whisper) == 2
+
+def test_callers_beyond_the_limit_wait_for_a_replica(fake_whisper):
+    registry = WhisperModelRegistry(max_replicas=1)
+    got = []
+    with registry.use("base") as model:
+        waiter = threading.Thread(target=lambda: got.append(registry.use("base").__enter__()))
+        waiter.start()
+        waiter.join(0.2)
+        assert waiter.is_alive()
+    waiter.join(1)
+    assert got == [model] and len(fake_whisper) == 1
+
+def test_idle_models_are_evicted(fake_whisper):
+    registry = WhisperModelRegistry(idle_seconds=0)
+    with registry.use("base"):
+        pass
+    assert registry.evict_idle() == 1
+    assert registry.loaded() == {"base": False}
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch):
+    command = transcription._ffmpeg_pcm_command
+    monkeypatch.setattr(transcription, "_ffmpeg_pcm_command",
+                        lambda path, max_seconds=None: [sys.executable, "-c", FAKE_FFMPEG] + command(path, max_seconds)[1:])
+
+def test_stream_yields_fixed_windows_of_the_decoded_audio(fake_ffmpeg):
+    chunks = list(stream_audio_chunks("trip.mp4", chunk_seconds=4))
+    assert [len(chunk) for chunk in chunks] == [64000, 64000, 32000]
+    expected = (np.arange(160000) % 30000).astype(np.float32) / 32768.0
+    assert np.array_equal(np.concatenate(chunks), expected)
+
+def test_stream_stops_at_max_minutes(fake_ffmpeg, monkeypatch):
+    class FakeModel:
+        def transcribe(self, chunk, initial_prompt=None):
+            return {"text": f"{len(chunk)} samples"}
+
+    @contextmanager
+    def use(size):
+        yield FakeModel()
+
+    monkeypatch.setattr(transcription, "get_whisper_registry", lambda: types.SimpleNamespace(use=use))
+    assert transcribe_video_streaming("trip.mp4", max_minutes=0.05) == "48000 samples"
+
+def test_stream_reports_ffmpeg_errors(fake_ffmpeg):
+    with pytest.raises(RuntimeError, match="moov atom"):
+        list(stream_audio_chunks("broken.mp4"))
+
+def speech_with_pauses(seconds, pauses):
+    """Constant-level "speech" with silent (start, end) second ranges."""
+    audio = np.full(int(seconds * SAMPLE_RATE), 0.5, dtype=np.float32)
+    for start, end in pauses:
+        audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0.0
+    return audio
+
+def test_chunks_are_cut_at_pauses_and_overlap():
+    audio = speech_with_pauses(25, [(8.5, 8.8), (17.0, 17.3)])
+    ranges = split_on_silence(audio, window_seconds=10, overlap_seconds=1, search_seconds=3)
+    cut_1, cut_2, overlap = int(8.5 * SAMPLE_RATE), 17 * SAMPLE_RATE, SAMPLE_RATE
+    assert ranges == [(0, cut_1), (cut_1 - overlap, cut_2), (cut_2 - overlap, len(audio))]
+
+def test_pauses_outside_the_search_range_are_ignored():
+    audio = speech_with_pauses(15, [(2.0, 2.5)])
+    ranges = split_on_silence(audio, window_seconds=10, overlap_seconds=0, search_seconds=3)
+    assert 7 * SAMPLE_RATE <= ranges[0][1] < 10 * SAMPLE_RATE
+
+def test_short_audio_is_a_single_chunk():
+    assert split_on_silence(speech_with_pauses(5, []), window_seconds=10) == [(0, 5 * SAMPLE_RATE)]
+    assert split_on_silence(np.zeros(0, dtype=np.float32)) == []
+
+def test_stitching_drops_words_repeated_by_the_overlap():
+    texts = ["We walked to the old market, and then", "the old market and then we ate noodles.", "Noodles. Then we took the subway."]
+    assert stitch_transcripts(texts) == "We walked to the old market, and then we ate noodles. Then we took the subway."
+
+def test_stitching_keeps_chunks_without_a_shared_phrase():
+    assert stitch_transcripts(["First day in Seoul.", "Second day in Busan."]) == "First day in Seoul. Second day in Busan."
+    assert stitch_transcripts(["a b c d", "b c d e"], max_overlap_words=2) == "a b c d b c d e"
@@ -0,0 +1,54 @@
+import random
+
+from travel_common.weather_agg import aggregate_daily, aggregate_daily_batch
+
+DESCRIPTIONS = ["clear sky", "light rain", "few clouds", "overcast clouds"]
+
+def forecast(seed, days=6, start_day=1):
+    rng = random.Random(seed)
+    return [
+        {
+            "dt_txt": f"2026-05-{day:02d} {hour:02d}:00:00",
+            "main": {"temp": round(rng.uniform(-5, 35), 2)},
+            "weather": [{"description": rng.choice(DESCRIPTIONS)}],
+            **({"pop": round(rng.random(), 2)} if rng.random() > 0.1 else {}),
+        }
+        for day in range(start_day, start_day + days)
+        for hour in range(0, 24, 3)
+    ]
+
+def loop_aggregate(data, days=5):
+    """The per-module loop the vectorized engine replaced (ties go to the first description seen)."""
+    daily = {}
+    for item in data:
+        rec = daily.setdefault(item["dt_txt"][:10], {"temps": [], "descs": [], "pops": []})
+        rec["temps"].append(item["main"]["temp"])
+        rec["descs"].append(item["weather"][0]["description"])
+        rec["pops"].append(item.get("pop", 0.0))
+    return [
+        {
+            "date": date,
+            "summary": max(dict.fromkeys(rec["descs"]), key=rec["descs"].count),
+            "temp_max": round(max(rec["temps"]), 1),
+            "temp_min": round(min(rec["temps"]), 1),
+            "pop_max": round(max(rec["pops"]), 2),
+        }
+        for date, rec in sorted(daily.items())[:days]
+    ]
+
+def test_matches_the_loop():
+    for seed in range(20):
+        data = forecast(seed)
+        assert aggregate_daily(data, days=5) == loop_aggregate(data, days=5)
+
+def test_batch_matches_per_location_results():
+    forecasts = {"Seoul": forecast(1), "Tokyo": forecast(2, days=3, start_day=4), "Nowhere": []}
+    result = aggregate_daily_batch(forecasts, days=4)
+    assert result == {location: loop_aggregate(data, days=4) for location, data in forecasts.items()}
+
+def test_rain_windows_merge_consecutive_slots():
+    data = [
+        {"dt_txt": f"2026-05-01 {hour:02d}:00:00", "main": {"temp": 20}, "weather": [{"description": "rain"}], "pop": pop}
+        for hour, pop in zip(range(0, 24, 3), [0.1, 0.6, 0.7, 0.2, 0.9, 0.1, 0.5, 0.8])
+    ]
+    assert aggregate_daily(data, rain_windows=True)[0]["rain_windows"] == ["03:00-09:00", "12:00-15:00", "18:00-24:00"]
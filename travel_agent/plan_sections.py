@@ -0,0 +1,205 @@
+"""
+Sectioned travel plans for incremental revision.
+
+A generated plan is split at its headings into addressable sections
+(``overview``, ``day_1`` ... ``day_N``, ``budget``, ``notes``, plus slugs for
+any other top-level heading). Plan feedback is mapped to the sections it
+mentions, only those sections are rewritten by the LLM, and the results are
+spliced back into the plan, so a change to one day costs one day's tokens.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage
+from langgraph.constants import TAG_NOSTREAM
+
+Section = Dict[str, str]  # {"key": ..., "title": ..., "text": ...}
+
+HEADING_RE = re.compile(r"^\s*(#{1,6})\s+(.+?)\s*$")
+BOLD_HEADING_RE = re.compile(r"^\s*\*\*(.+?)\*\*:?\s*$")
+DAY_RE = re.compile(r"\bday\s*(\d+)\b", re.IGNORECASE)
+ORDINAL_DAYS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5,
+    "sixth": 6, "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10,
+}
+NUMBER_WORDS = {"two": 2, "three": 3, "four": 4, "five": 5}
+ORDINAL = r"(?:%s|\d+(?:st|nd|rd|th))" % "|".join(ORDINAL_DAYS)
+LIST_SEPARATOR = r"\s*(?:,|and|&|or|-|–|to|through)\s*"
+# "day 2", "days 1 and 2", "days 1-3", "day 1, 3 or 4"
+DAY_LIST_RE = re.compile(rf"\bdays?\s*(\d+(?:{LIST_SEPARATOR}\d+)*)\b", re.IGNORECASE)
+# "second day", "2nd day", "the first and third days"
+ORDINAL_LIST_RE = re.compile(rf"\b({ORDINAL}(?:\s*(?:,|and|&|or)\s*{ORDINAL})*)\s+days?\b", re.IGNORECASE)
+# "the first two days", "last 3 days", "last day"
+EDGE_DAYS_RE = re.compile(rf"\b(first|last)\s+(?:(\d+|{'|'.join(NUMBER_WORDS)})\s+days|day)\b", re.IGNORECASE)
+WHOLE_PLAN_RE = re.compile(r"\b(?:every|each|all(?: the)?)\s+days?\b|\b(?:whole|entire)\b", re.IGNORECASE)
+KEYWORD_SECTIONS = [
+    ("budget", ("budget", "cost", "price", "pricing", "expensive", "cheap", "cheaper", "cheapest", "afford", "affordable",
+                "spend", "spending", "money", "currency", "$")),
+    ("notes", ("note", "tip", "pack", "packing", "clothing", "clothes", "wear", "advice")),
+    ("overview", ("overview", "summary", "introduction")),
+]
+KNOWN_KEYS = {key for key, _ in KEYWORD_SECTIONS}
+
+def _keyword_pattern(words: tuple) -> "re.Pattern[str]":
+    """Whole-word (or plural) match of any of the words; symbols match anywhere."""
+    parts = [rf"\b{re.escape(word)}s?\b" if word.isalnum() else re.escape(word) for word in words]
+    return re.compile("|".join(parts), re.IGNORECASE)
+
+KEYWORD_PATTERNS = [(key, _keyword_pattern(words)) for key, words in KEYWORD_SECTIONS]
+
+# ==================== Splitting ====================
+
+def _heading(line: str) -> Optional[tuple]:
+    """Return (level, title) for a markdown or bold-line heading."""
+    match = HEADING_RE.match(line)
+    if match:
+        return len(match.group(1)), match.group(2).strip("*: ").strip()
+    match = BOLD_HEADING_RE.match(line)
+    if match:
+        return 7, match.group(1).strip("*: ").strip()
+    return None
+
+def section_key(title: str) -> str:
+    """Stable key for a section title ("Day 3: Asakusa" -> "day_3")."""
+    day = DAY_RE.search(title)
+    if day:
+        return f"day_{int(day.group(1))}"
+    for key, pattern in KEYWORD_PATTERNS:
+        if pattern.search(title):
+            return key
+    slug = re.sub(r"[^a-z0-9]+", "_", re.sub(r"^\s*\d+[.)]\s*", "", title.lower())).strip("_")
+    return slug or "section"
+
+def _is_known(title: str) -> bool:
+    """Whether a heading names a day or a standard plan section."""
+    return section_key(title) in KNOWN_KEYS or section_key(title).startswith("day_")
+
+def split_sections(plan: str) -> List[Section]:
+    """Split a plan into sections; joining their texts reproduces the plan exactly."""
+    lines = plan.splitlines(keepends=True)
+    headings = {i: heading for i, line in enumerate(lines) if (heading := _heading(line)) is not None}
+    day_levels = [level for level, title in headings.values() if section_key(title).startswith("day_")]
+    known_levels = [level for level, title in headings.values() if _is_known(title)]
+    # Sections start at the level of the day headings (or of the other known headings);
+    # deeper headings such as "Morning" or "**Tips:**" under "Day 2" stay part of that day
+    top = min(day_levels or known_levels or [level for level, _ in headings.values()], default=0)
+
+    sections: List[Section] = [{"key": "intro", "title": "", "text": ""}]
+    seen: Dict[str, int] = {}
+    for i, line in enumerate(lines):
+        heading = headings.get(i)
+        if heading is not None and heading[0] <= top:
+            key = section_key(heading[1])
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > 1:
+                key = f"{key}_{seen[key]}"
+            sections.append({"key": key, "title": heading[1], "text": ""})
+        sections[-1]["text"] += line
+    return [section for section in sections if section["key"] != "intro" or section["text"]]
+
+def join_sections(sections: List[Section]) -> str:
+    text = ""
+    for section in sections:
+        if text and not text.endswith("\n"):
+            text += "\n"
+        text += section["text"]
+    return text
+
+# ==================== Feedback Routing ====================
+
+def _day_number(word: str) -> int:
+    word = word.lower()
+    return ORDINAL_DAYS.get(word) or NUMBER_WORDS.get(word) or int(re.sub(r"\D", "", word))
+
+def mentioned_days(feedback: str, last_day: int) -> List[int]:
+    """Day numbers the feedback refers to, from numbers, ranges and ordinals."""
+    days: List[int] = []
+    for match in DAY_LIST_RE.finditer(feedback):
+        parts = re.findall(r"\d+|-|–|to|through", match.group(1))
+        for i, part in enumerate(parts):
+            if part.isdigit():
+                start = days[-1] + 1 if i >= 2 and not parts[i - 1].isdigit() and days else int(part)
+                days.extend(range(start, int(part) + 1))
+    for match in ORDINAL_LIST_RE.finditer(feedback):
+        days.extend(_day_number(word) for word in re.findall(ORDINAL, match.group(1), re.IGNORECASE))
+    for match in EDGE_DAYS_RE.finditer(feedback):
+        count = _day_number(match.group(2)) if match.group(2) else 1
+        first = 1 if match.group(1).lower() == "first" else max(1, last_day - count + 1)
+        days.extend(range(first, first + count))
+    return list(dict.fromkeys(days))
+
+def route_feedback(feedback: str, sections: List[Section]) -> List[str]:
+    """Keys of the sections the feedback refers to, by day references and keywords.
+
+    Returns every key (a full rewrite) when the request is ambiguous: it talks about
+    the whole plan or names days the plan does not have.
+    """
+    keys = [section["key"] for section in sections]
+    day_keys = [key for key in keys if re.fullmatch(r"day_\d+", key)]
+    last_day = max((int(key.split("_")[1]) for key in day_keys), default=0)
+    days = mentioned_days(feedback, last_day)
+    if WHOLE_PLAN_RE.search(feedback) or any(f"day_{day}" not in keys for day in days):
+        return keys
+    targets = [f"day_{day}" for day in days]
+    for key, pattern in KEYWORD_PATTERNS:
+        if key in keys and pattern.search(feedback):
+            targets.append(key)
+    return list(dict.fromkeys(targets))
+
+def route_feedback_with_llm(llm: Any, feedback: str, sections: List[Section]) -> List[str]:
+    """Ask the LLM which sections need to change; an empty list means the whole plan."""
+    outline = "\n".join(f"- {section['key']}: {section['title']}" for section in sections if section["title"])
+    prompt = f"""
+    A travel plan has these sections (key: title):
+    {outline}
+
+    User feedback: {feedback}
+
+    Which sections must change to address the feedback? Return ONLY a JSON array of section keys,
+    or [] if the feedback affects the whole plan.
+    """
+    try:
+        # Tagged nostream so the JSON answer never reaches callers as plan tokens
+        content = llm.invoke([HumanMessage(content=prompt)], config={"tags": [TAG_NOSTREAM]}).content.strip()
+        if content.startswith("```"):
+            content = content.strip("`").removeprefix("json").strip()
+        keys = json.loads(content)
+    except Exception as e:
+        print(f"Error routing plan feedback: {e}")
+        return []
+    valid = {section["key"] for section in sections}
+    return [key for key in keys if isinstance(key, str) and key in valid] if isinstance(keys, list) else []
+
+# ==================== Revision ====================
+
+def revise_sections(llm: Any, sections: List[Section], keys: List[str], feedback: str, context: str = "") -> List[Section]:
+    """Rewrite only the selected sections and splice them back in order."""
+    outline = ", ".join(section["title"] for section in sections if section["title"])
+    revised = []
+    for section in sections:
+        if section["key"] not in keys:
+            revised.append(section)
+            continue
+        prompt = f"""
+        You are a travel planner revising one section of an existing travel plan.
+
+        Plan outline: {outline}
+        {context}
+
+        Current section:
+        {section["text"]}
+
+        User feedback: {feedback}
+
+        Rewrite only this section so that it addresses the feedback and stays consistent with the rest of the plan.
+        Keep the same heading and formatting. Return ONLY the revised section.
+        """
+        # Sections are revised one at a time so streamed tokens stay readable
+        content = llm.invoke([HumanMessage(content=prompt)]).content
+        text = content if isinstance(content, str) and content.strip() else section["text"]
+        if section["text"].endswith("\n") and not text.endswith("\n"):
+            text += "\n"
+        revised.append({**section, "text": text})
+    return revised
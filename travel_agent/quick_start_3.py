@@ -5,6 +5,7 @@ Demonstrates human feedback nodes and map-reduce pattern
 """
 
 import os, getpass
+import uuid
 from dotenv import load_dotenv
 import sys
 
@@ -34,6 +35,26 @@ def check_api_key():
     
     return True
 
+def stream_plan_tokens(stream):
+    """Print plan tokens as they arrive; return the node update events and the token printer"""
+    from travel_common.plan_stream import ConsoleTokenPrinter
+
+    printer = ConsoleTokenPrinter()
+    events = []
+    for mode, payload in stream:
+        if mode == "token":
+            node, text = payload
+            if not printer.shown(node):
+                print("\n" + "="*50)
+                print("📝 Writing travel plan...")
+                print("="*50)
+            printer(node, text)
+        else:
+            printer.finish()
+            events.append(payload)
+    printer.finish()
+    return events, printer
+
 def interactive_demo():
     """Interactive demonstration with human feedback nodes"""
     print("🎯 Interactive Demo with Human Feedback Nodes 🚀")
@@ -55,7 +76,7 @@ def interactive_demo():
         print(f"\n🚀 Starting to process: {user_input}")
         
         # Create graph and run with LangGraph
-        graph, initial_state, thread = run_travel_agent(user_input, thread_id="interactive_demo")
+        graph, initial_state, thread = run_travel_agent(user_input, thread_id=f"interactive_demo-{uuid.uuid4().hex}")
         
         print("\n=== Starting assistant ===")
         
@@ -86,7 +107,8 @@ def interactive_demo():
 
         if final_event:
             node_name = list(final_event.keys())[0]
-            node_state = final_event[node_name]
+            # Nodes return only their changes, so show the merged state of the thread
+            node_state = graph.get_state(thread).values
             
             
             if "detected_locations" in node_state and node_state["detected_locations"]:
@@ -122,9 +144,9 @@ def interactive_demo():
                 
                 # Continue execution to generate the plan
                 print("\n=== Generating travel plan ===")
-                events = []
-                for event in continue_with_feedback(graph, thread, "subtopics", subtopics_feedback):
-                    events.append(event)
+                events, printer = stream_plan_tokens(
+                    continue_with_feedback(graph, thread, "subtopics", subtopics_feedback, stream_tokens=True)
+                )
                 
                 # Find the last non-interrupt event
                 final_event = None
@@ -137,7 +159,7 @@ def interactive_demo():
                     node_name = list(final_event.keys())[0]
                     node_state = final_event[node_name]
                     
-                    if "travel_plan" in node_state:
+                    if "travel_plan" in node_state and not printer.shown(node_name, node_state["travel_plan"]):
                         print("\n" + "="*50)
 
                         print("="*50)
@@ -192,9 +214,9 @@ def interactive_demo():
             
             # Continue with plan feedback
             print("\n=== Processing plan feedback ===")
-            events = []
-            for event in continue_with_feedback(graph, thread, "plan", plan_feedback):
-                events.append(event)
+            events, printer = stream_plan_tokens(
+                continue_with_feedback(graph, thread, "plan", plan_feedback, stream_tokens=True)
+            )
             
             # Find the last non-interrupt event
             final_event = None
@@ -207,7 +229,7 @@ def interactive_demo():
                 node_name = list(final_event.keys())[0]
                 node_state = final_event[node_name]
                 
-                if "travel_plan" in node_state:
+                if "travel_plan" in node_state and not printer.shown(node_name, node_state["travel_plan"]):
                     print("\n" + "="*50)
                     print("🎉 Updated travel plan! 🎉")
                     print("="*50)
@@ -241,7 +263,7 @@ def video_demo():
         print(f"\n🎬 Starting to process video: {video_path}")
         
         # Create graph and run with LangGraph
-        graph, initial_state, thread = run_travel_agent(video_file_path=video_path, thread_id="video_demo")
+        graph, initial_state, thread = run_travel_agent(video_file_path=video_path, thread_id=f"video_demo-{uuid.uuid4().hex}")
         
         print("\n=== Starting Video Processing ===")
         
@@ -265,7 +287,8 @@ def video_demo():
 
         if final_event:
             node_name = list(final_event.keys())[0]
-            node_state = final_event[node_name]
+            # Nodes return only their changes, so show the merged state of the thread
+            node_state = graph.get_state(thread).values
             
 
             if "video_transcript" in node_state:
@@ -303,9 +326,9 @@ def video_demo():
                 
                 # Continue execution to generate the plan
                 print("\n=== Generating travel plan ===")
-                events = []
-                for event in continue_with_feedback(graph, thread, "subtopics", subtopics_feedback):
-                    events.append(event)
+                events, printer = stream_plan_tokens(
+                    continue_with_feedback(graph, thread, "subtopics", subtopics_feedback, stream_tokens=True)
+                )
                 
                 # Find the last non-interrupt event
                 final_event = None
@@ -318,7 +341,7 @@ def video_demo():
                     node_name = list(final_event.keys())[0]
                     node_state = final_event[node_name]
                     
-                    if "travel_plan" in node_state:
+                    if "travel_plan" in node_state and not printer.shown(node_name, node_state["travel_plan"]):
                         print("\n" + "="*50)
  
                         print("="*50)
@@ -373,9 +396,9 @@ def video_demo():
             
             # Continue with plan feedback
             print("\n=== Processing plan feedback ===")
-            events = []
-            for event in continue_with_feedback(graph, thread, "plan", plan_feedback):
-                events.append(event)
+            events, printer = stream_plan_tokens(
+                continue_with_feedback(graph, thread, "plan", plan_feedback, stream_tokens=True)
+            )
             
             # Find the last non-interrupt event
             final_event = None
@@ -388,7 +411,7 @@ def video_demo():
                 node_name = list(final_event.keys())[0]
                 node_state = final_event[node_name]
                 
-                if "travel_plan" in node_state:
+                if "travel_plan" in node_state and not printer.shown(node_name, node_state["travel_plan"]):
                     print("\n" + "="*50)
                     print("🎉 Updated travel plan! 🎉")
                     print("="*50)
@@ -0,0 +1,371 @@
+"""
+Whisper transcription helpers for travel_agent_3.
+
+Whisper weights take seconds to load, so models are kept in a process-wide
+registry: each model size is loaded on first use, shared by every session
+(with a few replicas so sessions do not queue behind each other), and
+released again after it has been idle for a while.
+
+The streaming mode pipes 16 kHz mono PCM from ffmpeg straight into Whisper in
+fixed windows, so audio extraction and transcription overlap and no
+intermediate WAV file is written. The parallel mode for long videos cuts the
+decoded audio near silent points into overlapping chunks, transcribes them in
+a process pool and stitches the text back together in order.
+"""
+
+import atexit
+import gc
+import os
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_MODEL_SIZE = os.environ.get("TRAVEL_WHISPER_MODEL", "base")
+DEFAULT_IDLE_SECONDS = float(os.environ.get("TRAVEL_WHISPER_IDLE_SECONDS", "600"))
+DEFAULT_REPLICAS = int(os.environ.get("TRAVEL_WHISPER_REPLICAS", "1"))  # Concurrent transcriptions per model size; each copy costs its full memory
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2  # pcm_s16le
+STREAM_CHUNK_SECONDS = 30.0  # Whisper's native window length
+PROMPT_TAIL_CHARS = 200  # Previous text passed as context to the next window
+PARALLEL_WINDOW_SECONDS = 120.0  # Target chunk length for parallel transcription
+PARALLEL_OVERLAP_SECONDS = 2.0  # Audio repeated at the start of each chunk
+SILENCE_SEARCH_SECONDS = 10.0  # How far before a window boundary to look for a pause
+DEFAULT_WORKERS = int(os.environ.get("TRAVEL_TRANSCRIBE_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) // 2)))))
+
+# ==================== Model Registry ====================
+
+class _ModelEntry:
+    def __init__(self):
+        self.models: List[Any] = []  # Every loaded replica of this size
+        self.idle: List[Any] = []  # Replicas not in use
+        self.loading = 0
+        self.load_lock = threading.Lock()  # Serializes loads of this size
+        self.users = 0
+        self.last_used = time.monotonic()
+
+class WhisperModelRegistry:
+    """Lazily loads Whisper models once per process and evicts idle ones.
+
+    Whisper decoding installs hooks on the model, so a replica serves one caller
+    at a time; up to `max_replicas` replicas per size let sessions transcribe
+    concurrently, and further callers wait for a free one.
+    """
+
+    def __init__(self, idle_seconds: float = DEFAULT_IDLE_SECONDS, device: Optional[str] = None, max_replicas: int = DEFAULT_REPLICAS):
+        self.idle_seconds = idle_seconds
+        self.device = device
+        self.max_replicas = max(1, max_replicas)
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._reaper: Optional[threading.Thread] = None
+
+    def _entry(self, size: str) -> _ModelEntry:
+        with self._lock:
+            entry = self._entries.get(size)
+            if entry is None:
+                entry = self._entries[size] = _ModelEntry()
+            entry.users += 1
+            return entry
+
+    def _load(self, size: str, entry: _ModelEntry) -> Any:
+        with entry.load_lock:
+            import whisper
+            print(f"Loading Whisper model '{size}'...")
+            model = whisper.load_model(size, device=self.device)
+        self._start_reaper()
+        return model
+
+    def _checkout(self, size: str, entry: _ModelEntry) -> Any:
+        """Take an idle replica, load a new one below the limit, or wait for one to be released."""
+        with self._lock:
+            while not entry.idle and len(entry.models) + entry.loading >= self.max_replicas:
+                self._released.wait()
+            if entry.idle:
+                return entry.idle.pop()
+            entry.loading += 1
+        model = None
+        try:
+            model = self._load(size, entry)
+        finally:
+            with self._lock:
+                entry.loading -= 1
+                if model is not None:
+                    entry.models.append(model)
+                else:
+                    self._released.notify()
+        return model
+
+    @contextmanager
+    def use(self, size: str = DEFAULT_MODEL_SIZE) -> Iterator[Any]:
+        """Yield a model replica for a size, held exclusively while in use."""
+        entry = self._entry(size)
+        model = None
+        try:
+            model = self._checkout(size, entry)
+            yield model
+        finally:
+            with self._lock:
+                if model is not None:
+                    entry.idle.append(model)
+                    self._released.notify()
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+
+    def evict_idle(self) -> int:
+        """Drop models that are unused and idle past the limit; returns how many were freed."""
+        now = time.monotonic()
+        freed = 0
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.models and entry.users == 0 and now - entry.last_used >= self.idle_seconds:
+                    freed += len(entry.models)
+                    entry.models, entry.idle = [], []
+        if freed:
+            gc.collect()
+            try:
+                import torch
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except ImportError:
+                pass
+        return freed
+
+    def loaded(self) -> Dict[str, bool]:
+        with self._lock:
+            return {size: bool(entry.models) for size, entry in self._entries.items()}
+
+    def _start_reaper(self) -> None:
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap_forever, name="whisper-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_forever(self) -> None:
+        interval = max(1.0, min(60.0, self.idle_seconds / 4))
+        while True:
+            time.sleep(interval)
+            self.evict_idle()
+            with self._lock:
+                if all(not entry.models for entry in self._entries.values()):
+                    self._reaper = None
+                    return
+
+_registry: Optional[WhisperModelRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_whisper_registry() -> WhisperModelRegistry:
+    """Return the process-wide Whisper model registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = WhisperModelRegistry()
+        return _registry
+
+# ==================== Streaming Transcription ====================
+
+def ffmpeg_available() -> bool:
+    try:
+        return subprocess.run(["ffmpeg", "-version"], capture_output=True).returncode == 0
+    except OSError:
+        return False
+
+def _ffmpeg_pcm_command(video_file_path: str, max_seconds: Optional[float] = None) -> List[str]:
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", video_file_path]
+    if max_seconds:
+        cmd += ["-t", str(max_seconds)]  # Only decode the first max_seconds of audio
+    return cmd + [
+        "-vn",  # No video
+        "-f", "s16le", "-acodec", "pcm_s16le",  # Raw PCM on stdout
+        "-ar", str(SAMPLE_RATE),  # Sample rate
+        "-ac", "1",  # Mono
+        "pipe:1",
+    ]
+
+def stream_audio_chunks(
+    video_file_path: str,
+    chunk_seconds: float = STREAM_CHUNK_SECONDS,
+    max_buffered: int = 4,
+    max_seconds: Optional[float] = None,
+) -> Iterator[Any]:
+    """Yield float32 16 kHz mono windows decoded by ffmpeg while it is still running."""
+    import numpy as np
+
+    cmd = _ffmpeg_pcm_command(video_file_path, max_seconds)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    chunk_bytes = int(chunk_seconds * SAMPLE_RATE) * BYTES_PER_SAMPLE
+    buffered: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_buffered)
+
+    def read_pipe() -> None:
+        try:
+            while True:
+                data = proc.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                buffered.put(data)
+        finally:
+            buffered.put(None)
+
+    reader = threading.Thread(target=read_pipe, name="ffmpeg-reader", daemon=True)
+    reader.start()
+    finished = False
+    try:
+        while True:
+            data = buffered.get()
+            if data is None:
+                finished = True
+                break
+            usable = len(data) - len(data) % BYTES_PER_SAMPLE
+            yield np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+    finally:
+        if not finished:
+            proc.kill()
+            while not buffered.empty():
+                buffered.get_nowait()
+        reader.join(timeout=5)
+        stderr = proc.stderr.read().decode("utf-8", errors="replace")
+        returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"Audio extraction failed: {stderr}")
+
+def transcribe_chunks(chunks: Iterator[Any], size: str = DEFAULT_MODEL_SIZE) -> str:
+    """Transcribe audio windows in order, carrying the previous text as a prompt."""
+    registry = get_whisper_registry()
+    texts = []
+    for chunk in chunks:
+        prompt = " ".join(texts)[-PROMPT_TAIL_CHARS:] or None
+        # Hold a replica only per window so sessions beyond the replica limit can interleave
+        with registry.use(size) as model:
+            result = model.transcribe(chunk, initial_prompt=prompt)
+        text = result.get("text", "")
+        if isinstance(text, list):
+            text = " ".join(text)
+        if text.strip():
+            texts.append(text.strip())
+    return " ".join(texts)
+
+def transcribe_video_streaming(video_file_path: str, size: str = DEFAULT_MODEL_SIZE, max_minutes: Optional[float] = None) -> str:
+    """Transcribe a video's audio track as ffmpeg decodes it, without a temp file."""
+    max_seconds = max_minutes * 60 if max_minutes else None
+    return transcribe_chunks(stream_audio_chunks(video_file_path, max_seconds=max_seconds), size)
+
+# ==================== Parallel Chunked Transcription ====================
+
+def decode_audio(video_file_path: str, max_seconds: Optional[float] = None) -> Any:
+    """Decode a video's audio track to one float32 16 kHz mono array via an ffmpeg pipe."""
+    import numpy as np
+
+    result = subprocess.run(_ffmpeg_pcm_command(video_file_path, max_seconds), capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Audio extraction failed: {result.stderr.decode('utf-8', errors='replace')}")
+    usable = len(result.stdout) - len(result.stdout) % BYTES_PER_SAMPLE
+    return np.frombuffer(result.stdout[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+
+def split_on_silence(
+    audio: Any,
+    window_seconds: float = PARALLEL_WINDOW_SECONDS,
+    overlap_seconds: float = PARALLEL_OVERLAP_SECONDS,
+    search_seconds: float = SILENCE_SEARCH_SECONDS,
+) -> List[Tuple[int, int]]:
+    """Return (start, end) sample ranges cut at the quietest point before each window boundary."""
+    import numpy as np
+
+    total = len(audio)
+    window = int(window_seconds * SAMPLE_RATE)
+    if total <= window:
+        return [(0, total)] if total else []
+
+    # RMS energy per 100 ms frame, used to find pauses between words
+    frame = SAMPLE_RATE // 10
+    frames = total // frame
+    energy = np.sqrt(np.mean(audio[:frames * frame].reshape(frames, frame) ** 2, axis=1))
+
+    cuts, position = [0], 0
+    search = int(search_seconds * SAMPLE_RATE)
+    while total - position > window:
+        target = position + window
+        lo, hi = max(position + 1, target - search) // frame, target // frame
+        cut = (lo + int(np.argmin(energy[lo:hi]))) * frame if hi > lo else target
+        cuts.append(cut)
+        position = cut
+    cuts.append(total)
+
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    return [(max(0, start - overlap if i else 0), end) for i, (start, end) in enumerate(zip(cuts, cuts[1:]))]
+
+def stitch_transcripts(texts: List[str], max_overlap_words: int = 12) -> str:
+    """Join chunk transcripts, dropping words repeated because of the audio overlap."""
+    words: List[str] = []
+    for text in texts:
+        new_words = text.split()
+        normalized_tail = [w.strip(".,!?;:").lower() for w in words[-max_overlap_words:]]
+        normalized_head = [w.strip(".,!?;:").lower() for w in new_words[:max_overlap_words]]
+        skip = 0
+        for size in range(min(len(normalized_tail), len(normalized_head)), 0, -1):
+            if normalized_tail[-size:] == normalized_head[:size]:
+                skip = size
+                break
+        words.extend(new_words[skip:])
+    return " ".join(words)
+
+def _init_worker(threads: int) -> None:
+    """Limit torch threads per worker so the pool does not oversubscribe the CPU."""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+def _transcribe_segment(args: Tuple[Any, str]) -> str:
+    """Process-pool task: transcribe one audio segment with the worker's shared model."""
+    segment, size = args
+    with get_whisper_registry().use(size) as model:
+        result = model.transcribe(segment)
+    text = result.get("text", "")
+    return " ".join(text) if isinstance(text, list) else text.strip()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Reuse one pool so worker processes keep their loaded models between videos."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            threads = max(1, (os.cpu_count() or workers) // workers)
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads,))
+            _pool_workers = workers
+        return _pool
+
+def _shutdown_pool() -> None:
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+atexit.register(_shutdown_pool)
+
+def transcribe_video_parallel(
+    video_file_path: str,
+    size: str = DEFAULT_MODEL_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    max_minutes: Optional[float] = None,
+    window_seconds: float = PARALLEL_WINDOW_SECONDS,
+    overlap_seconds: float = PARALLEL_OVERLAP_SECONDS,
+) -> str:
+    """Transcribe a long video by splitting it on pauses and transcribing chunks in parallel."""
+    audio = decode_audio(video_file_path, max_seconds=max_minutes * 60 if max_minutes else None)
+    segments = [audio[start:end] for start, end in split_on_silence(audio, window_seconds, overlap_seconds)]
+    if not segments:
+        return ""
+    if len(segments) == 1 or workers <= 1:
+        return stitch_transcripts([_transcribe_segment((segment, size)) for segment in segments])
+    pool = _get_process_pool(workers)
+    # map() preserves input order, so the chunks are stitched back in sequence
+    return stitch_transcripts(list(pool.map(_transcribe_segment, [(segment, size) for segment in segments])))
@@ -1,49 +1,98 @@
-import os, getpass
+import os, sys
+import uuid
 import json
-import requests
-from functools import lru_cache
-from typing import Dict, Any, List, Optional, TypedDict, Annotated
+import re
+from typing import Dict, Any, List, Optional, TypedDict, Annotated, Union
 from typing_extensions import TypedDict
 from operator import add
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
 
-from langgraph.prebuilt import ToolNode
-from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
 from langgraph.types import Send
-from dotenv import load_dotenv
+
+# Add the repository root to Python path for the shared travel_common package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from travel_common.checkpointer import get_checkpointer
+from travel_common.env import API_KEYS, get_key, require_keys
+from travel_common.semantic_cache import cached_retrieval
+from travel_common.http_client import search_tavily_json
+from travel_common.geocode_store import get_geocode_store, get_latlon
+from travel_common.place_extractor import extract_destinations
+from travel_common.weather_cache import forecast_for_coords
+from travel_common.weather_agg import aggregate_daily, aggregate_daily_batch
+from travel_common.plan_stream import ConsoleTokenPrinter, stream_with_tokens
+from travel_common.speculation import get_speculator, speculation_enabled
+from travel_common.metrics import instrument_graph
+from plan_sections import join_sections, revise_sections, route_feedback, route_feedback_with_llm, split_sections
+from transcription import ffmpeg_available, get_whisper_registry, transcribe_video_parallel, transcribe_video_streaming
 
 # ==================== API Keys and Configuration ====================
-NOMINATIM_API_URL = "https://nominatim.openstreetmap.org/search" # Nominatim API endpoint
-OPENWEATHER_API_URL = "https://api.openweathermap.org/data/2.5/forecast" # OpenWeather API endpoint
-TAVILY_API_URL = "https://api.tavily.com/search" # Tavily API endpoint
-
-# Environment variable setup
-def _set_env(var: str):
-    if not os.environ.get(var):
-        os.environ[var] = getpass.getpass(f"{var}: ")
-
-load_dotenv()
-_set_env("OPENAI_API_KEY")
-_set_env("OPENWEATHER_KEY")
-_set_env("TAVILY_API_KEY")
-
-# Get environment variables
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
-OPENWEATHER_KEY = os.environ.get("OPENWEATHER_KEY", "")
-TAVILY_API_KEY = os.environ.get("TAVILY_API_KEY", "")
-
-# Initialize LLM
-llm = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0.0
-)
+# Nominatim, OpenWeather and Tavily endpoints are defined in travel_common.http_client
+WEATHER_MAX_CONCURRENCY = int(os.environ.get("TRAVEL_WEATHER_CONCURRENCY", "4")) # Parallel weather lookups per batch
+RESEARCH_MAX_CONCURRENCY = int(os.environ.get("TRAVEL_RESEARCH_CONCURRENCY", "8")) # Parallel subtopic research tasks per graph step
+TRANSCRIBE_MODE = os.environ.get("TRAVEL_TRANSCRIBE_MODE", "file") # "file" (temp WAV), "stream" (ffmpeg pipe) or "parallel" (process pool)
+TRANSCRIBE_MAX_MINUTES = float(os.environ.get("TRAVEL_TRANSCRIBE_MAX_MINUTES", "0")) or None # Only transcribe the first N minutes
+
+# API keys (OPENAI_API_KEY, OPENWEATHER_KEY, TAVILY_API_KEY) are read on first use from the
+# environment or .env, prompting only on an interactive terminal (see travel_common.env), so
+# importing this module never blocks
+
+# ==================== Lazy Initialization ====================
+# The LLM client and the compiled graph are created on first use and cached, so importing
+# this module is fast and headless; `llm`, `graph`, `memory` and the API key names remain
+# available as module attributes through __getattr__ at the end of this file
+_llm = None
+_graph = None
+_init_lock = threading.RLock()
+
+def get_llm():
+    """Return the shared LLM, creating it on first use"""
+    global _llm
+    with _init_lock:
+        if _llm is None:
+            # langchain_openai is slow to import, so it is only loaded here
+            from travel_common.llm_cache import get_llm_cache
+            from travel_common.llm_scheduler import ScheduledChatOpenAI
+
+            get_key("OPENAI_API_KEY")
+            # Responses are cached on disk when TRAVEL_LLM_CACHE is set; calls wait for the
+            # process-wide rate scheduler when TRAVEL_LLM_RPM / TRAVEL_LLM_TPM are set
+            _llm = ScheduledChatOpenAI(
+                model="gpt-4o",
+                temperature=0.0,
+                cache=get_llm_cache()
+            )
+        return _llm
+
+def set_llm(model) -> None:
+    """Replace the shared LLM, e.g. with an offline stand-in"""
+    global _llm
+    with _init_lock:
+        _llm = model
 
 # ==================== State Definitions ====================
+# Nodes return only the keys they change; LangGraph merges them into the state, so
+# checkpoints and stream events carry deltas instead of copies of the whole state.
+
+def merge_subtopic_results(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reducer for subtopic_results: merge research results, or reset when given None"""
+    if right is None:
+        return {}
+    return {**(left or {}), **right}
+
+def merge_research_cache(left: Optional[Dict[str, str]], right: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Reducer for research_cache: summaries are kept for the whole session"""
+    return {**(left or {}), **(right or {})}
+
+def research_key(location: str, subtopic: str) -> str:
+    """Memo key for a location/subtopic pair; case, spacing and punctuation don't matter"""
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", subtopic.casefold()).split())
+    return f"{location.casefold()}|{normalized}"
 
 class TravelState(TypedDict, total=False):
     user_query: str
@@ -55,8 +104,10 @@ class TravelState(TypedDict, total=False):
     weather_info: Dict[str, Any]
     subtopics: List[str]
     subtopics_feedback: Optional[str]
-    subtopic_results: Dict[str, Any]
+    subtopic_results: Annotated[Dict[str, Any], merge_subtopic_results]
+    research_cache: Annotated[Dict[str, str], merge_research_cache]
     travel_plan: str
+    plan_sections: List[Dict[str, str]]
     plan_feedback: Optional[str]
     messages: List[Dict[str, str]]
 
@@ -74,91 +125,66 @@ class BestSubtopicState(TypedDict):
 
 # ==================== Utility Functions ====================
 
-@lru_cache(maxsize=128)
-def get_latlon(destination: str) -> str:
-    """Get latitude and longitude for a destination"""
-    resp = requests.get(
-        NOMINATIM_API_URL,
-        params={"q": destination, "format": "json", "limit": 1},
-        headers={"User-Agent": "Travel-Agent"},
-        timeout=10,
-    )
-    resp.raise_for_status()
-    data = resp.json()
-    if not data:
-        raise ValueError(f"Cannot resolve coordinates for '{destination}'")
-    return f"{data[0]['lat']},{data[0]['lon']}"
+def _fetch_city_forecast(city: str) -> List[Dict]:
+    """Fetch the forecast for a city by coordinates (gazetteer, cache or Nominatim)"""
+    # City names are never sent to OpenWeather directly: namesakes (Sydney, Nova Scotia;
+    # Paris, Texas) would silently return another city's weather
+    coords = get_geocode_store().lookup_cached(city)
+    if coords is None:
+        coords = tuple(map(float, get_latlon(city).split(",")))
+    return forecast_for_coords(coords[0], coords[1], get_key("OPENWEATHER_KEY"))
 
 def get_weather(city: str, days: int = 5) -> List[Dict]:
     """Get weather information for a city"""
-    if not OPENWEATHER_KEY:
+    if not get_key("OPENWEATHER_KEY"):
         return [{"error": "OpenWeather API key not set"}]
     
     try:
-        lat, lon = map(float, get_latlon(city).split(","))
-        resp = requests.get(
-            OPENWEATHER_API_URL,
-            params={
-                "lat": lat,
-                "lon": lon,
-                "appid": OPENWEATHER_KEY,
-                "units": "metric",
-                "lang": "en",
-            },
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()["list"]
-
-        daily = {}
-        for item in data:
-            date = item["dt_txt"][:10]
-            if date not in daily:
-                daily[date] = {"temps": [], "descs": [], "pops": []}
-            daily[date]["temps"].append(item["main"]["temp"])
-            daily[date]["descs"].append(item["weather"][0]["description"])
-            daily[date]["pops"].append(item.get("pop", 0.0))
-
-        out = []
-        for date, rec in sorted(daily.items())[:days]:
-            out.append({
-                "date": date,
-                "summary": max(set(rec["descs"]), key=rec["descs"].count),
-                "temp_max": round(max(rec["temps"]), 1),
-                "temp_min": round(min(rec["temps"]), 1),
-                "pop_max": round(max(rec["pops"]), 2),
-            })
-        return out
+        return aggregate_daily(_fetch_city_forecast(city), days)
     except Exception as e:
         return [{"error": f"Failed to get weather information: {str(e)}"}]
 
-def search_web(query: str) -> str:
-    """Search web information using Tavily"""
-    if not TAVILY_API_KEY:
+def get_weather_batch(locations: List[str], days: int = 5, max_workers: int = WEATHER_MAX_CONCURRENCY) -> Dict[str, List[Dict]]:
+    """Get weather information for several locations concurrently"""
+    unique_locations = list(dict.fromkeys(locations))
+    if not unique_locations:
+        return {}
+    if not get_key("OPENWEATHER_KEY"):
+        return {location: [{"error": "OpenWeather API key not set"}] for location in unique_locations}
+    
+    forecasts, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_locations)))) as executor:
+        futures = {location: executor.submit(_fetch_city_forecast, location) for location in unique_locations}
+        for location, future in futures.items():
+            try:
+                forecasts[location] = future.result()
+            except Exception as e:
+                errors[location] = [{"error": f"Failed to get weather information: {str(e)}"}]
+    
+    # Aggregate every location's forecast in one vectorized pass
+    try:
+        daily = aggregate_daily_batch(forecasts, days)
+    except Exception as e:
+        daily = {location: [{"error": f"Failed to get weather information: {str(e)}"}] for location in forecasts}
+    return {location: daily[location] if location in daily else errors[location] for location in unique_locations}
+
+def search_web(query: str, scope: Optional[str] = None) -> str:
+    """Search web information using Tavily, reusing results for similar queries"""
+    if not get_key("TAVILY_API_KEY"):
         return "Tavily API key not set, cannot perform web search"
     
+    return cached_retrieval(
+        "tavily",
+        query,
+        lambda: _search_tavily(query),
+        scope=scope,
+        cacheable=lambda result: not result.startswith("Search failed"),
+    )
+
+def _search_tavily(query: str) -> str:
+    """Send a search request to Tavily"""
     try:
-        resp = requests.get(
-            TAVILY_API_URL,
-            params={
-                "api_key": TAVILY_API_KEY,
-                "query": query,
-                "search_depth": "basic",
-                "max_results": 5
-            },
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        
-        results = []
-        for result in data.get("results", []):
-            results.append({
-                "title": result.get("title", ""),
-                "content": result.get("content", ""),
-                "url": result.get("url", "")
-            })
-        return json.dumps(results, ensure_ascii=False, indent=2)
+        return search_tavily_json(query, get_key("TAVILY_API_KEY"), max_results=5)
     except Exception as e:
         return f"Search failed: {str(e)}"
 
@@ -206,8 +232,9 @@ def transcribe_audio(audio_file_path: str) -> str:
         except ImportError:
             return "Whisper not installed, cannot transcribe audio. Please run: pip install openai-whisper"
         
-        model = whisper.load_model("base")
-        result = model.transcribe(audio_file_path)
+        # The registry loads the model once per process and shares it across sessions
+        with get_whisper_registry().use() as model:
+            result = model.transcribe(audio_file_path)
         text_result = result.get("text", "")
         if isinstance(text_result, list):
             text_result = " ".join(text_result)
@@ -215,10 +242,44 @@ def transcribe_audio(audio_file_path: str) -> str:
     except Exception as e:
         return f"Audio transcription failed: {str(e)}"
 
-def process_video_file(video_file_path: str) -> str:
+def transcribe_video_stream(video_file_path: str) -> str:
+    """Transcribe a video by piping ffmpeg's PCM output into Whisper window by window"""
+    if not ffmpeg_available():
+        return "ffmpeg not installed, cannot process video files. Please install ffmpeg: https://ffmpeg.org/download.html"
+    try:
+        import whisper
+    except ImportError:
+        return "Whisper not installed, cannot transcribe audio. Please run: pip install openai-whisper"
+    
+    try:
+        return transcribe_video_streaming(video_file_path, max_minutes=TRANSCRIBE_MAX_MINUTES)
+    except Exception as e:
+        return f"Audio transcription failed: {str(e)}"
+
+def transcribe_video_chunked(video_file_path: str) -> str:
+    """Transcribe a long video by splitting it on pauses and transcribing the chunks in parallel"""
+    if not ffmpeg_available():
+        return "ffmpeg not installed, cannot process video files. Please install ffmpeg: https://ffmpeg.org/download.html"
+    try:
+        import whisper
+    except ImportError:
+        return "Whisper not installed, cannot transcribe audio. Please run: pip install openai-whisper"
+    
+    try:
+        return transcribe_video_parallel(video_file_path, max_minutes=TRANSCRIBE_MAX_MINUTES)
+    except Exception as e:
+        return f"Audio transcription failed: {str(e)}"
+
+def process_video_file(video_file_path: str, mode: Optional[str] = None) -> str:
     """Process video file, extract audio and transcribe"""
     print(f"Processing video file: {video_file_path}")
     
+    mode = mode or TRANSCRIBE_MODE
+    if mode == "stream":
+        return transcribe_video_stream(video_file_path)
+    if mode == "parallel":
+        return transcribe_video_chunked(video_file_path)
+    
     # Extract audio
     audio_file_path = extract_audio_from_video(video_file_path)
     if audio_file_path.startswith("Error") or audio_file_path.startswith("ffmpeg not installed"):
@@ -248,17 +309,15 @@ def process_input(state: TravelState) -> TravelState:
         transcript = process_video_file(video_file_path)
         full_text = f"{user_query} {transcript}".strip()
         return {
-            **state,
             "video_transcript": transcript,
             "full_text": full_text
         }
     else:
         return {
-            **state,
             "full_text": user_query
         }
 
-def generate_locations_and_subtopics(state: TravelState) -> TravelState:
+def generate_locations_and_subtopics(state: TravelState, config: RunnableConfig) -> TravelState:
     """Extract locations and generate subtopics from input text"""
     print(f"Generating locations and subtopics from text: {state.get('full_text', '')}")
     
@@ -275,23 +334,29 @@ def generate_locations_and_subtopics(state: TravelState) -> TravelState:
     """
     
     try:
-        response = llm.invoke([HumanMessage(content=location_prompt)])
+        # Fast path: gazetteer lookup; the LLM reads any text that is ambiguous
+        # (no or several cities, namesakes, unknown regions, origins, negations)
+        locations = extract_destinations(full_text)
+        if locations is not None:
+            print(f"Detected locations from gazetteer: {locations}")
+        else:
+            response = get_llm().invoke([HumanMessage(content=location_prompt)])
         
-        content = response.content
-        if isinstance(content, str):
-            content = content.strip()
+            content = response.content
+            if isinstance(content, str):
+                content = content.strip()
             
-            # Try to parse JSON from the response
-            if content.startswith("```json"):
-                content = content[7:-3]
-            elif content.startswith("```"):
-                content = content[3:-3]
+                # Try to parse JSON from the response
+                if content.startswith("```json"):
+                    content = content[7:-3]
+                elif content.startswith("```"):
+                    content = content[3:-3]
             
-            locations = json.loads(content)
-            if not isinstance(locations, list):
-                locations = [locations]
-        else:
-            locations = []
+                locations = json.loads(content)
+                if not isinstance(locations, list):
+                    locations = [locations]
+            else:
+                locations = []
         
         # Generate subtopics based on locations
         subtopics_prompt = f"""
@@ -303,7 +368,7 @@ def generate_locations_and_subtopics(state: TravelState) -> TravelState:
         Return ONLY a JSON array of subtopic strings.
         """
         
-        response = llm.invoke([HumanMessage(content=subtopics_prompt)])
+        response = get_llm().invoke([HumanMessage(content=subtopics_prompt)])
         
         content = response.content
         if isinstance(content, str):
@@ -320,18 +385,18 @@ def generate_locations_and_subtopics(state: TravelState) -> TravelState:
         else:
             subtopics = []
         
+        prefetch_research(locations, subtopics, state.get("research_cache") or {}, config)
         return {
-            **state,
             "detected_locations": locations,
             "has_locations": len(locations) > 0,
-            "subtopics": subtopics
+            "subtopics": subtopics,
+            "subtopic_results": None  # Research belongs to the previous subtopics
         }
         
     except Exception as e:
         print(f"Error parsing locations/subtopics: {e}")
         print(f"Raw response: {response.content if 'response' in locals() else 'No response'}")
         return {
-            **state,
             "detected_locations": [],
             "has_locations": False,
             "subtopics": []
@@ -342,15 +407,8 @@ def get_weather_info(state: TravelState) -> TravelState:
     print(f"Getting weather information for locations: {state.get('detected_locations', [])}")
 
     locations = state.get("detected_locations", [])
-    weather_info = {}
-    for location in locations:
-        try:
-            weather_data = get_weather(location)
-            weather_info[location] = weather_data
-        except Exception as e:
-            weather_info[location] = [{"error": f"Failed to get weather: {str(e)}"}]
+    weather_info = get_weather_batch(locations)
     return {
-        **state,
         "weather_info": weather_info
     }
 
@@ -358,19 +416,19 @@ def get_weather_info(state: TravelState) -> TravelState:
 
 def human_feedback_subtopics(state: TravelState) -> TravelState:
     """Human feedback node for subtopics - no-op node that will be interrupted"""
-    return state
+    return {}
 
 def human_feedback_plan(state: TravelState) -> TravelState:
     """Human feedback node for travel plan - no-op node that will be interrupted"""
-    return state
+    return {}
 
-def should_continue_subtopics(state: TravelState) -> str:
-    """Determine if we should continue with subtopics feedback or proceed to plan generation"""
+def should_continue_subtopics(state: TravelState) -> Union[str, List[Send]]:
+    """Determine if we should continue with subtopics feedback or fan out subtopic research"""
     subtopics_feedback = state.get("subtopics_feedback", "")
     
     # Check if user is satisfied (wants to proceed)
     if subtopics_feedback and subtopics_feedback.lower() in ["satisfied", "ok", "good", "yes", "no changes", "proceed", "continue", "next"]:
-        return "generate_final_plan"
+        return run_subtopics_map(state)
     
     # If there's feedback, regenerate subtopics
     if subtopics_feedback:
@@ -394,12 +452,12 @@ def should_continue_plan(state: TravelState) -> str:
     # Default: continue with plan feedback
     return "human_feedback_plan"
 
-def process_subtopics_feedback(state: TravelState) -> TravelState:
+def process_subtopics_feedback(state: TravelState, config: RunnableConfig) -> TravelState:
     """Process user feedback on subtopics"""
     feedback = state.get("subtopics_feedback", "")
     
     if not feedback:
-        return state
+        return {}
     
     # Regenerate subtopics based on feedback
     locations = state.get("detected_locations", [])
@@ -413,7 +471,7 @@ def process_subtopics_feedback(state: TravelState) -> TravelState:
     """
     
     try:
-        response = llm.invoke([HumanMessage(content=prompt)])
+        response = get_llm().invoke([HumanMessage(content=prompt)])
         content = response.content
         if isinstance(content, str):
             content = content.strip()
@@ -431,55 +489,68 @@ def process_subtopics_feedback(state: TravelState) -> TravelState:
         
         print(f"Updated subtopics based on feedback: {new_subtopics}")
         
+        prefetch_research(locations, new_subtopics, state.get("research_cache") or {}, config)
         return {
-            **state,
             "subtopics": new_subtopics,
+            "subtopic_results": None,  # Research belongs to the previous subtopics
             "subtopics_feedback": None  # Clear feedback after processing
         }
     except Exception as e:
         print(f"Error processing subtopics feedback: {e}")
-        return state
+        return {}
 
 def process_plan_feedback(state: TravelState) -> TravelState:
-    """Process user feedback on the travel plan"""
+    """Process user feedback on the travel plan, rewriting only the sections it refers to"""
     feedback = state.get("plan_feedback", "")
     
     if not feedback:
-        return state
+        return {}
+    
+    travel_plan = state.get("travel_plan", "")
+    sections = state.get("plan_sections") or split_sections(travel_plan)
+    keys = route_feedback(feedback, sections)
+    if not keys and len(sections) > 1:
+        keys = route_feedback_with_llm(get_llm(), feedback, sections)
+    
+    # Feedback about specific days or sections: revise those and splice them back
+    if keys and len(keys) < len(sections):
+        print(f"Revising plan sections: {', '.join(keys)}")
+        context = f"Weather Information: {format_weather_summary(state.get('weather_info', {}))}"
+        sections = revise_sections(get_llm(), sections, keys, feedback, context)
+        return {
+            "travel_plan": join_sections(sections),
+            "plan_sections": sections,
+            "plan_feedback": None  # Clear feedback after processing
+        }
     
     prompt = f"""
     You are a travel planner. Based on user feedback, regenerate the travel plan:
     
     Original plan:
-    {state.get("travel_plan", "")}
+    {travel_plan}
     
     User feedback: {feedback}
     
     Please regenerate the travel plan based on the feedback.
     """
     
-    response = llm.invoke([HumanMessage(content=prompt)])
+    response = get_llm().invoke([HumanMessage(content=prompt)])
     content = response.content
-    travel_plan = content if isinstance(content, str) else state.get("travel_plan", "")
+    travel_plan = content if isinstance(content, str) else travel_plan
     
     return {
-        **state,
         "travel_plan": travel_plan,
+        "plan_sections": split_sections(travel_plan),
         "plan_feedback": None  # Clear feedback after processing
     }
 
 # ==================== Map-Reduce Pattern for Subtopics ====================
 
-def research_subtopic(state: SubtopicState) -> SubtopicState:
-    """Research a specific subtopic for a location"""
-    subtopic = state.get("subtopic", "")
-    location = state.get("location", "")
-    
-    # Search for information about this subtopic in this location
+def summarize_subtopic(location: str, subtopic: str, config: Optional[RunnableConfig] = None) -> str:
+    """Search the web for a subtopic in a location and summarize the results"""
     query = f"{subtopic} in {location}"
-    search_results = search_web(query)
+    search_results = search_web(query, scope=location)
     
-    # Generate summary
     prompt = f"""
     You are a travel planner. Based on the following search results, generate a detailed summary for "{subtopic} in {location}":
     
@@ -488,44 +559,91 @@ def research_subtopic(state: SubtopicState) -> SubtopicState:
     
     Please generate a structured summary with key information and recommendations.
     """
-    
-    response = llm.invoke([HumanMessage(content=prompt)])
+    response = get_llm().invoke([HumanMessage(content=prompt)], config=config)
     content = response.content
-    summary = content if isinstance(content, str) else ""
+    return content if isinstance(content, str) else ""
+
+def prefetch_research(locations: List[str], subtopics: List[str], research_cache: Dict[str, str], config: RunnableConfig) -> None:
+    """Speculatively research the proposed subtopics while the graph waits for subtopic feedback"""
+    thread_id = (config or {}).get("configurable", {}).get("thread_id")
+    if not speculation_enabled() or thread_id is None:
+        return
+    speculator = get_speculator()
+    pairs = {research_key(location, subtopic): (location, subtopic) for subtopic in subtopics for location in locations}
+    # Subtopics the user edited away are dropped; unchanged ones keep their running tasks
+    speculator.retain(str(thread_id), pairs)
+    # Speculative calls are scheduled under the session's thread id like the graph's own calls
+    prefetch_config = {"metadata": {"thread_id": thread_id}}
+    for key, (location, subtopic) in pairs.items():
+        if key not in research_cache:
+            speculator.start(str(thread_id), key, summarize_subtopic, location, subtopic, prefetch_config)
+
+def research_subtopic(state: SubtopicState, config: RunnableConfig) -> TravelState:
+    """Research a specific subtopic for a location"""
+    subtopic = state.get("subtopic", "")
+    location = state.get("location", "")
+    thread_id = config.get("configurable", {}).get("thread_id")
+    
+    # Pick up research started speculatively during the subtopics feedback pause (None if it never got a worker)
+    prefetched = get_speculator().take(str(thread_id), research_key(location, subtopic)) if speculation_enabled() else None
+    summary = None
+    if prefetched is not None:
+        try:
+            summary = prefetched.result()
+        except Exception as e:
+            print(f"Speculative research for {subtopic} in {location} failed, retrying: {e}")
+    try:
+        if summary is None:
+            summary = summarize_subtopic(location, subtopic)
+    except Exception as e:
+        return {"subtopic_results": {f"{location}_{subtopic}": f"Research failed: {str(e)}"}}
     
+    # Only the new result is returned; the reducers merge it into subtopic_results and
+    # the session's research_cache, so later subtopic edits can reuse it
     return {
-        **state,
-        "search_results": search_results,
-        "summary": summary
+        "subtopic_results": {f"{location}_{subtopic}": summary},
+        "research_cache": {research_key(location, subtopic): summary},
     }
 
-def run_subtopics_map(state: TravelState) -> List[Send]:
-    """Map function: send each subtopic to research"""
+def run_subtopics_map(state: TravelState) -> Union[str, List[Send]]:
+    """Map function: send each location x subtopic pair not researched yet in parallel"""
     subtopics = state.get("subtopics", [])
     locations = state.get("detected_locations", [])
+    research_cache = state.get("research_cache") or {}
     
     sends = []
     for subtopic in subtopics:
         for location in locations:
+            if research_key(location, subtopic) in research_cache:
+                continue
             sends.append(Send("research_subtopic", {
                 "subtopic": subtopic,
                 "location": location
             }))
     
-    return sends
+    # Nothing new to research: go straight to the reduce step
+    return sends or "run_subtopics_reduce"
 
-def run_subtopics_reduce(state: TravelState) -> TravelState:
+def run_subtopics_reduce(state: TravelState, config: RunnableConfig) -> TravelState:
     """Reduce function: collect all subtopic research results"""
-    # The results will be automatically collected via the Annotated[List[str], add] in state
-    return state
-
-def generate_final_plan(state: TravelState) -> TravelState:
-    """Generate final travel plan with all information"""
-    locations = state.get("detected_locations", [])
-    weather_info = state.get("weather_info", {})
-    subtopic_results = state.get("subtopic_results", {})
-    
-    # Format weather information
+    # New results were already merged into subtopic_results by merge_subtopic_results;
+    # pairs skipped by the map step are filled in from the session's research_cache
+    subtopic_results = state.get("subtopic_results") or {}
+    research_cache = state.get("research_cache") or {}
+    reused = {}
+    for subtopic in state.get("subtopics", []):
+        for location in state.get("detected_locations", []):
+            key = f"{location}_{subtopic}"
+            if key not in subtopic_results and research_key(location, subtopic) in research_cache:
+                reused[key] = research_cache[research_key(location, subtopic)]
+    
+    print(f"Collected research for {len(subtopic_results) + len(reused)} location/subtopic pairs ({len(reused)} reused)")
+    if speculation_enabled():
+        get_speculator().discard(str(config.get("configurable", {}).get("thread_id")))
+    return {"subtopic_results": reused} if reused else {}
+
+def format_weather_summary(weather_info: Dict[str, Any]) -> str:
+    """Format daily forecasts for the planning prompts"""
     weather_summary = ""
     for location, weather_data in weather_info.items():
         if isinstance(weather_data, list) and weather_data:
@@ -533,6 +651,13 @@ def generate_final_plan(state: TravelState) -> TravelState:
             for day in weather_data:
                 if "error" not in day:
                     weather_summary += f"  {day['date']}: {day['summary']}, {day['temp_min']}°C - {day['temp_max']}°C, Rain: {day['pop_max']*100:.0f}%\n"
+    return weather_summary
+
+def generate_final_plan(state: TravelState) -> TravelState:
+    """Generate final travel plan with all information"""
+    locations = state.get("detected_locations", [])
+    weather_summary = format_weather_summary(state.get("weather_info", {}))
+    subtopic_results = state.get("subtopic_results", {})
     
     # Format subtopic results
     subtopics_summary = ""
@@ -569,77 +694,95 @@ def generate_final_plan(state: TravelState) -> TravelState:
     
     Format should be clear and easy to read. For each day in the itinerary, start with the weather information and explain why specific activities were chosen based on the weather conditions.
     """
-    response = llm.invoke([HumanMessage(content=prompt)])
+    response = get_llm().invoke([HumanMessage(content=prompt)])
     content = response.content
     travel_plan = content if isinstance(content, str) else ""
     
     return {
-        **state,
         "travel_plan": travel_plan,
+        "plan_sections": split_sections(travel_plan),
     }
 
 # ==================== Graph Construction ====================
-# Build main graph
-builder = StateGraph(TravelState)
-
-# Add nodes
-builder.add_node("process_input", process_input)
-builder.add_node("generate_locations_and_subtopics", generate_locations_and_subtopics)
-builder.add_node("get_weather", get_weather_info)
-builder.add_node("human_feedback_subtopics", human_feedback_subtopics)
-builder.add_node("process_subtopics_feedback", process_subtopics_feedback)
-builder.add_node("generate_final_plan", generate_final_plan)
-builder.add_node("human_feedback_plan", human_feedback_plan)
-builder.add_node("process_plan_feedback", process_plan_feedback)
-
-# Add edges with conditional routing for unlimited feedback
-builder.add_edge(START, "process_input")
-builder.add_edge("process_input", "generate_locations_and_subtopics")
-builder.add_edge("generate_locations_and_subtopics", "get_weather")
-builder.add_edge("get_weather", "human_feedback_subtopics")
-
-# Conditional edges for subtopics feedback loop
-builder.add_conditional_edges(
-    "human_feedback_subtopics",
-    should_continue_subtopics,
-    {
-        "human_feedback_subtopics": "human_feedback_subtopics",
-        "process_subtopics_feedback": "process_subtopics_feedback",
-        "generate_final_plan": "generate_final_plan"
-    }
-)
-
-# Connect subtopics processing back to feedback loop
-builder.add_edge("process_subtopics_feedback", "human_feedback_subtopics")
-
-# Connect plan generation to plan feedback
-builder.add_edge("generate_final_plan", "human_feedback_plan")
-
-# Conditional edges for plan feedback loop
-builder.add_conditional_edges(
-    "human_feedback_plan",
-    should_continue_plan,
-    {
-        "human_feedback_plan": "human_feedback_plan",
-        "process_plan_feedback": "process_plan_feedback",
-        END: END
-    }
-)
+def build_graph():
+    """Build and compile the travel agent graph"""
+    builder = StateGraph(TravelState)
+
+    # Add nodes
+    builder.add_node("process_input", process_input)
+    builder.add_node("generate_locations_and_subtopics", generate_locations_and_subtopics)
+    builder.add_node("get_weather", get_weather_info)
+    builder.add_node("human_feedback_subtopics", human_feedback_subtopics)
+    builder.add_node("process_subtopics_feedback", process_subtopics_feedback)
+    builder.add_node("research_subtopic", research_subtopic)
+    builder.add_node("run_subtopics_reduce", run_subtopics_reduce)
+    builder.add_node("generate_final_plan", generate_final_plan)
+    builder.add_node("human_feedback_plan", human_feedback_plan)
+    builder.add_node("process_plan_feedback", process_plan_feedback)
+
+    # Add edges with conditional routing for unlimited feedback
+    builder.add_edge(START, "process_input")
+    builder.add_edge("process_input", "generate_locations_and_subtopics")
+    builder.add_edge("generate_locations_and_subtopics", "get_weather")
+    builder.add_edge("get_weather", "human_feedback_subtopics")
+
+    # Conditional edges for subtopics feedback loop
+    builder.add_conditional_edges(
+        "human_feedback_subtopics",
+        should_continue_subtopics,
+        {
+            "human_feedback_subtopics": "human_feedback_subtopics",
+            "process_subtopics_feedback": "process_subtopics_feedback",
+            "research_subtopic": "research_subtopic",
+            "run_subtopics_reduce": "run_subtopics_reduce"
+        }
+    )
+
+    # Fan-in: every research task joins at the reduce step before the plan is written
+    builder.add_edge("research_subtopic", "run_subtopics_reduce")
+    builder.add_edge("run_subtopics_reduce", "generate_final_plan")
+
+    # Connect subtopics processing back to feedback loop
+    builder.add_edge("process_subtopics_feedback", "human_feedback_subtopics")
 
-# Connect plan processing back to feedback loop
-builder.add_edge("process_plan_feedback", "human_feedback_plan")
+    # Connect plan generation to plan feedback
+    builder.add_edge("generate_final_plan", "human_feedback_plan")
+
+    # Conditional edges for plan feedback loop
+    builder.add_conditional_edges(
+        "human_feedback_plan",
+        should_continue_plan,
+        {
+            "human_feedback_plan": "human_feedback_plan",
+            "process_plan_feedback": "process_plan_feedback",
+            END: END
+        }
+    )
 
-# Compile graph with checkpointing and interruptions
-memory = MemorySaver()
-graph = builder.compile(
-    checkpointer=memory,
-    interrupt_before=["human_feedback_subtopics", "human_feedback_plan"]
-)
+    # Connect plan processing back to feedback loop
+    builder.add_edge("process_plan_feedback", "human_feedback_plan")
+
+    # Compile graph with durable checkpointing (SQLite with retention, see TRAVEL_CHECKPOINT_DB)
+    # and interruptions; max_concurrency bounds the research fan-out and can be overridden
+    # per call through the run config; node, LLM and HTTP metrics are recorded locally
+    # (see travel_common.metrics)
+    return instrument_graph(builder.compile(
+        checkpointer=get_checkpointer(),
+        interrupt_before=["human_feedback_subtopics", "human_feedback_plan"]
+    ).with_config(max_concurrency=RESEARCH_MAX_CONCURRENCY), "travel_agent")
+
+def get_graph():
+    """Return the compiled graph, building it on first use"""
+    global _graph
+    with _init_lock:
+        if _graph is None:
+            _graph = build_graph()
+        return _graph
 
 # ==================== Usage Functions ====================
 def create_travel_agent():
     """Create travel agent instance"""
-    return graph
+    return get_graph()
 
 def run_travel_agent(user_query: str = "", audio_file_path: Optional[str] = None, video_file_path: Optional[str] = None, thread_id: str = "default"):
     """Run the travel agent"""
@@ -661,16 +804,31 @@ def run_travel_agent(user_query: str = "", audio_file_path: Optional[str] = None
     }
     thread = {"configurable": {"thread_id": thread_id}}
     
-    return graph, initial_state, thread
+    return get_graph(), initial_state, thread
+
+# Nodes whose LLM output is the travel plan; their tokens can be streamed to callers
+PLAN_NODES = ("generate_final_plan", "process_plan_feedback")
 
-def continue_with_feedback(graph, thread, feedback_type: str, feedback_content: str):
-    """Continue execution with feedback"""
+def continue_with_feedback(graph, thread, feedback_type: str, feedback_content: str, stream_tokens: bool = False):
+    """Continue execution with feedback.
+    
+    With stream_tokens=True the stream yields (mode, payload) pairs: ("token", (node, text))
+    for plan tokens as they are generated and ("updates", event) for node updates.
+    """
     if feedback_type == "subtopics":
         graph.update_state(thread, {"subtopics_feedback": feedback_content}, as_node="human_feedback_subtopics")
     elif feedback_type == "plan":
         graph.update_state(thread, {"plan_feedback": feedback_content}, as_node="human_feedback_plan")
     
-    return graph.stream(None, config={"configurable": {"thread_id": thread["configurable"]["thread_id"]}}, stream_mode="updates")
+    config = {"configurable": {"thread_id": thread["configurable"]["thread_id"]}}
+    if stream_tokens:
+        return stream_with_tokens(graph, None, config, PLAN_NODES)
+    return graph.stream(None, config=config, stream_mode="updates")
+
+def pending_feedback_node(graph, thread) -> Optional[str]:
+    """Return the feedback node the graph is paused before, if any"""
+    state = graph.get_state({"configurable": {"thread_id": thread["configurable"]["thread_id"]}})
+    return state.next[0] if state.next else None
 
 
 
@@ -704,28 +862,47 @@ def generate_plan():
     # Create and run the travel agent
     graph, initial_state, thread = run_travel_agent(
         user_query=user_query,
-        thread_id="console_session"
+        thread_id=f"console-{uuid.uuid4().hex}"  # Fresh thread per session
     )
     # Run the main process until user feedback is required
-    for event in graph.stream(initial_state, stream_mode="values", 
-    config={"configurable": {"thread_id": thread['configurable']['thread_id']}}):
-        node = list(event.keys())[0]
-        print(f"\n[Node]: {node}")
-        if "detected_locations" in event and event["detected_locations"]:
-            print(f"[Detected destinations]: {event['detected_locations']}")
-        if "subtopics" in event and event["subtopics"]:
-            print(f"[Recommended subtopics]: {event['subtopics']}")
-        if "weather_info" in event and event["weather_info"]:
-            print("[Weather forecast]:")
-            weather_info = event["weather_info"]
-            print_weather_info(weather_info)
-        if "travel_plan" in event and event["travel_plan"]:
-            print(f"[Travel plan generated!]")
-            print(event["travel_plan"])
-        # Check if user feedback is needed
-        if node in ("human_feedback_subtopics", "human_feedback_plan"):
-            return graph, thread, node
-    return graph, thread, None
+    print_graph_stream(stream_with_tokens(
+        graph, initial_state, {"configurable": {"thread_id": thread['configurable']['thread_id']}}, PLAN_NODES
+    ))
+    # Check if user feedback is needed
+    return graph, thread, pending_feedback_node(graph, thread)
+
+def print_graph_stream(events) -> None:
+    """Print node updates, echoing plan tokens as they arrive"""
+    printer = ConsoleTokenPrinter()
+    for mode, event in events:
+        if mode == "token":
+            node, text = event
+            if not printer.shown(node):
+                print(f"\n[Node]: {node}")
+                print(f"[Writing travel plan...]")
+            printer(node, text)
+            continue
+        printer.finish()
+        for node, update in event.items():
+            if node == "__interrupt__":
+                continue
+            update = update or {}
+            if not printer.shown(node):
+                print(f"\n[Node]: {node}")
+            if update.get("detected_locations"):
+                print(f"[Detected destinations]: {update['detected_locations']}")
+            if update.get("subtopics"):
+                print(f"[Recommended subtopics]: {update['subtopics']}")
+            if update.get("weather_info"):
+                print("[Weather forecast]:")
+                print_weather_info(update["weather_info"])
+            if update.get("travel_plan"):
+                print(f"[Travel plan generated!]")
+                # Cached plans arrive without tokens and section revisions stream only the
+                # revised sections, so print the stored text instead
+                if not printer.shown(node, update["travel_plan"]):
+                    print(update["travel_plan"])
+    printer.finish()
 
 def main_console_loop():
     """
@@ -746,6 +923,7 @@ def main_console_loop():
     - User interactions are handled via the console.
     - The function assumes the existence of `generate_plan` and `continue_with_feedback`.
     """
+    require_keys(*API_KEYS)  # Ask for missing keys before the first prompt
     while True:
         graph, thread, feedback_node = generate_plan()
         if graph is None and thread is None and feedback_node is None:
@@ -764,20 +942,9 @@ def main_console_loop():
                 feedback_type = "plan"
             else:
                 break
-            # Continue the workflow
-            for event in continue_with_feedback(graph, thread, feedback_type, feedback):
-                node = list(event.keys())[0]
-                print(f"\n[Node]: {node}")
-                if "subtopics" in event:
-                    print(f"[Recommended subtopics]: {event['subtopics']}")
-                if "travel_plan" in event:
-                    print(f"[Travel plan generated!]")
-                    print(event["travel_plan"])
-                if node in ("human_feedback_subtopics", "human_feedback_plan"):
-                    feedback_node = node
-                    break
-                else:
-                    feedback_node = None
+            # Continue the workflow, streaming the plan as it is written
+            print_graph_stream(continue_with_feedback(graph, thread, feedback_type, feedback, stream_tokens=True))
+            feedback_node = pending_feedback_node(graph, thread)
 
         # Ask if the user wants to start a new session
         again = input("\nDo you want to start a new travel planning session? (y/n): ").strip().lower()
@@ -785,5 +952,17 @@ def main_console_loop():
             print("Thank you for using the travel planner!")
             break
 
+def __getattr__(name: str):
+    """Lazy module attributes: the LLM, the compiled graph, its checkpointer and the API keys"""
+    if name == "llm":
+        return get_llm()
+    if name == "graph":
+        return get_graph()
+    if name == "memory":
+        return get_graph().checkpointer
+    if name in API_KEYS:
+        return get_key(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == "__main__":
     main_console_loop()
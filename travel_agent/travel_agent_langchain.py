@@ -1,20 +1,21 @@
 import os
-import json
+import sys
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode
 from langchain_core.tools import tool
 
-import requests
+# Add the repository root to Python path for the shared travel_common package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from travel_common.http_client import search_tavily_json
+from travel_common.llm_scheduler import ScheduledChatOpenAI
 
 # ==================== API Keys and Configuration ====================
 load_dotenv()
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-TAVILY_API_URL = "https://api.tavily.com/search"
 
 # ==================== Tools ====================
 
@@ -43,32 +44,13 @@ def search_web(query: str) -> str:
     if not TAVILY_API_KEY:
         return "Tavily API key not set, cannot perform web search"
     try:
-        resp = requests.get(
-            TAVILY_API_URL,
-            params={
-                "api_key": TAVILY_API_KEY,
-                "query": query,
-                "search_depth": "basic",
-                "max_results": 5
-            },
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        results = []
-        for result in data.get("results", []):
-            results.append({
-                "title": result.get("title", ""),
-                "content": result.get("content", ""),
-                "url": result.get("url", "")
-            })
-        return json.dumps(results, ensure_ascii=False, indent=2)
+        return search_tavily_json(query, TAVILY_API_KEY, max_results=5)
     except Exception as e:
         return f"Failed to search web: {str(e)}"
 
 # ==================== Agent Setup ====================
 
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.2)
+llm = ScheduledChatOpenAI(model="gpt-3.5-turbo", temperature=0.2)
 
 tools = [get_weather, search_web]
 
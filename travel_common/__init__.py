@@ -0,0 +1,6 @@
+"""
+Shared helpers used by both travel graphs (travel_agent/ and agengo_code/).
+
+The graph modules are run as plain scripts, so they add the repository root to
+``sys.path`` before importing from this package.
+"""
@@ -0,0 +1,245 @@
+"""
+Non-interactive batch runs of the travel graphs over JSONL files.
+
+    python -m travel_common.batch queries.jsonl -o results.jsonl --concurrency 8
+
+Each input line is a JSON object with the fields the graph's adapter reads
+(``query`` for ``travel_agent``; ``city``, ``days`` and ``max_travelers``
+(or ``travelers``) for ``travel_assistant``), plus optional ``id``, ``graph``
+and ``feedback``. Feedback interrupts are answered by a policy: the line's
+``feedback`` (or ``--feedback`` answers) are used in order, either as a list
+for all interrupts or as ``{"<feedback node>": [...]}``, and every interrupt
+after that is approved. ``--max-rounds`` caps the answers per session so a
+graph that keeps asking cannot loop forever.
+
+Every finished line appends one record (result summary, timings, error) to
+the output file. Thread ids are derived from the output file and line id, so
+rerunning the same command skips lines that already succeeded and continues
+interrupted sessions from their last checkpoint. With ``--no-resume`` every
+line starts a fresh session. Ids must be unique within an input file; a
+repeated id is recorded as an error instead of being run.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from travel_common.env import disable_prompts
+from travel_common.graph_adapters import GraphAdapter, get_adapter, to_jsonable
+
+# ==================== Configuration ====================
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_ROUNDS = 6
+APPROVE = "ok"
+
+# ==================== Feedback Policy ====================
+
+class FeedbackPolicy:
+    """Scripted answers first (per session or per feedback node), then approval."""
+
+    def __init__(self, script: Optional[List[str]] = None, max_rounds: int = DEFAULT_MAX_ROUNDS):
+        self.script = script or []
+        self.max_rounds = max_rounds
+
+    def answer(self, item: Dict[str, Any], node: str, asked: List[str]) -> str:
+        """Answer for the interrupt at `node`, given the nodes already answered in this session."""
+        script = item.get("feedback", self.script)
+        if isinstance(script, dict):
+            script, index = script.get(node, []), asked.count(node)
+        else:
+            index = len(asked)
+        if isinstance(script, str):
+            script = [script]
+        return str(script[index]) if index < len(script) else APPROVE
+
+# ==================== Runner ====================
+
+def read_items(path: str) -> Iterator[Tuple[str, Any]]:
+    """Yield (id, item) per non-empty line; invalid lines yield their parse error as the item."""
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                if not isinstance(item, dict):
+                    raise ValueError("line is not a JSON object")
+            except ValueError as e:
+                yield f"line-{number}", ValueError(f"Invalid JSON on line {number}: {e}")
+                continue
+            yield str(item.get("id", f"line-{number}")), item
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids that already have a successful record in an earlier output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A partly written last line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+def batch_thread_id(adapter: GraphAdapter, output_path: str, item_id: str, run_nonce: str = "") -> str:
+    """Stable thread id, so a rerun continues the same session from its checkpoint; a run nonce starts afresh."""
+    digest = hashlib.sha1(f"{os.path.abspath(output_path)}\0{item_id}\0{run_nonce}".encode("utf-8")).hexdigest()[:20]
+    return f"{adapter.name}-batch-{digest}"
+
+def run_item(adapter: GraphAdapter, item: Dict[str, Any], thread_id: str, policy: FeedbackPolicy) -> Dict[str, Any]:
+    """Drive one session to the end, answering feedback interrupts with the policy."""
+    graph = adapter.graph
+    config = adapter.config(thread_id)
+    timings: Dict[str, float] = {}
+    asked: List[str] = []
+    answers: List[str] = []
+
+    started = time.perf_counter()
+    snapshot = graph.get_state(config)
+    resumed = bool(snapshot.values)
+    # A new session starts from its input; a resumed one continues from its checkpoint
+    inputs = None if resumed else adapter.initial_state(item)
+    if inputs is not None or (snapshot.next and snapshot.next[0] not in adapter.feedback_nodes):
+        for _ in graph.stream(inputs, config, stream_mode="updates"):
+            pass
+    timings["first_interrupt"] = time.perf_counter() - started
+
+    while True:
+        node = adapter.pending(thread_id)
+        if node is None:
+            break
+        if node not in adapter.feedback_nodes:
+            # Interrupted inside a step (e.g. the previous run crashed): finish it
+            for _ in graph.stream(None, config, stream_mode="updates"):
+                pass
+            continue
+        if len(asked) >= policy.max_rounds:
+            raise RuntimeError(f"Still waiting for feedback at {node} after {policy.max_rounds} rounds")
+        answer = policy.answer(item, node, asked)
+        adapter.apply_feedback(thread_id, answer)
+        asked.append(node)
+        answers.append(answer)
+        for _ in graph.stream(None, config, stream_mode="updates"):
+            pass
+    timings["total"] = time.perf_counter() - started
+
+    return {
+        "resumed": resumed,
+        "feedback": [{"node": node, "answer": answer} for node, answer in zip(asked, answers)],
+        "seconds": {name: round(value, 3) for name, value in timings.items()},
+        "result": to_jsonable(adapter.summary(adapter.values(thread_id))),
+    }
+
+class BatchRunner:
+    """Runs input lines on a bounded pool and appends one JSONL record per line."""
+
+    def __init__(self, output_path: str, default_graph: str, policy: FeedbackPolicy, concurrency: int = DEFAULT_CONCURRENCY, progress: Any = None):
+        self.output_path = output_path
+        self.default_graph = default_graph
+        self.policy = policy
+        self.concurrency = concurrency
+        self.progress = progress or sys.stderr
+        self._write_lock = threading.Lock()
+        self.records: List[Dict[str, Any]] = []
+        self.run_nonce = ""
+
+    def _process(self, item_id: str, item: Any) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"id": item_id, "started_at": time.time()}
+        started = time.perf_counter()
+        try:
+            if isinstance(item, Exception):
+                raise item
+            adapter = get_adapter(str(item.get("graph", self.default_graph)))
+            thread_id = batch_thread_id(adapter, self.output_path, item_id, self.run_nonce)
+            record.update(graph=adapter.name, thread_id=thread_id)
+            record.update(run_item(adapter, item, thread_id, self.policy))
+            record["status"] = "ok"
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}", seconds={"total": round(time.perf_counter() - started, 3)})
+        self._write(record)
+        return record
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        with self._write_lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.records.append(record)
+            print(f"[{len(self.records)}] {record['id']}: {record['status']} in {record['seconds']['total']:.2f}s"
+                  + (f" ({record['error']})" if record.get("error") else ""), file=self.progress, flush=True)
+
+    def run(self, input_path: str, resume: bool = True) -> Dict[str, Any]:
+        done = completed_ids(self.output_path) if resume else set()
+        if done:
+            print(f"Skipping {len(done)} lines that already succeeded", file=self.progress)
+        # Without resume, sessions must not land on the checkpoints of an earlier run
+        self.run_nonce = "" if resume else uuid.uuid4().hex
+        started = time.perf_counter()
+        seen: Set[str] = set()
+        # Only a window of lines is in flight, so huge input files are read lazily
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+            inflight: Set[Future] = set()
+            for item_id, item in read_items(input_path):
+                if item_id in seen:
+                    # Lines with the same id would share one thread and checkpoint
+                    self._write({"id": item_id, "started_at": time.time(), "status": "error",
+                                 "error": f"ValueError: Duplicate id '{item_id}'", "seconds": {"total": 0.0}})
+                    continue
+                seen.add(item_id)
+                if item_id in done:
+                    continue
+                if len(inflight) >= self.concurrency * 2:
+                    _, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                inflight.add(executor.submit(self._process, item_id, item))
+            wait(inflight)
+        return summarize(self.records, time.perf_counter() - started)
+
+def summarize(records: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    durations = sorted(record["seconds"]["total"] for record in records if record["status"] == "ok")
+
+    def percentile(p: float) -> Optional[float]:
+        return durations[min(len(durations) - 1, int(p * len(durations)))] if durations else None
+
+    return {
+        "ok": len(durations),
+        "errors": sum(1 for record in records if record["status"] != "ok"),
+        "wall_seconds": round(wall_seconds, 3),
+        "sessions_per_minute": round(len(records) * 60 / wall_seconds, 2) if wall_seconds > 0 else None,
+        "p50_seconds": percentile(0.5),
+        "p95_seconds": percentile(0.95),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the travel graphs over a JSONL file of queries")
+    parser.add_argument("input", help="JSONL file, one query per line")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--graph", default="travel_agent", help="Graph for lines without a 'graph' field")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Sessions run at once")
+    parser.add_argument("--feedback", action="append", default=[], help="Answer for the next feedback interrupt (repeatable); later ones are approved")
+    parser.add_argument("--max-rounds", type=int, default=DEFAULT_MAX_ROUNDS, help="Feedback answers per session before it fails")
+    parser.add_argument("--no-resume", action="store_true", help="Rerun lines that already succeeded in the output file")
+    parser.add_argument("--verbose", action="store_true", help="Keep the graphs' console output")
+    args = parser.parse_args()
+    disable_prompts()  # A missing API key fails the run instead of waiting for input
+
+    runner = BatchRunner(args.output, args.graph, FeedbackPolicy(args.feedback, args.max_rounds), args.concurrency)
+    # The graph nodes print progress for console users; a batch only reports per line on stderr
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            devnull = stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        summary = runner.run(args.input, resume=not args.no_resume)
+    print(json.dumps(summary), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Content-addressed storage for large strings in graph checkpoints.
+
+``BlobSerializer`` wraps LangGraph's ``JsonPlusSerializer``. Before a
+checkpoint or pending write is serialized, every string of at least
+``min_bytes`` inside plain dicts, lists and tuples (transcripts, search result
+JSON, plan drafts, research summaries) is replaced by a small reference to its
+SHA-256 digest. The text itself is written once to a ``BlobStore``, so a plan
+carried through twenty checkpoints is stored a single time and each checkpoint
+only grows with what changed. The remaining payload is zlib-compressed.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+# ==================== Configuration ====================
+BLOB_KEY = "__blob__"
+DEFAULT_MIN_BYTES = int(os.environ.get("TRAVEL_BLOB_MIN_BYTES", "1024"))
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024  # Decoded blobs kept in memory
+COMPRESS_MIN_BYTES = 256
+COMPRESSED_PREFIX = "z:"
+
+# ==================== Blob Store ====================
+
+class BlobStore:
+    """SQLite table of zlib-compressed strings keyed by their SHA-256 digest."""
+
+    def __init__(self, path: str = ":memory:", cache_bytes: int = DEFAULT_CACHE_BYTES):
+        self.cache_bytes = cache_bytes
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cached_bytes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # auto_vacuum only takes effect before the first table is created
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+        self._counters = {"stored": 0, "deduplicated": 0, "reads": 0, "cache_hits": 0}
+
+    def _remember(self, digest: str, text: str) -> None:
+        """Keep a decoded blob in the bounded LRU cache (lock held)."""
+        if digest in self._cache:
+            self._cache.move_to_end(digest)
+            return
+        self._cache[digest] = text
+        self._cached_bytes += len(text)
+        while self._cached_bytes > self.cache_bytes and self._cache:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
+
+    def put(self, text: str) -> str:
+        """Store a string once and return its digest."""
+        raw = text.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute("UPDATE blobs SET last_used = ? WHERE digest = ?", (now, digest))
+            if cur.rowcount:
+                self._counters["deduplicated"] += 1
+            else:
+                self._conn.execute(
+                    "INSERT INTO blobs (digest, data, size, last_used) VALUES (?, ?, ?, ?)",
+                    (digest, zlib.compress(raw), len(raw), now),
+                )
+                self._counters["stored"] += 1
+            self._conn.commit()
+            self._remember(digest, text)
+        return digest
+
+    def get(self, digest: str) -> str:
+        with self._lock:
+            self._counters["reads"] += 1
+            text = self._cache.get(digest)
+            if text is not None:
+                self._counters["cache_hits"] += 1
+                self._cache.move_to_end(digest)
+                return text
+            row = self._conn.execute("SELECT data FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if row is None:
+                raise KeyError(f"Blob {digest} is missing from the blob store")
+            text = zlib.decompress(row[0]).decode("utf-8")
+            self._remember(digest, text)
+            return text
+
+    def collect_garbage(self, unused_since: float) -> int:
+        """Delete blobs no checkpoint has written since `unused_since` (epoch seconds)."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM blobs WHERE last_used < ?", (unused_since,))
+            self._conn.commit()
+            if cur.rowcount:
+                self._conn.executescript("PRAGMA incremental_vacuum;")  # execute() frees a single page
+            return cur.rowcount
+
+    def delete(self, digests: Iterable[str]) -> int:
+        """Delete the given blobs, e.g. once no checkpoint refers to them any more."""
+        digests = list(digests)
+        with self._lock:
+            self._conn.executemany("DELETE FROM blobs WHERE digest = ?", ((digest,) for digest in digests))
+            self._conn.commit()
+            for digest in digests:
+                text = self._cache.pop(digest, None)
+                if text is not None:
+                    self._cached_bytes -= len(text)
+            return len(digests)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            return {**self._counters, "blobs": row[0], "blob_bytes": row[1], "cached_bytes": self._cached_bytes}
+
+# ==================== Serializer ====================
+
+class BlobSerializer:
+    """Checkpoint serializer that moves large strings into a BlobStore and compresses the rest."""
+
+    def __init__(self, store: BlobStore, min_bytes: int = DEFAULT_MIN_BYTES, inner: Optional[Any] = None):
+        self.store = store
+        self.min_bytes = min_bytes
+        self.inner = inner or JsonPlusSerializer()
+
+    def _externalize(self, obj: Any) -> Any:
+        if type(obj) is str:
+            # len() counts characters; any string this long is at least min_bytes of UTF-8
+            return {BLOB_KEY: self.store.put(obj)} if len(obj) >= self.min_bytes else obj
+        if type(obj) is dict:
+            return {key: self._externalize(value) for key, value in obj.items()}
+        if type(obj) is list:
+            return [self._externalize(value) for value in obj]
+        if type(obj) is tuple:
+            return tuple(self._externalize(value) for value in obj)
+        return obj
+
+    def _internalize(self, obj: Any) -> Any:
+        if type(obj) is dict:
+            if len(obj) == 1 and BLOB_KEY in obj:
+                return self.store.get(obj[BLOB_KEY])
+            return {key: self._internalize(value) for key, value in obj.items()}
+        if type(obj) is list:
+            return [self._internalize(value) for value in obj]
+        if type(obj) is tuple:
+            return tuple(self._internalize(value) for value in obj)
+        return obj
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(self._externalize(obj))
+        if len(data) >= COMPRESS_MIN_BYTES:
+            return COMPRESSED_PREFIX + type_, zlib.compress(data)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.startswith(COMPRESSED_PREFIX):
+            type_, payload = type_[len(COMPRESSED_PREFIX):], zlib.decompress(payload)
+        return self._internalize(self.inner.loads_typed((type_, payload)))
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.inner.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.inner.loads(data)
+
+    def collect_garbage(self, unused_since: float) -> int:
+        return self.store.collect_garbage(unused_since)
+
+    def references(self, data: Tuple[str, bytes]) -> Set[str]:
+        """Digests of the blobs a serialized value points to."""
+        type_, payload = data
+        if type_.startswith(COMPRESSED_PREFIX):
+            type_, payload = type_[len(COMPRESSED_PREFIX):], zlib.decompress(payload)
+        found: Set[str] = set()
+        if type_ != "empty":
+            _collect_references(self.inner.loads_typed((type_, payload)), found)
+        return found
+
+def _collect_references(obj: Any, found: Set[str]) -> None:
+    if type(obj) is dict:
+        if len(obj) == 1 and BLOB_KEY in obj:
+            found.add(obj[BLOB_KEY])
+            return
+        values: Iterable[Any] = obj.values()
+    elif type(obj) in (list, tuple):
+        values = obj
+    else:
+        return
+    for value in values:
+        _collect_references(value, found)
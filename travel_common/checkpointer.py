@@ -0,0 +1,137 @@
+"""
+Checkpointer selection shared by the travel graphs.
+
+Graphs checkpoint to a SQLite database with retention and compaction (see
+``travel_common.sqlite_checkpointer``) so sessions survive restarts without
+growing memory. Without ``langgraph-checkpoint-sqlite``, or with
+``TRAVEL_CHECKPOINT_DB=memory``, they fall back to an in-memory saver that
+expires idle threads the same way. Either way, large strings are stored once
+in a content-addressed blob store (see ``travel_common.blob_store``); on disk
+it lives next to the checkpoints in ``<path>.blobs``, so each file has a
+single writer connection.
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
+
+from travel_common.blob_store import BlobSerializer, BlobStore
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "travel_agent", "checkpoints.sqlite")
+DEFAULT_COLLECT_INTERVAL_SECONDS = 5 * 60
+
+# ==================== In-Memory Saver ====================
+
+class BlobMemorySaver(MemorySaver):
+    """MemorySaver that expires idle threads and drops the blobs no remaining thread refers to.
+
+    Each put records the blobs its values reference per thread, and a blob is
+    counted once per thread, so deleting a thread frees exactly the blobs no
+    other thread shares without rescanning the stored checkpoints.
+    """
+
+    def __init__(self, *, serde: BlobSerializer, max_age_seconds: float, collect_interval_seconds: float = DEFAULT_COLLECT_INTERVAL_SECONDS):
+        super().__init__(serde=serde)
+        self.max_age_seconds = max_age_seconds
+        self.collect_interval_seconds = collect_interval_seconds
+        self._activity: Dict[str, float] = {}
+        self._thread_refs: Dict[str, Set[str]] = {}
+        self._ref_counts: Counter = Counter()
+        self._lock = threading.RLock()
+        self._last_collect = time.time()
+
+    def put(self, config: RunnableConfig, checkpoint: Any, metadata: Any, new_versions: Any) -> RunnableConfig:
+        with self._lock:
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = saved["configurable"]["thread_id"]
+            checkpoint_ns = saved["configurable"]["checkpoint_ns"]
+            stored = self.storage[thread_id][checkpoint_ns][saved["configurable"]["checkpoint_id"]]
+            channel_values = [self.blobs[(thread_id, checkpoint_ns, channel, version)] for channel, version in new_versions.items()]
+            self._track(str(thread_id), [stored[0], stored[1], *channel_values])
+            self._activity[str(thread_id)] = time.time()
+        if time.time() - self._last_collect >= self.collect_interval_seconds:
+            self.collect()
+        return saved
+
+    def put_writes(self, config: RunnableConfig, writes: Any, task_id: str, task_path: str = "") -> None:
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            configurable = config["configurable"]
+            key = (configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"])
+            values = [value for (write_task, _), (_, _, value, _) in self.writes.get(key, {}).items() if write_task == task_id]
+            self._track(str(configurable["thread_id"]), values)
+
+    def _track(self, thread_id: str, values: List[Any]) -> None:
+        """Count the blobs newly stored values refer to, once per thread (lock held)."""
+        refs = self._thread_refs.setdefault(thread_id, set())
+        for value in values:
+            for digest in self.serde.references(value) - refs:
+                refs.add(digest)
+                self._ref_counts[digest] += 1
+
+    def _forget(self, thread_id: str) -> List[str]:
+        """Release a deleted thread's blobs and return those no thread refers to any more (lock held)."""
+        dead = []
+        for digest in self._thread_refs.pop(thread_id, ()):
+            self._ref_counts[digest] -= 1
+            if not self._ref_counts[digest]:
+                del self._ref_counts[digest]
+                dead.append(digest)
+        return dead
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            super().delete_thread(thread_id)
+            self._activity.pop(str(thread_id), None)
+            self.serde.store.delete(self._forget(str(thread_id)))
+
+    def collect(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Delete threads idle for max_age_seconds together with the blobs only they used."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._last_collect = now
+            expired = [thread_id for thread_id, updated in self._activity.items() if updated < now - self.max_age_seconds]
+            dead: List[str] = []
+            for thread_id in expired:
+                super().delete_thread(thread_id)
+                del self._activity[thread_id]
+                dead += self._forget(thread_id)
+            removed = self.serde.store.delete(dead)
+        return {"expired": len(expired), "blobs_removed": removed}
+
+# ==================== Selection ====================
+
+_savers: Dict[str, Any] = {}
+_shared_lock = threading.Lock()
+
+def get_checkpointer() -> Any:
+    """Return the process-wide checkpointer (path from TRAVEL_CHECKPOINT_DB)."""
+    path = os.environ.get("TRAVEL_CHECKPOINT_DB", DEFAULT_CHECKPOINT_PATH)
+    max_age_seconds = float(os.environ.get("TRAVEL_CHECKPOINT_MAX_AGE_HOURS", "168")) * 3600
+    with _shared_lock:
+        saver = _savers.get(path)
+        if saver is not None:
+            return saver
+        if path.strip().lower() in ("", "memory", ":memory:"):
+            saver = BlobMemorySaver(serde=BlobSerializer(BlobStore()), max_age_seconds=max_age_seconds)
+        else:
+            try:
+                from travel_common.sqlite_checkpointer import RetentionSqliteSaver
+            except ImportError:
+                print("langgraph-checkpoint-sqlite not installed, keeping checkpoints in memory")
+                saver = BlobMemorySaver(serde=BlobSerializer(BlobStore()), max_age_seconds=max_age_seconds)
+            else:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                saver = RetentionSqliteSaver.from_path(
+                    path,
+                    serde=BlobSerializer(BlobStore(f"{path}.blobs")),
+                    max_age_seconds=max_age_seconds,
+                    max_checkpoints_per_thread=int(os.environ.get("TRAVEL_CHECKPOINT_MAX_PER_THREAD", "20")),
+                )
+        _savers[path] = saver
+        return saver
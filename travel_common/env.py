@@ -0,0 +1,56 @@
+"""
+Lazy API-key resolution for the travel graphs.
+
+The graph modules used to load ``.env`` and prompt for missing keys at import,
+which blocked headless workers. Keys are now resolved on first use:
+``get_key`` loads ``.env`` once and, only when stdin is a terminal, prompts
+for a key that is still missing. Console entry points call ``require_keys``
+up front so users are asked before the first graph step rather than midway;
+servers and batch jobs call ``disable_prompts`` so a missing key never blocks
+a worker thread, even when started from a terminal.
+"""
+
+import getpass
+import os
+import sys
+import threading
+from typing import Optional
+
+API_KEYS = ("OPENAI_API_KEY", "OPENWEATHER_KEY", "TAVILY_API_KEY")
+
+_dotenv_loaded = False
+_prompts_enabled = True
+_env_lock = threading.Lock()
+
+def load_environment() -> None:
+    """Load variables from a .env file once; already-set variables win."""
+    global _dotenv_loaded
+    with _env_lock:
+        if _dotenv_loaded:
+            return
+        _dotenv_loaded = True
+        from dotenv import load_dotenv
+
+        load_dotenv()
+
+def disable_prompts() -> None:
+    """Never prompt for missing keys in this process."""
+    global _prompts_enabled
+    _prompts_enabled = False
+
+def get_key(var: str, prompt: Optional[bool] = None) -> str:
+    """Return an API key, prompting for it on an interactive terminal when it is missing."""
+    load_environment()
+    if not os.environ.get(var):
+        if prompt is None:
+            prompt = _prompts_enabled and sys.stdin is not None and sys.stdin.isatty()
+        if prompt:
+            with _env_lock:
+                if not os.environ.get(var):
+                    os.environ[var] = getpass.getpass(f"{var}: ")
+    return os.environ.get(var, "")
+
+def require_keys(*names: str) -> None:
+    """Ask for every missing key now (interactive consoles only)."""
+    for var in names or API_KEYS:
+        get_key(var)
@@ -0,0 +1,173 @@
+"""
+Persistent geocoding store with an offline gazetteer fast path.
+
+Lookups are answered, in order, from the bundled gazetteer of major cities
+(in memory), from a SQLite store of earlier Nominatim results, and only then
+from Nominatim itself. Names that Nominatim cannot resolve are remembered in a
+negative cache, and live requests are spaced out to respect Nominatim's usage
+policy of at most one request per second.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+from travel_common.http_client import geocode_nominatim
+
+# ==================== Configuration ====================
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.json")
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "travel_agent", "geocode.sqlite")
+NEGATIVE_TTL_SECONDS = 24 * 3600
+NOMINATIM_MIN_INTERVAL = 1.0
+
+def normalize_place(name: str) -> str:
+    """Canonical lookup key: NFC, case-folded, single-spaced."""
+    return " ".join(unicodedata.normalize("NFC", name).casefold().split())
+
+def load_gazetteer(path: str = GAZETTEER_PATH) -> Dict[str, Dict]:
+    """Map every normalized city name and alias to its gazetteer record."""
+    with open(path, encoding="utf-8") as f:
+        cities = json.load(f)["cities"]
+    index: Dict[str, Dict] = {}
+    for city in cities:
+        for name in [city["name"]] + city.get("aliases", []):
+            index.setdefault(normalize_place(name), city)
+    return index
+
+# ==================== Rate Limiter ====================
+
+class MinIntervalLimiter:
+    """Blocks callers so that consecutive calls are at least `interval` seconds apart."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+# ==================== Store ====================
+
+class GeocodeStore:
+    """Resolve place names to coordinates with gazetteer, disk and negative caches."""
+
+    def __init__(
+        self,
+        database_path: str = DEFAULT_STORE_PATH,
+        gazetteer_path: str = GAZETTEER_PATH,
+        negative_ttl_seconds: float = NEGATIVE_TTL_SECONDS,
+        min_interval: float = NOMINATIM_MIN_INTERVAL,
+    ):
+        if database_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(database_path)), exist_ok=True)
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.gazetteer = load_gazetteer(gazetteer_path)
+        self.limiter = MinIntervalLimiter(min_interval)
+        self._memory: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS geocode (
+                name TEXT PRIMARY KEY, lat REAL NOT NULL, lon REAL NOT NULL, updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_negative (name TEXT PRIMARY KEY, failed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._counters = {"gazetteer": 0, "memory": 0, "disk": 0, "network": 0, "negative": 0}
+
+    def _from_gazetteer(self, key: str) -> Optional[Tuple[float, float]]:
+        city = self.gazetteer.get(key)
+        if city is None and "," in key:
+            # "Paris, FR" style qualifiers resolve offline when the country code matches
+            head, _, qualifier = key.partition(",")
+            city = self.gazetteer.get(head.strip())
+            if city is not None and qualifier.strip() != city["country"].casefold():
+                city = None
+        return (city["lat"], city["lon"]) if city else None
+
+    def lookup_cached(self, name: str) -> Optional[Tuple[float, float]]:
+        """Return (lat, lon) from the gazetteer or earlier results, without any network call."""
+        key = normalize_place(name)
+        coords = self._from_gazetteer(key)
+        with self._lock:
+            if coords:
+                self._counters["gazetteer"] += 1
+                return coords
+            coords = self._memory.get(key)
+            if coords:
+                self._counters["memory"] += 1
+                return coords
+            row = self._conn.execute("SELECT lat, lon FROM geocode WHERE name = ?", (key,)).fetchone()
+            if row:
+                self._memory[key] = (row[0], row[1])
+                self._counters["disk"] += 1
+                return self._memory[key]
+        return None
+
+    def lookup(self, name: str) -> Tuple[float, float]:
+        """Return (lat, lon) for a place name, raising ValueError if it cannot be resolved."""
+        coords = self.lookup_cached(name)
+        if coords:
+            return coords
+        key = normalize_place(name)
+        with self._lock:
+            failed = self._conn.execute(
+                "SELECT failed_at FROM geocode_negative WHERE name = ?", (key,)
+            ).fetchone()
+            if failed and time.time() - failed[0] < self.negative_ttl_seconds:
+                self._counters["negative"] += 1
+                raise ValueError(f"Cannot resolve coordinates for '{name}'")
+
+        self.limiter.wait()
+        coords = geocode_nominatim(name)
+        with self._lock:
+            self._counters["network"] += 1
+            if coords is None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO geocode_negative (name, failed_at) VALUES (?, ?)", (key, time.time())
+                )
+                self._conn.commit()
+                raise ValueError(f"Cannot resolve coordinates for '{name}'")
+            self._memory[key] = coords
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (name, lat, lon, updated_at) VALUES (?, ?, ?, ?)",
+                (key, coords[0], coords[1], time.time()),
+            )
+            self._conn.execute("DELETE FROM geocode_negative WHERE name = ?", (key,))
+            self._conn.commit()
+        return coords
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many lookups each tier answered."""
+        with self._lock:
+            return dict(self._counters)
+
+# ==================== Process-wide Instance ====================
+_shared_store: Optional[GeocodeStore] = None
+_shared_lock = threading.Lock()
+
+def get_geocode_store() -> GeocodeStore:
+    """Return the shared store (path from TRAVEL_GEOCODE_DB, default in ~/.cache)."""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = GeocodeStore(database_path=os.environ.get("TRAVEL_GEOCODE_DB", DEFAULT_STORE_PATH))
+        return _shared_store
+
+def get_latlon(destination: str) -> str:
+    """Get latitude and longitude for a destination as a "lat,lon" string"""
+    lat, lon = get_geocode_store().lookup(destination)
+    return f"{lat},{lon}"
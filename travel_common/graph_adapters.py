@@ -0,0 +1,203 @@
+"""
+Uniform access to the two travel graphs for programmatic drivers.
+
+The console loops know each graph's state keys and interrupts by heart. The
+adapters here capture that knowledge once so that services and runners can
+drive either graph by name: build the initial state from a JSON request,
+apply feedback at whichever interrupt the thread is paused before, and
+summarize the state for clients. Graph modules are imported on first use,
+because importing them creates the LLM clients and checks the API keys.
+
+Thread ids are prefixed with the graph name (``travel_agent-<hex>``), so a
+session can be matched to its graph after a restart from the id alone.
+"""
+
+import importlib
+import os
+import sys
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Feedback that accepts the current proposal (the graphs' own "satisfied" words)
+APPROVALS = frozenset({"", "satisfied", "ok", "good", "yes", "no changes", "proceed", "continue", "next", "end", "finish"})
+
+def is_approval(feedback: Optional[str]) -> bool:
+    return (feedback or "").strip().lower() in APPROVALS
+
+def to_jsonable(value: Any) -> Any:
+    """Convert graph state (pydantic models, messages, tuples) into JSON-serializable data."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, BaseMessage):
+        return {"type": value.type, "name": value.name, "content": to_jsonable(value.content)}
+    if hasattr(value, "model_dump"):
+        return to_jsonable(value.model_dump())
+    return str(value)
+
+class GraphAdapter:
+    """Base class: how to start, resume and summarize one graph module."""
+
+    name = ""
+    module_dir = ""
+    module_name = ""
+    feedback_nodes: tuple = ()  # Interrupts that wait for human feedback
+
+    def __init__(self):
+        self._module: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def module(self) -> Any:
+        with self._lock:
+            if self._module is None:
+                # The graph modules import their siblings as top-level modules
+                module_path = os.path.join(REPO_ROOT, self.module_dir)
+                if module_path not in sys.path:
+                    sys.path.insert(0, module_path)
+                self._module = importlib.import_module(self.module_name)
+            return self._module
+
+    @property
+    def graph(self) -> Any:
+        return self.module.get_graph()
+
+    @property
+    def plan_nodes(self) -> tuple:
+        return tuple(self.module.PLAN_NODES)
+
+    def new_thread_id(self) -> str:
+        return f"{self.name}-{uuid.uuid4().hex}"
+
+    def config(self, thread_id: str) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": thread_id}}
+
+    def pending(self, thread_id: str) -> Optional[str]:
+        """The feedback node the thread is paused before, if any."""
+        snapshot = self.graph.get_state(self.config(thread_id))
+        return snapshot.next[0] if snapshot.next else None
+
+    def values(self, thread_id: str) -> Dict[str, Any]:
+        return self.graph.get_state(self.config(thread_id)).values or {}
+
+    def initial_state(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Initial graph state for a start request; raises ValueError for invalid input."""
+        raise NotImplementedError
+
+    def apply_feedback(self, thread_id: str, feedback: str) -> str:
+        """Record feedback at the pending interrupt and return that node; raises ValueError if none."""
+        raise NotImplementedError
+
+    def summary(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """The parts of the state a client needs to review the proposal or read the plan."""
+        raise NotImplementedError
+
+class TravelAgentAdapter(GraphAdapter):
+    """travel_agent/travel_agent_3.py: subtopics feedback, then plan feedback."""
+
+    name = "travel_agent"
+    module_dir = "travel_agent"
+    module_name = "travel_agent_3"
+    feedback_nodes = ("human_feedback_subtopics", "human_feedback_plan")
+
+    def initial_state(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        query = str(request.get("query") or "").strip()
+        video_file_path = request.get("video_file_path")
+        if video_file_path and not os.path.isfile(video_file_path):
+            raise ValueError(f"Video file not found: {video_file_path}")
+        if not query and not video_file_path:
+            raise ValueError("Either 'query' or 'video_file_path' is required")
+        _, initial_state, _ = self.module.run_travel_agent(query, video_file_path=video_file_path)
+        return initial_state
+
+    def apply_feedback(self, thread_id: str, feedback: str) -> str:
+        node = self.pending(thread_id)
+        # The graph only moves on for an explicit approval word; an empty reply means "ok"
+        feedback = feedback.strip() or "ok"
+        if node == "human_feedback_subtopics":
+            self.graph.update_state(self.config(thread_id), {"subtopics_feedback": feedback}, as_node=node)
+        elif node == "human_feedback_plan":
+            self.graph.update_state(self.config(thread_id), {"plan_feedback": feedback}, as_node=node)
+        else:
+            raise ValueError("Session is not waiting for feedback")
+        return node
+
+    def summary(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "locations": values.get("detected_locations", []),
+            "subtopics": values.get("subtopics", []),
+            "travel_plan": values.get("travel_plan", ""),
+        }
+
+class TravelAssistantAdapter(GraphAdapter):
+    """agengo_code/travel_assistant.py: traveler feedback, then dialogues and the plan."""
+
+    name = "travel_assistant"
+    module_dir = "agengo_code"
+    module_name = "travel_assistant"
+    feedback_nodes = ("human_feedback_traveler_node",)
+
+    def initial_state(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        city = str(request.get("city") or "").strip()
+        if not city:
+            raise ValueError("'city' is required")
+        try:
+            days = int(request.get("days", 3))
+            max_travelers = int(request.get("max_travelers", request.get("travelers", 1)))
+            max_num_turns = int(request.get("max_num_turns", 2))
+        except (TypeError, ValueError):
+            raise ValueError("'days', 'max_travelers' and 'max_num_turns' must be integers")
+        return {
+            "city": city,
+            "days": days,
+            "max_travelers": max_travelers,
+            "max_num_turns": max_num_turns,
+            "weather": [],
+            "human_feedback_traveler": "",
+            "human_feedback_plan": "",
+            "travelers": [],
+            "sections": [],
+            "content": "",
+            "final_plan": ""
+        }
+
+    def apply_feedback(self, thread_id: str, feedback: str) -> str:
+        node = self.pending(thread_id)
+        if node != "human_feedback_traveler_node":
+            raise ValueError("Session is not waiting for feedback")
+        # An approval clears the feedback so the router starts the dialogues
+        value = None if is_approval(feedback) else feedback
+        self.graph.update_state(self.config(thread_id), {"human_feedback_traveler": value}, as_node=node)
+        return node
+
+    def summary(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "city": values.get("city", ""),
+            "days": values.get("days"),
+            "travelers": to_jsonable(values.get("travelers", [])),
+            "final_plan": values.get("final_plan", ""),
+        }
+
+ADAPTERS: Dict[str, GraphAdapter] = {adapter.name: adapter for adapter in (TravelAgentAdapter(), TravelAssistantAdapter())}
+
+def get_adapter(name: str) -> GraphAdapter:
+    """Adapter by graph name; raises ValueError for unknown graphs."""
+    adapter = ADAPTERS.get(name)
+    if adapter is None:
+        raise ValueError(f"Unknown graph '{name}', expected one of: {', '.join(ADAPTERS)}")
+    return adapter
+
+def adapter_for_thread(thread_id: str) -> Optional[GraphAdapter]:
+    """The adapter whose graph created the thread id, if any."""
+    return ADAPTERS.get(thread_id.split("-", 1)[0])
+
+def graph_names() -> List[str]:
+    return list(ADAPTERS)
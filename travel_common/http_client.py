@@ -0,0 +1,228 @@
+"""
+Shared HTTP layer for Nominatim, OpenWeather and Tavily.
+
+All external calls go through one ``HttpClient``, which keeps a pooled
+keep-alive ``requests.Session`` per host, retries transient failures with
+jittered exponential backoff, applies per-host timeouts and records latency
+statistics for every request. Hooks registered with ``add_hook`` are called
+after every attempt, e.g. to export metrics.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ==================== Endpoints ====================
+NOMINATIM_API_URL = os.environ.get("NOMINATIM_API_URL", "https://nominatim.openstreetmap.org/search")
+OPENWEATHER_API_URL = os.environ.get("OPENWEATHER_API_URL", "https://api.openweathermap.org/data/2.5/forecast")
+TAVILY_API_URL = os.environ.get("TAVILY_API_URL", "https://api.tavily.com/search")
+USER_AGENT = "Travel-Agent"
+
+# (connect, read) timeouts in seconds per host; unknown hosts use DEFAULT_TIMEOUT
+DEFAULT_TIMEOUT: Tuple[float, float] = (3.05, 10.0)
+DEFAULT_HOST_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "nominatim.openstreetmap.org": (3.05, 10.0),
+    "api.openweathermap.org": (3.05, 8.0),
+    "api.tavily.com": (3.05, 20.0),
+}
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Called after every attempt as hook(host, method, status, seconds, error, retrying);
+# status is None when the request raised
+HttpHook = Callable[[str, str, Optional[int], float, Optional[Exception], bool], None]
+
+# ==================== Client ====================
+
+class HostStats:
+    """Rolling request statistics for a single host."""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+        }
+
+class HttpClient:
+    """Pooled, retrying HTTP client with per-host timeouts and latency stats."""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        pool_maxsize: int = 16,
+        host_timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_maxsize = pool_maxsize
+        self.host_timeouts = {**DEFAULT_HOST_TIMEOUTS, **(host_timeouts or {})}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, HostStats] = {}
+        self._hooks: List[HttpHook] = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: HttpHook) -> None:
+        """Register a callback run after every request attempt."""
+        with self._lock:
+            if hook not in self._hooks:
+                self._hooks.append(hook)
+
+    def _session(self, host: str) -> requests.Session:
+        """Return the keep-alive session for a host, creating it on first use."""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                self._sessions[host] = session
+                self._stats[host] = HostStats()
+            return session
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when present."""
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(float(response.headers["Retry-After"]), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, timeout: Optional[Any] = None, **kwargs: Any) -> requests.Response:
+        """Send a request, retrying connection errors, timeouts and 429/5xx responses."""
+        host = urlsplit(url).netloc
+        session = self._session(host)
+        stats = self._stats[host]
+        timeout = timeout or self.host_timeouts.get(host, DEFAULT_TIMEOUT)
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+                retryable = response.status_code in RETRY_STATUS_CODES
+                error: Optional[Exception] = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retryable, error = True, e
+            elapsed = time.perf_counter() - start
+            retrying = retryable and attempt < self.max_retries
+            with self._lock:
+                stats.requests += 1
+                stats.latencies.append(elapsed)
+                if error is not None or response.status_code >= 400:
+                    stats.errors += 1
+                if retrying:
+                    stats.retries += 1
+                hooks = list(self._hooks)
+            for hook in hooks:
+                try:
+                    hook(host, method, None if response is None else response.status_code, elapsed, error, retrying)
+                except Exception as e:
+                    print(f"HTTP hook failed: {e}")
+            if not retryable or attempt == self.max_retries:
+                if error is not None:
+                    raise error
+                return response
+            time.sleep(self._backoff(attempt, response))
+        raise RuntimeError("unreachable")
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-host request counts, errors, retries and latency percentiles."""
+        with self._lock:
+            return {host: stats.summary() for host, stats in self._stats.items()}
+
+_shared_client: Optional[HttpClient] = None
+_shared_lock = threading.Lock()
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient(max_retries=int(os.environ.get("TRAVEL_HTTP_RETRIES", "3")))
+        return _shared_client
+
+# ==================== Service Helpers ====================
+
+def geocode_nominatim(destination: str) -> Optional[Tuple[float, float]]:
+    """Query OpenStreetMap Nominatim; returns None when the name does not resolve"""
+    resp = get_http_client().get(
+        NOMINATIM_API_URL,
+        params={"q": destination, "format": "json", "limit": 1},
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    if not data:
+        return None
+    return float(data[0]["lat"]), float(data[0]["lon"])
+
+def fetch_forecast(params: Dict[str, Any], api_key: str) -> List[Dict]:
+    """Fetch the raw 5-day/3-hour forecast list from OpenWeather"""
+    resp = get_http_client().get(
+        OPENWEATHER_API_URL,
+        params={
+            **params,
+            "appid": api_key,
+            "units": "metric",
+            "lang": "en",
+        },
+    )
+    resp.raise_for_status()
+    return resp.json()["list"]
+
+def search_tavily(query: str, api_key: str, max_results: int = 5) -> List[Dict[str, str]]:
+    """Search the web with Tavily and return title/content/url records"""
+    resp = get_http_client().post(
+        TAVILY_API_URL,
+        json={
+            "api_key": api_key,
+            "query": query,
+            "search_depth": "basic",
+            "max_results": max_results,
+        },
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    return [
+        {
+            "title": result.get("title", ""),
+            "content": result.get("content", ""),
+            "url": result.get("url", ""),
+        }
+        for result in data.get("results", [])
+    ]
+
+def search_tavily_json(query: str, api_key: str, max_results: int = 5) -> str:
+    """Search the web with Tavily and return the results as a JSON string"""
+    return json.dumps(search_tavily(query, api_key, max_results), ensure_ascii=False, indent=2)
@@ -0,0 +1,208 @@
+"""
+Disk-backed LLM response cache shared by both travel graphs.
+
+The cache plugs into LangChain's ``BaseCache`` hook, so every ``llm.invoke``
+(including ``with_structured_output`` calls) is looked up before a request is
+sent to the provider. Entries are keyed on the model/parameter string and the
+normalized message list, stored in SQLite, expire after a TTL and are evicted
+least-recently-used once the size limits are reached.
+
+Caching is opt-in: set ``TRAVEL_LLM_CACHE`` to a SQLite file path (or to ``1``
+for the default location) before the graph modules are imported.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+# ==================== Configuration ====================
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "travel_agent", "llm_cache.sqlite")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Message fields that change between otherwise identical runs (ids, token
+# usage, provider fingerprints) and must not take part in the cache key.
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata", "additional_kwargs")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# ==================== Key Normalization ====================
+
+def _normalize_message(message: Any) -> Any:
+    """Strip volatile fields and collapse whitespace in a serialized message."""
+    if not isinstance(message, dict):
+        return message
+    kwargs = dict(message.get("kwargs", {}))
+    for field in _VOLATILE_MESSAGE_FIELDS:
+        kwargs.pop(field, None)
+    content = kwargs.get("content")
+    if isinstance(content, str):
+        kwargs["content"] = _WHITESPACE_RE.sub(" ", content).strip()
+    if kwargs.get("tool_calls"):
+        kwargs["tool_calls"] = [
+            {k: v for k, v in call.items() if k != "id"} for call in kwargs["tool_calls"]
+        ]
+    return {"id": message.get("id"), "kwargs": kwargs}
+
+def normalize_prompt(prompt: str) -> str:
+    """Return a canonical form of a serialized message list."""
+    try:
+        messages = json.loads(prompt)
+    except (TypeError, ValueError):
+        return _WHITESPACE_RE.sub(" ", prompt).strip()
+    if not isinstance(messages, list):
+        messages = [messages]
+    return json.dumps([_normalize_message(m) for m in messages], sort_keys=True, ensure_ascii=False)
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Hash the model/parameter string together with the normalized prompt."""
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(normalize_prompt(prompt).encode("utf-8"))
+    return digest.hexdigest()
+
+# ==================== SQLite Cache ====================
+
+class SQLiteLLMCache(BaseCache):
+    """LangChain cache backed by a single SQLite table with TTL and LRU eviction."""
+
+    def __init__(
+        self,
+        database_path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        if database_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(database_path)), exist_ok=True)
+        self.database_path = database_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "writes": 0}
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Any]]:
+        """Return cached generations, or None on a miss or an expired entry."""
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+            response, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._counters["hits"] += 1
+        try:
+            return [loads(item) for item in json.loads(response)]
+        except Exception:
+            # Entries written by an incompatible LangChain version are treated as misses
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Any]) -> None:
+        """Store generations for a prompt and evict old entries if over budget."""
+        key = cache_key(prompt, llm_string)
+        response = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, response, len(response), now, now),
+            )
+            self._counters["writes"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """Remove every cached entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least-recently-used ones until within limits."""
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._counters["expired"] += max(cursor.rowcount, 0)
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY accessed_at ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (row[0],))
+            self._counters["evictions"] += 1
+            count -= 1
+            total -= row[1]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size of the cache."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "entries": count,
+            "bytes": total,
+            "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+        })
+        return stats
+
+# ==================== Process-wide Instance ====================
+_shared_cache: Optional[SQLiteLLMCache] = None
+_shared_lock = threading.Lock()
+
+def get_llm_cache() -> Optional[SQLiteLLMCache]:
+    """Return the shared cache if enabled via TRAVEL_LLM_CACHE, otherwise None."""
+    global _shared_cache
+    setting = os.environ.get("TRAVEL_LLM_CACHE", "").strip()
+    if not setting or setting.lower() in ("0", "false", "no", "off"):
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            path = DEFAULT_CACHE_PATH if setting.lower() in ("1", "true", "yes", "on") else setting
+            _shared_cache = SQLiteLLMCache(
+                database_path=path,
+                ttl_seconds=float(os.environ.get("TRAVEL_LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                max_entries=int(os.environ.get("TRAVEL_LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                max_bytes=int(os.environ.get("TRAVEL_LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            )
+        return _shared_cache
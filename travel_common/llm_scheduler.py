@@ -0,0 +1,301 @@
+"""
+Process-wide request- and token-rate scheduler for OpenAI chat calls.
+
+Every call through ``ScheduledChatOpenAI`` first estimates its token cost
+(prompt tokens counted with tiktoken plus the expected completion) and then
+waits for room in two token buckets, one for requests per minute and one for
+tokens per minute, so the fan-outs stay under the provider's limits instead
+of tripping 429s. Waiting calls are granted round-robin across sessions
+(LangGraph thread ids), so one large fan-out cannot starve other sessions.
+Once a response arrives (or a stream ends), the estimate is corrected with the
+reported usage, or with a count of the streamed text when none is reported;
+failed calls give their estimate back.
+
+Scheduling is opt-in: limits differ per account tier, so calls are only
+scheduled for a bucket whose ``TRAVEL_LLM_RPM`` or ``TRAVEL_LLM_TPM`` is set.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+
+# ==================== Configuration ====================
+# Limits of the account's tier (GPT-4o tier 1 is 500 and 30000); unset or 0 disables that bucket
+DEFAULT_RPM = int(os.environ.get("TRAVEL_LLM_RPM", "0"))
+DEFAULT_TPM = int(os.environ.get("TRAVEL_LLM_TPM", "0"))
+DEFAULT_COMPLETION_TOKENS = 1024  # Expected output when max_tokens is not set
+DEFAULT_SESSION = "default"
+
+# ==================== Token Buckets ====================
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over a minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if they are available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Return (positive) or charge (negative) units after the real cost is known."""
+        self.level = min(self.capacity, self.level + amount)
+
+class _Ticket:
+    __slots__ = ("tokens", "session")
+
+    def __init__(self, tokens: int, session: str):
+        self.tokens = tokens
+        self.session = session
+
+# ==================== Scheduler ====================
+
+class LLMScheduler:
+    """Admits LLM calls under RPM/TPM limits, serving sessions round-robin."""
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._cond = threading.Condition()
+        self._queues: "OrderedDict[str, Deque[_Ticket]]" = OrderedDict()
+        self._counters = {"granted": 0, "waited": 0, "wait_seconds": 0.0, "estimated_tokens": 0, "used_tokens": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    def _head(self) -> Optional[_Ticket]:
+        """The next ticket to admit: the oldest call of the session at the front of the rotation."""
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+
+    def _delay(self, tokens: int, now: float) -> float:
+        delays = [0.0]
+        if self.requests is not None:
+            delays.append(self.requests.delay(1, now))
+        if self.tokens is not None:
+            delays.append(self.tokens.delay(tokens, now))
+        return max(delays)
+
+    def acquire(self, tokens: int, session: Optional[str] = None) -> float:
+        """Block until the call may be sent; returns the time spent waiting."""
+        ticket = _Ticket(tokens, session or DEFAULT_SESSION)
+        start = time.monotonic()
+        with self._cond:
+            self._queues.setdefault(ticket.session, deque()).append(ticket)
+            while True:
+                if self._head() is ticket:
+                    delay = self._delay(tokens, time.monotonic())
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+            # Round-robin: the served session moves to the back of the rotation
+            queue = self._queues.pop(ticket.session)
+            queue.popleft()
+            if queue:
+                self._queues[ticket.session] = queue
+            waited = time.monotonic() - start
+            self._counters["granted"] += 1
+            self._counters["estimated_tokens"] += tokens
+            if waited > 0.001:
+                self._counters["waited"] += 1
+                self._counters["wait_seconds"] += waited
+            self._cond.notify_all()
+        return waited
+
+    def settle(self, estimated: int, used: Optional[int]) -> None:
+        """Correct the token bucket with the usage reported by the API."""
+        if used is None:
+            return
+        with self._cond:
+            self._counters["used_tokens"] += used
+            if self.tokens is not None:
+                self.tokens.adjust(estimated - used)
+            self._cond.notify_all()
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Waiting calls per session."""
+        with self._cond:
+            return {session: len(queue) for session, queue in self._queues.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._counters)
+            stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+            stats["queued"] = sum(len(queue) for queue in self._queues.values())
+        return stats
+
+_schedulers: Dict[str, LLMScheduler] = {}
+_shared_lock = threading.Lock()
+
+def get_llm_scheduler(model: str = "gpt-4o") -> LLMScheduler:
+    """Return the process-wide scheduler for a model (limits are enforced per model)."""
+    with _shared_lock:
+        scheduler = _schedulers.get(model)
+        if scheduler is None:
+            scheduler = _schedulers[model] = LLMScheduler()
+        return scheduler
+
+# ==================== Chat Model ====================
+
+def _session_of(run_manager: Any) -> Optional[str]:
+    """LangGraph copies the configurable thread_id into the callback metadata."""
+    metadata = getattr(run_manager, "metadata", None) or {}
+    thread_id = metadata.get("thread_id")
+    return str(thread_id) if thread_id is not None else None
+
+def _usage_of(result: ChatResult) -> Optional[int]:
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    return usage.get("total_tokens")
+
+def _chunk_usage(chunk: ChatGenerationChunk) -> Optional[int]:
+    """Tokens reported on a streamed chunk (OpenAI sends them on the last one when stream_usage is on)."""
+    usage = getattr(chunk.message, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+class ScheduledChatOpenAI(ChatOpenAI):
+    """ChatOpenAI that waits for the shared rate scheduler before each API call."""
+
+    def _prompt_tokens(self, messages: List[BaseMessage]) -> int:
+        try:
+            return self.get_num_tokens_from_messages(messages)
+        except Exception:
+            # tiktoken unavailable or unknown model: roughly four characters per token
+            return sum(len(str(m.content)) for m in messages) // 4
+
+    def _estimate_tokens(self, messages: List[BaseMessage]) -> int:
+        return self._prompt_tokens(messages) + (self.max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+    def _streamed_tokens(self, messages: List[BaseMessage], text: str, reported: Optional[int]) -> int:
+        """Usage of a finished stream: the reported total, else the prompt plus the streamed text."""
+        if reported is not None:
+            return reported
+        try:
+            completion_tokens = self.get_num_tokens(text)
+        except Exception:
+            completion_tokens = len(text) // 4
+        return self._prompt_tokens(messages) + completion_tokens
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        scheduler = get_llm_scheduler(self.model_name)
+        if self.streaming or not scheduler.enabled:
+            # ChatOpenAI serves streaming=True through _stream, which is already scheduled
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        estimate = self._estimate_tokens(messages)
+        scheduler.acquire(estimate, _session_of(run_manager))
+        used: Optional[int] = 0  # A failed call gives its estimate back
+        try:
+            result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            used = _usage_of(result)
+            return result
+        finally:
+            scheduler.settle(estimate, used)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        scheduler = get_llm_scheduler(self.model_name)
+        if not scheduler.enabled:
+            yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return
+        estimate = self._estimate_tokens(messages)
+        scheduler.acquire(estimate, _session_of(run_manager))
+        text: List[str] = []
+        reported: Optional[int] = None
+        try:
+            for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                text.append(chunk.text)
+                if (usage := _chunk_usage(chunk)) is not None:
+                    reported = (reported or 0) + usage
+                yield chunk
+        finally:
+            # Also settles streams that fail or are abandoned part-way
+            scheduler.settle(estimate, self._streamed_tokens(messages, "".join(text), reported))
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        import asyncio
+
+        scheduler = get_llm_scheduler(self.model_name)
+        if self.streaming or not scheduler.enabled:
+            # ChatOpenAI serves streaming=True through _astream, which is already scheduled
+            return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        estimate = self._estimate_tokens(messages)
+        await asyncio.get_running_loop().run_in_executor(None, scheduler.acquire, estimate, _session_of(run_manager))
+        used: Optional[int] = 0
+        try:
+            result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            used = _usage_of(result)
+            return result
+        finally:
+            scheduler.settle(estimate, used)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        import asyncio
+
+        scheduler = get_llm_scheduler(self.model_name)
+        if not scheduler.enabled:
+            async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
+            return
+        estimate = self._estimate_tokens(messages)
+        await asyncio.get_running_loop().run_in_executor(None, scheduler.acquire, estimate, _session_of(run_manager))
+        text: List[str] = []
+        reported: Optional[int] = None
+        try:
+            async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                text.append(chunk.text)
+                if (usage := _chunk_usage(chunk)) is not None:
+                    reported = (reported or 0) + usage
+                yield chunk
+        finally:
+            scheduler.settle(estimate, self._streamed_tokens(messages, "".join(text), reported))
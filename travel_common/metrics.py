@@ -0,0 +1,344 @@
+"""
+Local, offline metrics for both travel graphs.
+
+``instrument_graph`` attaches a LangChain callback handler to a compiled graph
+(through ``graph.with_config``) and registers a hook on the shared
+``HttpClient``. Together they record:
+
+* per-node wall time and errors (dialogue subgraph nodes are named
+  ``conduct_dialogue_sub/ask_question``),
+* LLM calls, prompt and completion tokens and estimated cost per model and
+  node (usage reported by the API, otherwise about four characters per token),
+* HTTP latency, errors and retries per host.
+
+Everything is kept in the process-wide ``Metrics`` registry, which renders
+the Prometheus text format. It is served by the HTTP service at ``/metrics``,
+by a standalone endpoint when ``TRAVEL_METRICS_PORT`` is set, and every
+observation can also be appended to a JSONL file named by
+``TRAVEL_METRICS_JSONL``. Set ``TRAVEL_METRICS=0`` to disable instrumentation.
+"""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# ==================== Configuration ====================
+# USD per million (prompt, completion) tokens; override with TRAVEL_LLM_PRICES='{"model": [in, out]}'
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+METRICS: Dict[str, Tuple[str, str]] = {
+    "travel_node_duration_seconds": ("histogram", "Wall time of graph node runs"),
+    "travel_node_errors_total": ("counter", "Graph node runs that raised"),
+    "travel_llm_calls_total": ("counter", "Chat model calls"),
+    "travel_llm_errors_total": ("counter", "Chat model calls that raised"),
+    "travel_llm_duration_seconds": ("histogram", "Wall time of chat model calls"),
+    "travel_llm_tokens_total": ("counter", "Prompt and completion tokens"),
+    "travel_llm_cost_usd_total": ("counter", "Estimated chat model cost in USD"),
+    "travel_http_request_duration_seconds": ("histogram", "Wall time of HTTP request attempts"),
+    "travel_http_errors_total": ("counter", "HTTP attempts that raised or returned 4xx/5xx"),
+    "travel_http_retries_total": ("counter", "HTTP attempts that were retried"),
+}
+
+def metrics_enabled() -> bool:
+    return os.environ.get("TRAVEL_METRICS", "1").lower() not in ("0", "false", "no", "off")
+
+def load_prices() -> Dict[str, Tuple[float, float]]:
+    prices = dict(DEFAULT_PRICES)
+    override = os.environ.get("TRAVEL_LLM_PRICES")
+    if override:
+        try:
+            prices.update({model: (float(p[0]), float(p[1])) for model, p in json.loads(override).items()})
+        except (ValueError, TypeError, IndexError, AttributeError) as e:
+            print(f"Ignoring invalid TRAVEL_LLM_PRICES: {e}")
+    return prices
+
+# ==================== Registry ====================
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+class Metrics:
+    """Thread-safe counters and histograms, with an optional JSONL event sink."""
+
+    def __init__(self, jsonl_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.prices = load_prices()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._handlers: Dict[str, "MetricsCallbackHandler"] = {}
+        self._lock = threading.Lock()
+        self._sink_lock = threading.Lock()
+
+    def inc(self, name: str, labels: Dict[str, Any], amount: float = 1.0) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _labels(labels)
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, labels: Dict[str, Any], value: float) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(_labels(labels))
+            if histogram is None:
+                histogram = series[_labels(labels)] = Histogram()
+            histogram.observe(value)
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        """Append one observation to the JSONL sink, if configured."""
+        if not self.jsonl_path:
+            return
+        line = json.dumps({"ts": round(time.time(), 3), **event}, ensure_ascii=False, default=str)
+        with self._sink_lock:
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        # Dated model names ("gpt-4o-2024-08-06") use the price of their family
+        family = max((name for name in self.prices if model.startswith(name)), key=len, default=None)
+        if family is None:
+            return 0.0
+        prompt_price, completion_price = self.prices[family]
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def handler(self, graph_name: str) -> "MetricsCallbackHandler":
+        """One handler per graph, so a subgraph attached to the same name is not counted twice."""
+        with self._lock:
+            handler = self._handlers.get(graph_name)
+            if handler is None:
+                handler = self._handlers[graph_name] = MetricsCallbackHandler(self, graph_name)
+            return handler
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters and histogram count/sum as plain data."""
+        with self._lock:
+            counters = {name: [{**dict(labels), "value": value} for labels, value in series.items()] for name, series in self._counters.items()}
+            histograms = {name: [{**dict(labels), "count": h.count, "sum": round(h.sum, 6)} for labels, h in series.items()] for name, series in self._histograms.items()}
+        return {"counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        """All series in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, help_text) in METRICS.items():
+                series = self._histograms.get(name) if kind == "histogram" else self._counters.get(name)
+                if not series:
+                    continue
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for labels, value in sorted(series.items()):
+                    if kind == "counter":
+                        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                        continue
+                    for bound, count in zip(value.buckets, value.counts):
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {value.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {value.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+    # ==================== HTTP Hook ====================
+
+    def http_hook(self, host: str, method: str, status: Optional[int], seconds: float, error: Optional[Exception], retrying: bool) -> None:
+        labels = {"host": host}
+        self.observe("travel_http_request_duration_seconds", labels, seconds)
+        failed = error is not None or (status is not None and status >= 400)
+        if failed:
+            self.inc("travel_http_errors_total", labels)
+        if retrying:
+            self.inc("travel_http_retries_total", labels)
+        self.emit({"kind": "http", "host": host, "method": method, "status": status, "seconds": round(seconds, 4),
+                   "error": f"{type(error).__name__}: {error}" if error is not None else None, "retrying": retrying})
+
+# ==================== Callback Handler ====================
+
+def node_path(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Node name from LangGraph's run metadata, prefixed by its parent nodes in subgraphs."""
+    metadata = metadata or {}
+    node = metadata.get("langgraph_node")
+    if node is None:
+        return None
+    namespace = str(metadata.get("langgraph_checkpoint_ns") or "")
+    parents = [part.split(":")[0] for part in namespace.split("|")[:-1] if part]
+    return "/".join(parents + [str(node)])
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records node and chat model runs of one graph into a ``Metrics`` registry."""
+
+    def __init__(self, metrics: Metrics, graph_name: str):
+        self.metrics = metrics
+        self.graph_name = graph_name
+        self._runs: Dict[UUID, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, labels: Dict[str, Any]) -> None:
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), labels)
+
+    def _finish(self, run_id: UUID) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            started = self._runs.pop(run_id, None)
+        if started is None:
+            return None
+        return time.perf_counter() - started[0], started[1]
+
+    # Graph nodes are the chain runs named after the node LangGraph reports in their metadata
+    def on_chain_start(self, serialized: Optional[Dict[str, Any]], inputs: Any, *, run_id: UUID, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        if metadata and kwargs.get("name") == metadata.get("langgraph_node"):
+            self._start(run_id, {"kind": "node", "graph": self.graph_name, "node": node_path(metadata),
+                                 "thread_id": metadata.get("thread_id")})
+
+    def _end_node(self, run_id: UUID, error: Optional[BaseException]) -> None:
+        finished = self._finish(run_id)
+        if finished is None:
+            return
+        seconds, run = finished
+        labels = {"graph": run["graph"], "node": run["node"]}
+        self.metrics.observe("travel_node_duration_seconds", labels, seconds)
+        if error is not None:
+            self.metrics.inc("travel_node_errors_total", labels)
+        self.metrics.emit({**run, "seconds": round(seconds, 4), "error": f"{type(error).__name__}: {error}" if error is not None else None})
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_node(run_id, None)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_node(run_id, error)
+
+    def on_chat_model_start(self, serialized: Optional[Dict[str, Any]], messages: List[List[Any]], *, run_id: UUID, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = (metadata or {}).get("ls_model_name") or params.get("model_name") or params.get("model") or params.get("_type", "unknown")
+        prompt = "".join(str(getattr(message, "content", message)) for batch in messages for message in batch)
+        self._start(run_id, {"kind": "llm", "graph": self.graph_name, "node": node_path(metadata) or "",
+                             "model": str(model), "thread_id": (metadata or {}).get("thread_id"),
+                             "prompt_estimate": _estimate_tokens(prompt)})
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        finished = self._finish(run_id)
+        if finished is None:
+            return
+        seconds, run = finished
+        prompt_tokens, completion_tokens, estimated = self._usage(response, run["prompt_estimate"])
+        labels = {"graph": run["graph"], "node": run["node"], "model": run["model"]}
+        cost = self.metrics.cost(run["model"], prompt_tokens, completion_tokens)
+        self.metrics.inc("travel_llm_calls_total", labels)
+        self.metrics.observe("travel_llm_duration_seconds", {"model": run["model"]}, seconds)
+        self.metrics.inc("travel_llm_tokens_total", {**labels, "type": "prompt"}, prompt_tokens)
+        self.metrics.inc("travel_llm_tokens_total", {**labels, "type": "completion"}, completion_tokens)
+        self.metrics.inc("travel_llm_cost_usd_total", labels, cost)
+        self.metrics.emit({"kind": "llm", "graph": run["graph"], "node": run["node"], "model": run["model"], "thread_id": run["thread_id"],
+                           "seconds": round(seconds, 4), "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                           "estimated_tokens": estimated, "cost_usd": round(cost, 6)})
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        finished = self._finish(run_id)
+        if finished is None:
+            return
+        seconds, run = finished
+        self.metrics.inc("travel_llm_errors_total", {"graph": run["graph"], "node": run["node"], "model": run["model"]})
+        self.metrics.emit({"kind": "llm", "graph": run["graph"], "node": run["node"], "model": run["model"], "thread_id": run["thread_id"],
+                           "seconds": round(seconds, 4), "error": f"{type(error).__name__}: {error}"})
+
+    @staticmethod
+    def _usage(response: LLMResult, prompt_estimate: int) -> Tuple[int, int, bool]:
+        """(prompt, completion, estimated) tokens: API usage when reported, otherwise a length estimate."""
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage.get("prompt_tokens") is not None:
+            return int(usage["prompt_tokens"]), int(usage.get("completion_tokens") or 0), False
+        generations = [generation for batch in response.generations for generation in batch]
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return int(metadata.get("input_tokens", 0)), int(metadata.get("output_tokens", 0)), False
+        # Streamed responses carry no usage unless stream_usage is enabled
+        return prompt_estimate, sum(_estimate_tokens(generation.text) for generation in generations), True
+
+# ==================== Endpoint ====================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = get_metrics().render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a background thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="travel-metrics", daemon=True).start()
+    return server
+
+# ==================== Shared Registry ====================
+
+_shared_metrics: Optional[Metrics] = None
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_shared_lock = threading.Lock()
+
+def get_metrics() -> Metrics:
+    """Return the process-wide registry, hooked into the shared HTTP client."""
+    global _shared_metrics, _metrics_server
+    with _shared_lock:
+        if _shared_metrics is None:
+            from travel_common.http_client import get_http_client
+
+            _shared_metrics = Metrics(jsonl_path=os.environ.get("TRAVEL_METRICS_JSONL") or None)
+            get_http_client().add_hook(_shared_metrics.http_hook)
+            port = os.environ.get("TRAVEL_METRICS_PORT")
+            if port:
+                try:
+                    _metrics_server = serve_metrics(int(port))
+                except (OSError, ValueError) as e:
+                    print(f"Metrics endpoint not started on port {port}: {e}")
+        return _shared_metrics
+
+def instrument_graph(graph: Any, graph_name: str) -> Any:
+    """Return the compiled graph with the metrics handler attached to every run."""
+    if not metrics_enabled():
+        return graph
+    return graph.with_config(callbacks=[get_metrics().handler(graph_name)])
@@ -0,0 +1,211 @@
+"""
+Offline destination extraction over the bundled gazetteer.
+
+All city and country names and aliases (including non-English names) are
+compiled into Aho-Corasick automata, so one pass over the text finds every
+mention regardless of how many names are indexed. Matches in alphabetic
+scripts must sit on word boundaries; CJK and Hangul names match anywhere, as
+those scripts do not separate words with spaces.
+
+The result is flagged ambiguous when the text needs a human-level reading:
+no city or several cities were found, a city shares its name with places
+elsewhere, a city is qualified by a region the gazetteer does not know
+("London, Ontario", "Paris, Texas"), a country is mentioned without any of
+its cities, or the text talks about origins, past trips or places to avoid
+("from", "live in", "not", "last year"). Callers then fall back to the LLM.
+"""
+
+import json
+import re
+import threading
+import unicodedata
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from travel_common.geocode_store import GAZETTEER_PATH
+
+# Aliases that are also everyday words; only a capitalized mention counts as a place
+COMMON_WORDS = frozenset({"nice", "soul"})
+# Phrases that make a mentioned city an origin, a past trip or a place to avoid
+NON_DESTINATION_RE = re.compile(
+    r"\b(?:from|not|never|except|without|avoid|skip|instead of|rather than|other than|anywhere but|live in|living in|lived in|based in|"
+    r"home|back in|was in|were in|been to|went to|visited|last (?:year|month|week|summer|winter|time)|ago)\b"
+    r"|n't\b",
+    re.IGNORECASE,
+)
+# ", Ontario" or ", TX" after a city names the region it is in
+QUALIFIER_RE = re.compile(r"\s*,\s*(?=[A-Z][\w.'-])")
+
+def _fold(text: str) -> str:
+    """Lower-case and unify whitespace without changing the string length."""
+    return "".join(
+        " " if ch.isspace() else (low if len(low := ch.lower()) == 1 else ch)
+        for ch in unicodedata.normalize("NFC", text)
+    )
+
+def _is_word_char(ch: str) -> bool:
+    """Characters of space-separated scripts; CJK and Hangul start at U+2E80."""
+    return ch.isalnum() and ord(ch) < 0x2E80
+
+class Place(NamedTuple):
+    kind: str  # "city" or "country"
+    name: str
+    country: str
+    ambiguous: bool
+
+class PlaceMatches(NamedTuple):
+    cities: List[str]
+    countries: List[str]
+    ambiguous: bool
+
+# ==================== Aho-Corasick Automaton ====================
+
+class AhoCorasick:
+    """Multi-pattern string matcher; returns (start, end, value) for every occurrence."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, object]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, value: object) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), value))
+        self._built = False
+
+    def build(self) -> None:
+        """Compute failure links breadth-first and merge the outputs along them."""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+
+    def find_all(self, text: str) -> List[Tuple[int, int, object]]:
+        if not self._built:
+            self.build()
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, value in self._out[state]:
+                matches.append((i + 1 - length, i + 1, value))
+        return matches
+
+# ==================== Extractor ====================
+
+class PlaceExtractor:
+    """Find gazetteer cities and countries mentioned in free text."""
+
+    def __init__(self, gazetteer_path: str = GAZETTEER_PATH):
+        with open(gazetteer_path, encoding="utf-8") as f:
+            data = json.load(f)
+        # Folded names match case-insensitively; all-caps abbreviations (LA, NYC) only in capitals
+        self.folded = AhoCorasick()
+        self.exact = AhoCorasick()
+        seen: Dict[str, Place] = {}
+        # Cities first so a name shared with a country (Singapore) resolves to the city
+        entries = [("city", city, city["country"]) for city in data["cities"]]
+        entries += [("country", country, country["code"]) for country in data.get("countries", [])]
+        for kind, entry, country in entries:
+            place = Place(kind, entry["name"], country, bool(entry.get("ambiguous")))
+            for name in [entry["name"]] + entry.get("aliases", []):
+                abbreviation = name.isupper() and name.isascii()
+                key = name if abbreviation else _fold(name)
+                if key not in seen:
+                    seen[key] = place
+                    (self.exact if abbreviation else self.folded).add(key, place)
+        self.folded.build()
+        self.exact.build()
+
+    def extract(self, text: str) -> PlaceMatches:
+        original = unicodedata.normalize("NFC", text)
+        folded = _fold(original)
+        candidates = []
+        for automaton, haystack in ((self.folded, folded), (self.exact, original)):
+            for start, end, place in automaton.find_all(haystack):
+                if _is_word_char(haystack[start]) and start > 0 and _is_word_char(haystack[start - 1]):
+                    continue
+                if _is_word_char(haystack[end - 1]) and end < len(haystack) and _is_word_char(haystack[end]):
+                    continue
+                candidates.append((start, end, place))
+
+        # Leftmost-longest, non-overlapping ("New York" wins over "York")
+        candidates.sort(key=lambda m: (m[0], m[0] - m[1]))
+        cities: List[str] = []
+        countries: List[str] = []
+        city_countries = set()
+        country_codes = set()
+        ambiguous = False
+        position = 0
+        accepted: Dict[int, Place] = {}
+        qualified: List[Tuple[int, Place]] = []
+        for start, end, place in candidates:
+            if start < position:
+                continue
+            position = end
+            surface = original[start:end]
+            if folded[start:end] in COMMON_WORDS and not surface[:1].isupper():
+                continue
+            accepted[start] = place
+            if place.kind == "city":
+                qualifier = QUALIFIER_RE.match(original, end)
+                if qualifier:
+                    qualified.append((qualifier.end(), place))
+                if place.name not in cities:
+                    cities.append(place.name)
+                city_countries.add(place.country)
+                ambiguous = ambiguous or place.ambiguous or folded[start:end] in COMMON_WORDS
+            else:
+                if place.name not in countries:
+                    countries.append(place.name)
+                country_codes.add(place.country)
+
+        # A qualifier is fine when it is another listed city or the city's own country
+        # ("Paris, France"); an unknown region points at a namesake elsewhere
+        for qualifier_start, city in qualified:
+            region = accepted.get(qualifier_start)
+            if region is None or (region.kind == "country" and region.country != city.country):
+                ambiguous = True
+
+        # A country without any of its cities suggests a destination the gazetteer lacks;
+        # several cities or an origin, past-trip or negation cue need a reading of the sentence
+        if len(cities) != 1 or country_codes - city_countries or NON_DESTINATION_RE.search(folded):
+            ambiguous = True
+        return PlaceMatches(cities, countries, ambiguous)
+
+_shared_extractor: Optional[PlaceExtractor] = None
+_shared_lock = threading.Lock()
+
+def get_place_extractor() -> PlaceExtractor:
+    """Return the process-wide extractor, building the automaton on first use."""
+    global _shared_extractor
+    with _shared_lock:
+        if _shared_extractor is None:
+            _shared_extractor = PlaceExtractor()
+        return _shared_extractor
+
+def extract_destinations(text: str) -> Optional[List[str]]:
+    """Cities mentioned in the text (user request or speech transcript), or None when the LLM should decide."""
+    matches = get_place_extractor().extract(text)
+    return None if matches.ambiguous else matches.cities
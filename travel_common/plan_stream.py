@@ -0,0 +1,60 @@
+"""
+Token streaming for the plan-writing graph nodes.
+
+``stream_with_tokens`` runs a compiled LangGraph graph with the ``messages``
+stream mode next to the usual ``updates``/``values`` mode and interleaves the
+LLM tokens of selected nodes with the regular events, so callers can show the
+plan while it is being written. The checkpointed state still receives the
+complete text from the node itself.
+"""
+
+import sys
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+def stream_with_tokens(
+    graph: Any,
+    inputs: Any,
+    config: Any,
+    token_nodes: Iterable[str],
+    stream_mode: str = "updates",
+) -> Iterator[Tuple[str, Any]]:
+    """Yield ("token", (node, text)) for LLM output of token_nodes and (stream_mode, event) otherwise."""
+    token_nodes = set(token_nodes)
+    for mode, payload in graph.stream(inputs, config, stream_mode=[stream_mode, "messages"]):
+        if mode != "messages":
+            yield mode, payload
+            continue
+        message, metadata = payload
+        content = getattr(message, "content", None)
+        if metadata.get("langgraph_node") in token_nodes and isinstance(content, str) and content:
+            yield "token", (metadata["langgraph_node"], content)
+
+class ConsoleTokenPrinter:
+    """Echo streamed tokens to the console and remember what each node showed."""
+
+    def __init__(self, out: Optional[TextIO] = None):
+        self.out = out or sys.stdout
+        self.streamed: Dict[str, str] = {}
+        self._current: Optional[str] = None
+
+    def __call__(self, node: str, text: str) -> None:
+        if self._current != node:
+            self.finish()
+            self._current = node
+        self.streamed[node] = self.streamed.get(node, "") + text
+        self.out.write(text)
+        self.out.flush()
+
+    def finish(self) -> None:
+        """End the current streamed block with a newline."""
+        if self._current is not None:
+            self.out.write("\n")
+            self.out.flush()
+            self._current = None
+
+    def shown(self, node: str, text: Optional[str] = None) -> bool:
+        """True if the node's tokens (all of `text`, when given) already reached the console."""
+        if node not in self.streamed:
+            return False
+        # A node that revises part of the plan streams only that part
+        return text is None or self.streamed[node].strip() == text.strip()
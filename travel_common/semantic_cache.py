@@ -0,0 +1,187 @@
+"""
+Similarity cache for retrieval calls (Tavily and Wikipedia).
+
+Queries are turned into sparse hashed vectors (word unigrams plus character
+trigrams) on the CPU, and a lookup returns the stored result of the closest
+cached query when the cosine similarity reaches the threshold. Word order is
+ignored, so "best restaurants in Tokyo" and "Tokyo best restaurants" share an
+entry. Entries are partitioned by namespace (the retrieval backend) and an
+optional scope such as the destination city, so a query about Osaka never
+reuses results for Tokyo.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# ==================== Configuration ====================
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 2000
+HASH_DIMENSIONS = 1 << 18
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "at", "best", "for", "from", "how", "i", "in", "is",
+    "me", "of", "on", "or", "the", "to", "top", "what", "where", "which", "with",
+})
+
+# ==================== Vectorizer ====================
+
+def _tokens(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed and plurals folded."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % HASH_DIMENSIONS
+
+def vectorize(text: str) -> Dict[int, float]:
+    """Return a unit-length sparse vector of hashed word and trigram features."""
+    vector: Dict[int, float] = {}
+    for token in _tokens(text):
+        index = _bucket("w:" + token)
+        vector[index] = vector.get(index, 0.0) + 1.0
+        padded = f"#{token}#"
+        for i in range(len(padded) - 2):
+            index = _bucket("c:" + padded[i:i + 3])
+            vector[index] = vector.get(index, 0.0) + 0.5
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if norm:
+        vector = {index: value / norm for index, value in vector.items()}
+    return vector
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Cosine similarity of two unit-length sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+# ==================== Cache ====================
+
+class SemanticCache:
+    """Thread-safe in-process cache that matches queries by similarity."""
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (namespace, scope, query) -> (vector, value, expires_at), kept in LRU order
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[Dict[int, float], Any, float]]" = OrderedDict()
+        self._counters = {"hits": 0, "near_hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def _scope(scope: Optional[str]) -> str:
+        return " ".join(_tokens(scope or ""))
+
+    def get(self, query: str, namespace: str = "", scope: Optional[str] = None) -> Optional[Any]:
+        """Return the value stored for the most similar live query, if any."""
+        vector = vectorize(query)
+        scope_key = self._scope(scope)
+        now = time.time()
+        best_key, best_score = None, 0.0
+        with self._lock:
+            for key, (entry_vector, _, expires_at) in list(self._entries.items()):
+                if expires_at <= now:
+                    del self._entries[key]
+                    continue
+                if key[0] != namespace or key[1] != scope_key:
+                    continue
+                score = cosine(vector, entry_vector)
+                if score > best_score:
+                    best_key, best_score = key, score
+            if best_key is None or best_score < self.threshold:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self._counters["hits" if best_key[2] == query else "near_hits"] += 1
+            return self._entries[best_key][1]
+
+    def put(self, query: str, value: Any, namespace: str = "", scope: Optional[str] = None, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value for a query, evicting least-recently-used entries when full."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        key = (namespace, self._scope(scope), query)
+        with self._lock:
+            self._entries[key] = (vectorize(query), value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def get_or_compute(
+        self,
+        query: str,
+        compute: Callable[[], Any],
+        namespace: str = "",
+        scope: Optional[str] = None,
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """Return a cached value for a similar query, or compute and store a new one."""
+        cached = self.get(query, namespace=namespace, scope=scope)
+        if cached is not None:
+            return cached
+        value = compute()
+        if cacheable(value):
+            self.put(query, value, namespace=namespace, scope=scope)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["near_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["near_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+# ==================== Process-wide Instance ====================
+_shared_cache: Optional[SemanticCache] = None
+_shared_lock = threading.Lock()
+
+def get_retrieval_cache() -> Optional[SemanticCache]:
+    """Return the shared retrieval cache, or None when TRAVEL_SEMANTIC_CACHE=0."""
+    global _shared_cache
+    if os.environ.get("TRAVEL_SEMANTIC_CACHE", "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = SemanticCache(
+                threshold=float(os.environ.get("TRAVEL_SEMANTIC_CACHE_THRESHOLD", DEFAULT_THRESHOLD)),
+                ttl_seconds=float(os.environ.get("TRAVEL_SEMANTIC_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                max_entries=int(os.environ.get("TRAVEL_SEMANTIC_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            )
+        return _shared_cache
+
+def cached_retrieval(
+    namespace: str,
+    query: str,
+    compute: Callable[[], Any],
+    scope: Optional[str] = None,
+    cacheable: Callable[[Any], bool] = lambda value: True,
+) -> Any:
+    """Run a retrieval call through the shared cache when it is enabled."""
+    cache = get_retrieval_cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(query, compute, namespace=namespace, scope=scope, cacheable=cacheable)
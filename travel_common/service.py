@@ -0,0 +1,420 @@
+"""
+Local HTTP service that runs many travel-graph sessions concurrently.
+
+    python -m travel_common.service --port 8765
+
+Sessions are keyed by their LangGraph thread id. ``graph`` is one of the
+names in ``travel_common.graph_adapters`` (``travel_agent``,
+``travel_assistant``):
+
+- ``POST /sessions`` with ``{"graph": ..., "input": {...}}`` starts a session
+  and returns its ``thread_id`` (202);
+- ``GET /sessions/<thread_id>`` returns the status, the feedback node the
+  session waits before and a summary of its state;
+- ``POST /sessions/<thread_id>/feedback`` with ``{"feedback": "..."}``
+  resumes a session that waits for feedback;
+- ``GET /sessions/<thread_id>/events`` streams node updates, plan tokens and
+  status changes as server-sent events (resumable with ``Last-Event-ID``);
+- ``GET /health`` returns pool and session counters;
+- ``GET /metrics`` returns node, LLM and HTTP metrics in the Prometheus text
+  format (see ``travel_common.metrics``).
+
+Graph runs execute on a bounded worker pool. Once every worker is busy and
+the queue is full, new runs are rejected with 503 and ``Retry-After``, so
+overload shows up as fast rejections rather than ever-growing latency.
+Sessions are checkpointed (see ``travel_common.checkpointer``), so a session
+evicted from memory or left behind by a restart is picked up again from its
+checkpoint. Event streams of an evicted session end; a reloaded session
+continues its event ids, so clients reconnect with ``Last-Event-ID``.
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from travel_common.env import disable_prompts
+from travel_common.graph_adapters import GraphAdapter, adapter_for_thread, get_adapter, graph_names, to_jsonable
+from travel_common.metrics import get_metrics
+from travel_common.plan_stream import stream_with_tokens
+
+# ==================== Configuration ====================
+DEFAULT_WORKERS = int(os.environ.get("TRAVEL_SERVICE_WORKERS", "8"))
+DEFAULT_MAX_QUEUE = int(os.environ.get("TRAVEL_SERVICE_MAX_QUEUE", "32"))
+DEFAULT_MAX_SESSIONS = 1000  # Sessions kept in memory; older idle ones reload from checkpoints
+DEFAULT_MAX_STREAMS = 256  # Concurrent SSE connections, each holds a server thread
+MAX_EVENTS_PER_SESSION = 5000
+MAX_BODY_BYTES = 1024 * 1024
+KEEPALIVE_SECONDS = 15.0
+RETRY_AFTER_SECONDS = 5
+
+class Overloaded(Exception):
+    """The worker pool and its queue are full."""
+
+class Conflict(Exception):
+    """The session cannot accept this operation in its current status."""
+
+# ==================== Sessions ====================
+
+class Session:
+    """One thread of one graph: its run status and a bounded log of streamed events."""
+
+    def __init__(self, thread_id: str, adapter: GraphAdapter, status: str = "queued", first_event_id: int = 1):
+        self.thread_id = thread_id
+        self.adapter = adapter
+        self.status = status  # queued, running, waiting_feedback, done, error
+        self.error: Optional[str] = None
+        self.closed = False  # Evicted from the manager; a reloaded Session takes over
+        self.updated = time.time()
+        self._events: Deque[Tuple[int, str, str]] = deque(maxlen=MAX_EVENTS_PER_SESSION)
+        self._next_id = first_event_id
+        self._cond = threading.Condition()
+
+    @property
+    def busy(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error")
+
+    @property
+    def next_event_id(self) -> int:
+        with self._cond:
+            return self._next_id
+
+    def close(self) -> None:
+        """End the event streams of a session the manager no longer tracks."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def emit(self, event: str, data: Any) -> None:
+        payload = json.dumps(to_jsonable(data), ensure_ascii=False)
+        with self._cond:
+            self._events.append((self._next_id, event, payload))
+            self._next_id += 1
+            self.updated = time.time()
+            self._cond.notify_all()
+
+    def set_status(self, status: str, **details: Any) -> None:
+        with self._cond:
+            self.status = status
+        self.emit("status", {"status": status, **details})
+
+    def wait_events(self, after: int, timeout: float) -> List[Tuple[int, str, str]]:
+        """Events with an id above `after`, waiting up to `timeout` seconds for the first one."""
+        with self._cond:
+            if not (self._events and self._events[-1][0] > after) and not (self.finished or self.closed):
+                self._cond.wait(timeout)
+            return [event for event in self._events if event[0] > after]
+
+class SessionManager:
+    """Runs graph sessions on a bounded worker pool with admission control."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_queue: int = DEFAULT_MAX_QUEUE, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self.max_sessions = max_sessions
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="graph-run")
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = 0
+        # Next event id of evicted sessions, so a reloaded session keeps Last-Event-ID valid
+        self._event_ids: "OrderedDict[str, int]" = OrderedDict()
+        self._counters = {"runs": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def _admit(self) -> None:
+        """Reserve a slot for one run (lock held)."""
+        if self._inflight >= self.capacity:
+            self._counters["rejected"] += 1
+            raise Overloaded()
+        self._inflight += 1
+        self._counters["runs"] += 1
+
+    def _remember(self, session: Session) -> None:
+        """Track a session, evicting the oldest idle ones beyond max_sessions (lock held)."""
+        self._sessions[session.thread_id] = session
+        self._sessions.move_to_end(session.thread_id)
+        for thread_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if not self._sessions[thread_id].busy:
+                evicted = self._sessions.pop(thread_id)
+                evicted.close()
+                self._event_ids[thread_id] = evicted.next_event_id
+                while len(self._event_ids) > self.max_sessions:
+                    self._event_ids.popitem(last=False)
+
+    def start(self, graph: str, request: Dict[str, Any]) -> Session:
+        adapter = get_adapter(graph)
+        inputs = adapter.initial_state(request)
+        session = Session(adapter.new_thread_id(), adapter)
+        with self._lock:
+            self._admit()
+            self._remember(session)
+        session.set_status("queued")
+        self._executor.submit(self._run, session, inputs)
+        return session
+
+    def feedback(self, thread_id: str, feedback: str) -> Session:
+        session = self.get(thread_id)
+        if session is None:
+            raise KeyError(thread_id)
+        with self._lock:
+            if session.status != "waiting_feedback":
+                raise Conflict(f"Session is {session.status}, not waiting for feedback")
+            self._admit()
+            session.status = "queued"
+        try:
+            node = session.adapter.apply_feedback(thread_id, feedback)
+        except Exception:
+            with self._lock:
+                self._inflight -= 1
+                session.status = "waiting_feedback"
+            raise
+        session.set_status("queued", feedback_node=node)
+        self._executor.submit(self._run, session, None)
+        return session
+
+    def get(self, thread_id: str) -> Optional[Session]:
+        """The session for a thread id, reloading it from its checkpoint if needed."""
+        with self._lock:
+            session = self._sessions.get(thread_id)
+        if session is not None:
+            return session
+        adapter = adapter_for_thread(thread_id)
+        if adapter is None:
+            return None
+        snapshot = adapter.graph.get_state(adapter.config(thread_id))
+        if not snapshot.values:
+            return None
+        with self._lock:
+            # Another request may have reloaded it meanwhile
+            session = self._sessions.get(thread_id)
+            if session is None:
+                status = "waiting_feedback" if snapshot.next else "done"
+                session = Session(thread_id, adapter, status, first_event_id=self._event_ids.pop(thread_id, 1))
+            self._remember(session)
+        return session
+
+    def _run(self, session: Session, inputs: Any) -> None:
+        adapter = session.adapter
+        config = adapter.config(session.thread_id)
+        session.set_status("running")
+        try:
+            for mode, payload in stream_with_tokens(adapter.graph, inputs, config, adapter.plan_nodes):
+                if mode == "token":
+                    node, text = payload
+                    session.emit("token", {"node": node, "text": text})
+                    continue
+                for node, update in payload.items():
+                    if node != "__interrupt__":
+                        session.emit("update", {"node": node, "update": update})
+            pending = adapter.pending(session.thread_id)
+            with self._lock:
+                self._counters["completed"] += 1
+            if pending:
+                session.set_status("waiting_feedback", pending=pending)
+            else:
+                session.set_status("done")
+        except Exception as e:
+            session.error = str(e)
+            with self._lock:
+                self._counters["failed"] += 1
+            session.set_status("error", error=session.error)
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+    def describe(self, session: Session) -> Dict[str, Any]:
+        values = session.adapter.values(session.thread_id)
+        pending = session.adapter.pending(session.thread_id) if session.status == "waiting_feedback" else None
+        return {
+            "thread_id": session.thread_id,
+            "graph": session.adapter.name,
+            "status": session.status,
+            "pending": pending,
+            "error": session.error,
+            "state": to_jsonable(session.adapter.summary(values)),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            busy = sum(1 for session in self._sessions.values() if session.busy)
+            return {
+                **self._counters,
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "inflight": self._inflight,
+                "sessions": len(self._sessions),
+                "busy_sessions": busy,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# ==================== HTTP Handler ====================
+
+SESSION_PATH = re.compile(r"^/sessions/([A-Za-z0-9_.-]+)(/feedback|/events)?/?$")
+
+class TravelServiceHandler(BaseHTTPRequestHandler):
+    """JSON and SSE endpoints over a SessionManager (set on the server as `manager`)."""
+
+    server_version = "TravelService/1.0"
+
+    @property
+    def manager(self) -> SessionManager:
+        return self.server.manager
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, code: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        return body
+
+    def _overloaded(self) -> None:
+        self._send_json(503, {"error": "Service overloaded, retry later"}, {"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send_json(200, {**self.manager.stats(), "graphs": graph_names(), "streams": self.server.streams})
+            return
+        if url.path == "/metrics":
+            data = get_metrics().render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        match = SESSION_PATH.match(url.path)
+        if not match or match.group(2) == "/feedback":
+            self._send_json(404, {"error": "Not found"})
+            return
+        session = self.manager.get(match.group(1))
+        if session is None:
+            self._send_json(404, {"error": f"Unknown session {match.group(1)}"})
+            return
+        if match.group(2) == "/events":
+            after = self.headers.get("Last-Event-ID") or parse_qs(url.query).get("after", ["0"])[0]
+            self._stream_events(session, int(after) if after.isdigit() else 0)
+            return
+        self._send_json(200, self.manager.describe(session))
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        try:
+            body = self._read_json()
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid request body: {e}"})
+            return
+        try:
+            if url.path.rstrip("/") == "/sessions":
+                request = body.get("input", {})
+                if not isinstance(request, dict):
+                    raise ValueError("'input' must be a JSON object")
+                session = self.manager.start(str(body.get("graph", "")), request)
+                self._send_json(202, {"thread_id": session.thread_id, "status": session.status},
+                                {"Location": f"/sessions/{session.thread_id}"})
+                return
+            match = SESSION_PATH.match(url.path)
+            if not match or match.group(2) != "/feedback":
+                self._send_json(404, {"error": "Not found"})
+                return
+            session = self.manager.feedback(match.group(1), str(body.get("feedback") or ""))
+            self._send_json(202, {"thread_id": session.thread_id, "status": session.status})
+        except Overloaded:
+            self._overloaded()
+        except KeyError as e:
+            self._send_json(404, {"error": f"Unknown session {e.args[0]}"})
+        except Conflict as e:
+            self._send_json(409, {"error": str(e)})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+
+    def _stream_events(self, session: Session, after: int) -> None:
+        """Send events as they arrive until the session finishes or the client disconnects."""
+        with self.server.streams_lock:
+            if self.server.streams >= self.server.max_streams:
+                self._overloaded()
+                return
+            self.server.streams += 1
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            while True:
+                events = session.wait_events(after, KEEPALIVE_SECONDS)
+                chunks = [f"id: {event_id}\nevent: {name}\ndata: {data}\n\n" for event_id, name, data in events]
+                self.wfile.write(("".join(chunks) or ": keepalive\n\n").encode("utf-8"))
+                self.wfile.flush()
+                if events:
+                    after = events[-1][0]
+                elif session.finished or session.closed:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        finally:
+            with self.server.streams_lock:
+                self.server.streams -= 1
+
+class TravelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], manager: SessionManager, max_streams: int = DEFAULT_MAX_STREAMS, quiet: bool = False):
+        super().__init__(address, TravelServiceHandler)
+        self.manager = manager
+        self.max_streams = max_streams
+        self.streams = 0
+        self.streams_lock = threading.Lock()
+        self.quiet = quiet
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the travel graphs over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent graph runs")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="Runs waiting for a worker before new ones are rejected")
+    args = parser.parse_args()
+    disable_prompts()  # A missing API key fails the run instead of waiting for input
+
+    manager = SessionManager(workers=args.workers, max_queue=args.max_queue)
+    server = TravelServer((args.host, args.port), manager)
+    print(f"Travel service listening on http://{args.host}:{args.port} (graphs: {', '.join(graph_names())})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+        manager.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Speculative background work keyed by session.
+
+While a graph waits at a human-feedback interrupt, the work it will most
+likely do next (researching the proposed subtopics, interviewing the proposed
+travelers) can already run on a small thread pool. Each task is registered
+under ``(session, key)``; when the graph gets there it ``take``s the task and
+waits for it instead of starting the same work again. A task still queued
+behind other speculative work is cancelled instead, and the node does the
+work itself rather than wait for a pool slot. Tasks whose key is no
+longer wanted after the user's edit are cancelled if they have not started
+and their results are dropped otherwise. Only the most recent
+``max_sessions`` sessions are kept, so abandoned sessions cannot pile up.
+"""
+
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# ==================== Configuration ====================
+DEFAULT_WORKERS = int(os.environ.get("TRAVEL_SPECULATIVE_WORKERS", "4"))
+DEFAULT_MAX_SESSIONS = 64
+
+def speculation_enabled() -> bool:
+    """Speculative prefetch is opt-in (TRAVEL_SPECULATIVE=1): it spends API calls on work the user may reject."""
+    return os.environ.get("TRAVEL_SPECULATIVE", "").strip().lower() in ("1", "true", "yes", "on")
+
+class Speculator:
+    """Runs speculative tasks per session and hands them over once they are needed."""
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.max_workers = max_workers
+        self.max_sessions = max_sessions
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._sessions: "OrderedDict[str, Dict[str, Future]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"started": 0, "used": 0, "dropped": 0}
+
+    def _drop(self, futures: Iterable[Future]) -> None:
+        """Cancel tasks that have not started; results of running ones are ignored (lock held)."""
+        for future in futures:
+            future.cancel()
+            self._counters["dropped"] += 1
+
+    def start(self, session: str, key: str, fn: Callable[..., Any], *args: Any) -> bool:
+        """Run fn(*args) in the background unless this session already has a task for key."""
+        with self._lock:
+            tasks = self._sessions.get(session)
+            if tasks is None:
+                tasks = self._sessions[session] = {}
+                while len(self._sessions) > self.max_sessions:
+                    _, evicted = self._sessions.popitem(last=False)
+                    self._drop(evicted.values())
+            self._sessions.move_to_end(session)
+            if key in tasks:
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="speculative")
+            tasks[key] = self._executor.submit(fn, *args)
+            self._counters["started"] += 1
+            return True
+
+    def take(self, session: str, key: str) -> Optional[Future]:
+        """Remove and return the running or finished task for key; None if nothing was
+        speculated or the task had not started yet (it is cancelled then)."""
+        with self._lock:
+            future = self._sessions.get(session, {}).pop(key, None)
+            if future is None or future.cancelled():
+                return None
+            if future.cancel():
+                self._counters["dropped"] += 1
+                return None
+            self._counters["used"] += 1
+            return future
+
+    def retain(self, session: str, keys: Iterable[str]) -> None:
+        """Drop the session's tasks whose key is not in keys (after the user edited the proposal)."""
+        wanted = set(keys)
+        with self._lock:
+            tasks = self._sessions.get(session, {})
+            stale = [key for key in tasks if key not in wanted]
+            self._drop(tasks.pop(key) for key in stale)
+
+    def discard(self, session: str) -> None:
+        """Drop every remaining task of a session."""
+        with self._lock:
+            self._drop(self._sessions.pop(session, {}).values())
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for tasks in self._sessions.values():
+                self._drop(tasks.values())
+            self._sessions.clear()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = sum(len(tasks) for tasks in self._sessions.values())
+            return {**self._counters, "sessions": len(self._sessions), "pending": pending}
+
+_shared_speculator: Optional[Speculator] = None
+_shared_lock = threading.Lock()
+
+def get_speculator() -> Speculator:
+    """Return the process-wide speculator (pool size from TRAVEL_SPECULATIVE_WORKERS)."""
+    global _shared_speculator
+    with _shared_lock:
+        if _shared_speculator is None:
+            _shared_speculator = Speculator()
+            atexit.register(_shared_speculator.shutdown)
+        return _shared_speculator
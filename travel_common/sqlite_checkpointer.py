@@ -0,0 +1,198 @@
+"""
+Disk-backed LangGraph checkpointer with retention and background compaction.
+
+``RetentionSqliteSaver`` extends ``SqliteSaver`` with a per-thread activity
+table and a retention policy:
+
+- every ``put`` keeps at most ``max_checkpoints_per_thread`` checkpoints per
+  thread and namespace, deleting older ones together with their writes;
+- a daemon thread deletes threads idle for longer than ``max_age_seconds`` and
+  compacts finished threads idle for ``compact_after_seconds`` down to their
+  latest checkpoint, which is all that is needed to inspect them; threads
+  paused at a feedback interrupt keep their history;
+- SQLite's page cache is capped and freed pages are returned to the file
+  system, so resident memory stays bounded however many sessions are stored.
+
+When the serializer keeps large strings in a blob store, compaction also
+drops blobs that no checkpoint has written for two retention periods.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.constants import TASKS
+
+# ==================== Configuration ====================
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_CHECKPOINTS_PER_THREAD = 20
+DEFAULT_COMPACT_AFTER_SECONDS = 15 * 60
+DEFAULT_COMPACT_INTERVAL_SECONDS = 5 * 60
+CACHE_SIZE_KIB = 8 * 1024  # SQLite page cache per connection
+
+class RetentionSqliteSaver(SqliteSaver):
+    """SqliteSaver that prunes old checkpoints and compacts idle threads."""
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        max_checkpoints_per_thread: int = DEFAULT_MAX_CHECKPOINTS_PER_THREAD,
+        compact_after_seconds: float = DEFAULT_COMPACT_AFTER_SECONDS,
+        compact_interval_seconds: float = DEFAULT_COMPACT_INTERVAL_SECONDS,
+        serde: Optional[Any] = None,
+    ) -> None:
+        super().__init__(conn, serde=serde)
+        self.max_age_seconds = max_age_seconds
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.compact_after_seconds = compact_after_seconds
+        self.compact_interval_seconds = compact_interval_seconds
+        self._counters = {"pruned": 0, "compacted_threads": 0, "expired_threads": 0}
+        self._stop = threading.Event()
+        if compact_interval_seconds > 0:
+            threading.Thread(target=self._compact_forever, name="checkpoint-compactor", daemon=True).start()
+
+    @classmethod
+    def from_path(cls, path: str, **kwargs: Any) -> "RetentionSqliteSaver":
+        """Open (or create) a checkpoint database that lives for the whole process."""
+        conn = sqlite3.connect(path, check_same_thread=False)
+        return cls(conn, **kwargs)
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        # auto_vacuum only takes effect before the first table is created; databases
+        # created without it switch modes with a one-time full VACUUM
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self.conn.execute("VACUUM")
+        self.conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        super().setup()
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS thread_activity (
+                thread_id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL,
+                compacted INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS thread_activity_updated ON thread_activity (updated_at);
+            """
+        )
+
+    def put(self, config: RunnableConfig, checkpoint: Any, metadata: Any, new_versions: Any) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = str(saved["configurable"]["thread_id"])
+        checkpoint_ns = saved["configurable"]["checkpoint_ns"]
+        with self.cursor() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO thread_activity (thread_id, updated_at, compacted) VALUES (?, ?, 0)",
+                (thread_id, time.time()),
+            )
+            self._prune(cur, thread_id, checkpoint_ns, self.max_checkpoints_per_thread)
+        return saved
+
+    def _prune(self, cur: sqlite3.Cursor, thread_id: str, checkpoint_ns: str, keep: int) -> None:
+        """Delete all but the `keep` newest checkpoints (ids are time-ordered) of one namespace."""
+        cur.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (thread_id, checkpoint_ns, keep - 1),
+        )
+        row = cur.fetchone()
+        if row is None:
+            return
+        cur.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+            (thread_id, checkpoint_ns, row[0]),
+        )
+        self._counters["pruned"] += cur.rowcount
+        cur.execute(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+            (thread_id, checkpoint_ns, row[0]),
+        )
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+
+    # ==================== Compaction ====================
+
+    def _waiting(self, cur: sqlite3.Cursor, thread_id: str) -> bool:
+        """Whether the thread's latest root checkpoint still has nodes to run (paused at an interrupt)."""
+        row = cur.execute(
+            "SELECT parent_checkpoint_id, type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+            "ORDER BY checkpoint_id DESC LIMIT 1",
+            (thread_id,),
+        ).fetchone()
+        if row is None:
+            return False
+        checkpoint = self.serde.loads_typed((row[1], row[2]))
+        if any(channel.startswith("branch:to:") for channel in checkpoint.get("channel_values", {})):
+            return True
+        # Send fan-outs are stored as task writes on the parent checkpoint
+        return cur.execute(
+            "SELECT 1 FROM writes WHERE thread_id = ? AND checkpoint_ns = '' AND checkpoint_id = ? AND channel = ? LIMIT 1",
+            (thread_id, row[0], TASKS),
+        ).fetchone() is not None
+
+    def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Expire old threads, keep only the latest checkpoint of idle finished ones and reclaim space."""
+        now = time.time() if now is None else now
+        with self.cursor() as cur:
+            expired = [row[0] for row in cur.execute(
+                "SELECT thread_id FROM thread_activity WHERE updated_at < ?", (now - self.max_age_seconds,)
+            ).fetchall()]
+            for thread_id in expired:
+                for table in ("checkpoints", "writes", "thread_activity"):
+                    cur.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+            idle = [row[0] for row in cur.execute(
+                "SELECT thread_id FROM thread_activity WHERE compacted = 0 AND updated_at < ?",
+                (now - self.compact_after_seconds,),
+            ).fetchall()]
+            idle = [thread_id for thread_id in idle if not self._waiting(cur, thread_id)]
+            for thread_id in idle:
+                namespaces = [row[0] for row in cur.execute(
+                    "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+                ).fetchall()]
+                for checkpoint_ns in namespaces:
+                    self._prune(cur, thread_id, checkpoint_ns, 1)
+                cur.execute("UPDATE thread_activity SET compacted = 1 WHERE thread_id = ?", (thread_id,))
+
+            self._counters["expired_threads"] += len(expired)
+            self._counters["compacted_threads"] += len(idle)
+
+        # Blobs are touched whenever a checkpoint writes them; keep a full extra
+        # retention period so older checkpoints of live threads stay readable
+        collect_garbage = getattr(self.serde, "collect_garbage", None)
+        if collect_garbage is not None:
+            collect_garbage(now - 2 * self.max_age_seconds)
+        if expired or idle:
+            with self.lock:
+                self.conn.executescript("PRAGMA incremental_vacuum;")  # execute() frees a single page
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"expired": len(expired), "compacted": len(idle)}
+
+    def _compact_forever(self) -> None:
+        while not self._stop.wait(self.compact_interval_seconds):
+            try:
+                self.compact()
+            except sqlite3.Error as e:
+                print(f"Checkpoint compaction failed: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+        with self.lock:
+            self.conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.cursor(transaction=False) as cur:
+            threads = cur.execute("SELECT COUNT(*) FROM thread_activity").fetchone()[0]
+            checkpoints = cur.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        return {**self._counters, "threads": threads, "checkpoints": checkpoints}
@@ -0,0 +1,99 @@
+"""
+Vectorized daily aggregation of OpenWeather 5-day/3-hour forecast lists.
+
+Forecast items for one or many locations are flattened into NumPy arrays and
+grouped by (location, date) in a single sort, which yields the min/max
+temperature, the maximum precipitation probability and the most common
+description per day. Optional rain windows report the 3-hour slots whose
+precipitation probability reaches a threshold, merged into time ranges.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+SLOT_HOURS = 3
+DEFAULT_RAIN_THRESHOLD = 0.5
+
+def _rain_windows(hours: Sequence[int], pops: Sequence[float], threshold: float) -> List[str]:
+    """Merge consecutive rainy 3-hour slots into "HH:00-HH:00" ranges."""
+    windows: List[str] = []
+    start = end = None
+    for hour, pop in zip(hours, pops):
+        if pop < threshold:
+            continue
+        if start is not None and hour == end:
+            end = hour + SLOT_HOURS
+            continue
+        if start is not None:
+            windows.append(f"{start:02d}:00-{min(end, 24):02d}:00")
+        start, end = hour, hour + SLOT_HOURS
+    if start is not None:
+        windows.append(f"{start:02d}:00-{min(end, 24):02d}:00")
+    return windows
+
+def aggregate_daily_batch(
+    forecasts: Dict[str, List[Dict]],
+    days: int = 5,
+    rain_windows: bool = False,
+    rain_threshold: float = DEFAULT_RAIN_THRESHOLD,
+) -> Dict[str, List[Dict]]:
+    """Aggregate raw forecast lists for many locations into per-day summaries."""
+    locations = list(forecasts)
+    items = [(loc_idx, item) for loc_idx, loc in enumerate(locations) for item in forecasts[loc]]
+    result: Dict[str, List[Dict]] = {loc: [] for loc in locations}
+    if not items:
+        return result
+
+    loc_ids = np.fromiter((loc_idx for loc_idx, _ in items), dtype=np.int64, count=len(items))
+    timestamps = np.array([item["dt_txt"] for _, item in items])
+    temps = np.fromiter((item["main"]["temp"] for _, item in items), dtype=np.float64, count=len(items))
+    pops = np.fromiter((item.get("pop", 0.0) for _, item in items), dtype=np.float64, count=len(items))
+    descs = np.array([item["weather"][0]["description"] for _, item in items])
+
+    dates, date_ids = np.unique(timestamps.astype("U10"), return_inverse=True)
+    desc_names, desc_ids = np.unique(descs, return_inverse=True)
+
+    # One group per (location, date); stable sort keeps the 3-hour slots in input order
+    group_ids = loc_ids * len(dates) + date_ids
+    order = np.argsort(group_ids, kind="stable")
+    sorted_groups = group_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    groups = sorted_groups[starts]
+
+    temp_max = np.maximum.reduceat(temps[order], starts)
+    temp_min = np.minimum.reduceat(temps[order], starts)
+    pop_max = np.maximum.reduceat(pops[order], starts)
+
+    # Most common description per group; ties go to the description seen first that day
+    pair_keys = group_ids * len(desc_names) + desc_ids
+    pairs, first_seen, counts = np.unique(pair_keys, return_index=True, return_counts=True)
+    pair_groups = pairs // len(desc_names)
+    ranking = np.lexsort((first_seen, -counts, pair_groups))
+    best = ranking[np.r_[True, pair_groups[ranking][1:] != pair_groups[ranking][:-1]]]
+    dominant = dict(zip(pair_groups[best].tolist(), desc_names[pairs[best] % len(desc_names)].tolist()))
+
+    if rain_windows:
+        hours = np.array([int(ts[11:13]) if len(ts) >= 13 else 0 for ts in timestamps.tolist()])
+        bounds = np.r_[starts, len(order)]
+
+    for i, group in enumerate(groups.tolist()):
+        loc = locations[group // len(dates)]
+        if len(result[loc]) >= days:
+            continue
+        day = {
+            "date": str(dates[group % len(dates)]),
+            "summary": dominant[group],
+            "temp_max": round(float(temp_max[i]), 1),
+            "temp_min": round(float(temp_min[i]), 1),
+            "pop_max": round(float(pop_max[i]), 2),
+        }
+        if rain_windows:
+            slots = order[bounds[i]:bounds[i + 1]]
+            day["rain_windows"] = _rain_windows(hours[slots].tolist(), pops[slots].tolist(), rain_threshold)
+        result[loc].append(day)
+    return result
+
+def aggregate_daily(forecast: List[Dict], days: int = 5, **kwargs) -> List[Dict]:
+    """Aggregate one location's raw forecast list into per-day summaries."""
+    return aggregate_daily_batch({"_": forecast}, days=days, **kwargs)["_"]
@@ -0,0 +1,115 @@
+"""
+Process-wide cache for OpenWeather 5-day/3-hour forecasts.
+
+Forecasts are keyed by latitude/longitude rounded to a ~11 km bucket, so every
+session asking about the same city shares one entry. Entries expire at the next forecast issuance boundary:
+OpenWeather refreshes the 3-hour forecast on 00/03/06/... UTC, and a result
+fetched inside a cycle stays valid until the following cycle is published.
+Concurrent misses for the same key wait on a single in-flight request.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from travel_common.http_client import fetch_forecast
+
+# ==================== Configuration ====================
+ISSUANCE_PERIOD_SECONDS = 3 * 3600
+ISSUANCE_DELAY_SECONDS = 15 * 60  # Time for a new forecast cycle to become available
+COORD_PRECISION = 1  # Decimal places of lat/lon used for the bucket (~11 km)
+DEFAULT_MAX_ENTRIES = 1024
+
+def coord_bucket(lat: float, lon: float, precision: int = COORD_PRECISION) -> Tuple[str, float, float]:
+    """Cache key for a coordinate pair."""
+    return ("coord", round(lat, precision), round(lon, precision))
+
+def next_issuance(now: Optional[float] = None) -> float:
+    """Epoch time at which the next forecast cycle becomes available."""
+    now = time.time() if now is None else now
+    cycle = (now - ISSUANCE_DELAY_SECONDS) // ISSUANCE_PERIOD_SECONDS
+    return (cycle + 1) * ISSUANCE_PERIOD_SECONDS + ISSUANCE_DELAY_SECONDS
+
+# ==================== Cache ====================
+
+class WeatherCache:
+    """Thread-safe forecast cache with issuance-aligned expiry and single-flight misses."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._counters = {"hits": 0, "misses": 0, "shared_waits": 0, "evictions": 0}
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+        """Return the cached forecast for a key, fetching it once per issuance cycle."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self._counters["misses"] += 1
+            else:
+                self._counters["shared_waits"] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            data = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[key] = (next_issuance(), data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+            self._inflight.pop(key, None)
+        future.set_result(data)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        return stats
+
+_shared_cache: Optional[WeatherCache] = None
+_shared_lock = threading.Lock()
+
+def get_weather_cache() -> Optional[WeatherCache]:
+    """Return the shared forecast cache, or None when TRAVEL_WEATHER_CACHE=0."""
+    global _shared_cache
+    if os.environ.get("TRAVEL_WEATHER_CACHE", "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = WeatherCache()
+        return _shared_cache
+
+# ==================== Forecast Helpers ====================
+
+def _cached(key: Hashable, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+    cache = get_weather_cache()
+    return fetch() if cache is None else cache.get_or_fetch(key, fetch)
+
+def forecast_for_coords(lat: float, lon: float, api_key: str) -> List[Dict]:
+    """Raw forecast list for a coordinate pair, shared across sessions"""
+    return _cached(coord_bucket(lat, lon), lambda: fetch_forecast({"lat": lat, "lon": lon}, api_key))